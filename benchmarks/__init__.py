@@ -0,0 +1,3 @@
+"""
+Benchmarks of parsing and rendering synthetic docs, see benchmarks.docgen and python -m toycommons.benchmarks.
+"""
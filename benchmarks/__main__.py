@@ -0,0 +1,171 @@
+"""
+Rendering benchmarks over synthetic docs, run from the folder holding the package:
+    python -m toycommons.benchmarks --out results.json
+    python -m toycommons.benchmarks --shapes small tables --repeats 10
+    python -m toycommons.benchmarks compare before.json after.json
+"""
+from dataclasses import asdict
+from datetime import datetime, timezone
+from functools import partial
+from statistics import median
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from ..drive.document import GoogleDoc, HTMLConverter, TextConverter, MarkdownConverter
+
+from .docgen import SHAPES, SyntheticDoc
+
+
+def _parse(payload, **options):
+    return lambda: GoogleDoc(payload, **options)
+
+
+def _html(payload, **options):
+    def run():
+        # a fresh doc every time: its memoized styles and render context are part of a cold render
+        doc = GoogleDoc(payload)
+        return lambda: HTMLConverter(doc, fragments=None, **options).body_as_html()
+    return run
+
+
+def _warm(converter, **render):
+    return lambda: converter.body_as_html(**render)
+
+
+BENCHMARKS = {
+    # name -> (payload, doc) -> (setup or None, timed call); setup's result replaces the timed call when given
+    'parse': lambda payload, doc: (None, _parse(payload)),
+    'parse_interned': lambda payload, doc: (None, _parse(payload, intern=True)),
+    'html': lambda payload, doc: (_html(payload), None),
+    'html_extract_styles': lambda payload, doc: (_html(payload, extract_styles='block'), None),
+    'html_warm': lambda payload, doc: (None, _warm(HTMLConverter(doc, fragments=None))),
+    'html_named_range': lambda payload, doc: (None, _warm(HTMLConverter(doc, fragments=None), named_range='middle')),
+    'text': lambda payload, doc: (None, TextConverter(doc).body_as_text),
+    'markdown': lambda payload, doc: (None, MarkdownConverter(doc).body_as_text),
+    'pack': lambda payload, doc: (None, doc.pack),
+    'unpack': lambda payload, doc: (None, partial(GoogleDoc.unpack, doc.pack())),
+}
+
+
+def _size(result):
+    if isinstance(result, (str, bytes)):
+        return len(result.encode() if isinstance(result, str) else result)
+    return None
+
+
+def measure(setup, call, repeats: int) -> dict:
+    """
+    Times repeats runs of call (or of what setup returns, built outside the timing), then one more under
+    tracemalloc for the peak of memory allocated while running.
+    """
+    times, result = [], None
+    for _ in range(repeats):
+        if setup is not None:
+            call = setup()
+        gc.collect()
+        start = time.perf_counter()
+        result = call()
+        times.append(time.perf_counter() - start)
+    if setup is not None:
+        call = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        call()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'min': min(times), 'median': median(times), 'repeats': repeats, 'output_bytes': _size(result),
+            'peak_memory': peak}
+
+
+def run_shape(name: str, repeats: int, benchmarks) -> dict:
+    shape = SHAPES[name]
+    payload = json.dumps(SyntheticDoc(shape).json())
+    doc = GoogleDoc(payload)
+    out = {'shape': asdict(shape), 'input_bytes': len(payload.encode()),
+           'elements': len(doc.body), 'benchmarks': {}}
+    for bench in benchmarks:
+        out['benchmarks'][bench] = measure(*BENCHMARKS[bench](payload, doc), repeats)
+        print(f'{name:>8} {bench:<20} {_format(out["benchmarks"][bench])}', file=sys.stderr)
+    return out
+
+
+def _format(result: dict) -> str:
+    size = '' if result['output_bytes'] is None else f'{result["output_bytes"] / 1024:10.1f} KiB'
+    return f'{result["min"] * 1000:10.2f} ms  median {result["median"] * 1000:10.2f} ms ' \
+           f'{result["peak_memory"] / (1 << 20):8.2f} MiB peak {size}'
+
+
+def _revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(shapes, repeats: int, benchmarks) -> dict:
+    return {
+        'version': 1,
+        'revision': _revision(),
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'results': {q: run_shape(q, repeats, benchmarks) for q in shapes},
+    }
+
+
+def compare(before: dict, after: dict):
+    """
+    Prints after / before of every timing and size both runs have: below 1 is faster or smaller.
+    """
+    print(f'{before["revision"] or "?"} -> {after["revision"] or "?"}')
+    for shape, results in after['results'].items():
+        old = before['results'].get(shape)
+        if old is None:
+            continue
+        if old['shape'] != results['shape']:
+            print(f'{shape}: shape differs, skipped')
+            continue
+        for bench, result in results['benchmarks'].items():
+            previous = old['benchmarks'].get(bench)
+            if previous is None:
+                continue
+            ratios = [f'{key} {result[key] / previous[key]:6.3f}'
+                      for key in ('min', 'median', 'peak_memory', 'output_bytes') if result[key] and previous[key]]
+            print(f'{shape:>8} {bench:<20} {"  ".join(ratios)}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m toycommons.benchmarks', description='Rendering benchmarks on synthetic docs')
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=['small', 'medium', 'tables', 'lists'])
+    parser.add_argument('--benchmarks', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--out', help='write results as json to this file')
+    sub = parser.add_subparsers(dest='command')
+    comparison = sub.add_parser('compare', help='compare two result files')
+    comparison.add_argument('before')
+    comparison.add_argument('after')
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.before) as f, open(args.after) as g:
+            compare(json.load(f), json.load(g))
+        return
+    results = run(args.shapes, args.repeats, args.benchmarks)
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
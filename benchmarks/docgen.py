@@ -0,0 +1,233 @@
+from dataclasses import dataclass, asdict
+import random
+
+WORDS = 'lorem ipsum dolor sit amet consectetur adipiscing elit sed do eiusmod tempor incididunt ut labore ' \
+        'et dolore magna aliqua <b> & "quoted"'.split()
+GLYPHS = [{'glyphType': 'DECIMAL'}, {'glyphType': 'ALPHA'}, {'glyphSymbol': '●'}, {'glyphType': 'ROMAN'},
+          {'glyphSymbol': '○'}, {'glyphType': 'UPPER_ALPHA'}]
+
+
+@dataclass
+class DocShape:
+    """
+    Size and makeup of a synthetic doc. Shares are per top-level paragraph.
+    """
+    paragraphs: int = 1000
+    lists: float = 0.2  # list items
+    list_depth: int = 3  # nesting levels used by list items
+    headings: float = 0.06
+    tables: float = 0.03
+    table_size: tuple = (3, 3)  # max rows, columns
+    nested_tables: float = 0.1  # cells holding another table
+    images: float = 0.02
+    sections: float = 0.005
+    style_density: float = 0.3  # chance of every text and paragraph style attribute
+    runs: tuple = (1, 4)  # text runs per paragraph
+    words: tuple = (1, 8)  # words per run
+    seed: int = 0
+
+
+SHAPES = {
+    'small': DocShape(paragraphs=200),
+    'medium': DocShape(paragraphs=2000),
+    'large': DocShape(paragraphs=10000),
+    'lists': DocShape(paragraphs=2000, lists=0.7, list_depth=5),
+    'tables': DocShape(paragraphs=1000, tables=0.2, table_size=(6, 5), nested_tables=0.2),
+    'plain': DocShape(paragraphs=2000, style_density=0.0, images=0.0),
+    'styled': DocShape(paragraphs=2000, style_density=0.8),
+}
+
+
+def _dim(magnitude, unit='PT'):
+    return {'magnitude': magnitude, 'unit': unit}
+
+
+def _color(red, green, blue):
+    return {'color': {'rgbColor': {'red': red, 'green': green, 'blue': blue}}}
+
+
+class SyntheticDoc:
+    """
+    Docs API json of a made up document of the given shape, with consistent start/end offsets.
+    The same shape (and seed) always gives the same json.
+    """
+
+    def __init__(self, shape: DocShape = None):
+        self.shape = shape or DocShape()
+        self.rnd = random.Random(self.shape.seed)
+        self.index = 1
+        self.heading = 0
+        self.inline_objects = {}
+        self.positioned_objects = {}
+
+    def chance(self, share):
+        return self.rnd.random() < share
+
+    def border(self):
+        return {'color': _color(0, 0, self.rnd.choice([0, .5])), 'width': _dim(self.rnd.choice([1, 0.5])),
+                'dashStyle': self.rnd.choice(['SOLID', 'DOT', 'DASH']), 'padding': _dim(1)}
+
+    def text_style(self):
+        density, style = self.shape.style_density, {}
+        for attr in ('bold', 'italic', 'underline', 'strikethrough'):
+            if self.chance(density / 2):
+                style[attr] = True
+        if self.chance(density):
+            style['foregroundColor'] = _color(self.rnd.choice([0, 1, .5]), 0, self.rnd.choice([0, 1]))
+        if self.chance(density / 2):
+            style['backgroundColor'] = _color(1, 1, self.rnd.choice([0, .8]))
+        if self.chance(density):
+            style['fontSize'] = _dim(self.rnd.choice([10, 11, 14]))
+        if self.chance(density):
+            style['weightedFontFamily'] = {'fontFamily': self.rnd.choice(['Arial', 'Roboto']), 'weight': 400}
+        if self.chance(density / 6):
+            style['link'] = {'url': 'https://example.com/'}
+        elif self.chance(density / 10) and self.heading:
+            style['link'] = {'headingId': f'h.{self.rnd.randint(1, self.heading)}'}
+        return style
+
+    def paragraph_style(self, named_style='NORMAL_TEXT'):
+        density = self.shape.style_density
+        style = {'namedStyleType': named_style, 'direction': 'LEFT_TO_RIGHT'}
+        if self.chance(density):
+            style['spaceAbove'] = _dim(6)
+        if self.chance(density / 3):
+            style['borderBottom'] = self.border()
+        if self.chance(density / 3):
+            style['borderTop'] = self.border()
+        if self.chance(density / 6):
+            style['borderBetween'] = self.border()
+        if self.chance(density / 3):
+            style['shading'] = {'backgroundColor': _color(.9, .9, .9)}
+        if self.chance(density / 3):
+            style['alignment'] = self.rnd.choice(['CENTER', 'END', 'JUSTIFIED'])
+        if self.chance(density / 3):
+            style['lineSpacing'] = 115
+        return style
+
+    def image(self, positioned):
+        object_id = f'kix.obj{len(self.inline_objects) + len(self.positioned_objects)}'
+        embedded = {'title': 'image', 'description': 'synthetic', 'size': {'height': _dim(100), 'width': _dim(200)},
+                    'marginTop': _dim(9), 'marginLeft': _dim(9),
+                    'imageProperties': {'contentUri': f'https://example.com/{object_id}.png'}}
+        if positioned:
+            self.positioned_objects[object_id] = {'objectId': object_id, 'positionedObjectProperties': {
+                'positioning': {'layout': 'WRAP_TEXT', 'leftOffset': _dim(3), 'topOffset': _dim(4)},
+                'embeddedObject': embedded}}
+        else:
+            self.inline_objects[object_id] = {'objectId': object_id,
+                                              'inlineObjectProperties': {'embeddedObject': embedded}}
+        return object_id
+
+    def element(self, key, content, start):
+        return {'startIndex': start, 'endIndex': self.index, key: content}
+
+    def paragraph(self, named_style='NORMAL_TEXT', heading_id=None, bullet=None):
+        start, elements = self.index, []
+        for _ in range(self.rnd.randint(*self.shape.runs)):
+            text = ' '.join(self.rnd.choice(WORDS) for _ in range(self.rnd.randint(*self.shape.words))) + ' '
+            elements.append({'startIndex': self.index, 'endIndex': self.index + len(text),
+                             'textRun': {'content': text, 'textStyle': self.text_style()}})
+            self.index += len(text)
+        paragraph = {'paragraphStyle': self.paragraph_style(named_style)}
+        if heading_id is not None:
+            paragraph['paragraphStyle']['headingId'] = heading_id
+        if bullet is not None:
+            paragraph['bullet'] = bullet
+        if self.chance(self.shape.images):
+            if self.chance(.5):
+                paragraph['positionedObjectIds'] = [self.image(positioned=True)]
+            else:
+                elements.append({'startIndex': self.index, 'endIndex': self.index + 1,
+                                 'inlineObjectElement': {'inlineObjectId': self.image(positioned=False)}})
+                self.index += 1
+        elements.append({'startIndex': self.index, 'endIndex': self.index + 1,
+                         'textRun': {'content': '\n', 'textStyle': {}}})
+        self.index += 1
+        paragraph['elements'] = elements
+        return self.element('paragraph', paragraph, start)
+
+    def table(self, depth=0):
+        start = self.index
+        self.index += 1
+        max_rows, max_columns = self.shape.table_size
+        rows, columns = self.rnd.randint(1, max_rows), self.rnd.randint(1, max_columns)
+        table_rows = []
+        for row in range(rows):
+            row_start, cells = self.index, []
+            for _ in range(columns):
+                cell_start = self.index
+                content = [self.paragraph()]
+                if depth == 0 and self.chance(self.shape.nested_tables):
+                    content.append(self.table(depth + 1))
+                cells.append({'startIndex': cell_start, 'endIndex': self.index, 'content': content,
+                              'tableCellStyle': {'rowSpan': 1, 'columnSpan': 1, 'backgroundColor': _color(1, 1, 1),
+                                                 'borderLeft': self.border(), 'paddingTop': _dim(5),
+                                                 'paddingLeft': _dim(5), 'contentAlignment': 'TOP'}})
+            table_rows.append({'startIndex': row_start, 'endIndex': self.index, 'tableCells': cells,
+                               'tableRowStyle': {'minRowHeight': _dim(10), 'tableHeader': row == 0}})
+        self.index += 1
+        return self.element('table', {'rows': rows, 'columns': columns, 'tableRows': table_rows, 'tableStyle': {
+            'tableColumnProperties': [{'widthType': 'EVENLY_DISTRIBUTED', 'width': _dim(100)}] * columns
+        }}, start)
+
+    def section_break(self, columns=0):
+        start = self.index
+        self.index += 1
+        style = {'columnSeparatorStyle': 'NONE', 'contentDirection': 'LEFT_TO_RIGHT', 'sectionType': 'CONTINUOUS'}
+        if columns:
+            style['columnProperties'] = [{'width': _dim(200), 'paddingEnd': _dim(5)}] * columns
+        return self.element('sectionBreak', {'sectionStyle': style}, start)
+
+    def json(self) -> dict:
+        shape, body = self.shape, []
+        body.append(self.section_break())
+        lists = {f'kix.list{n}': {'listProperties': {'nestingLevels': [
+            GLYPHS[(n + level) % len(GLYPHS)] for level in range(max(shape.list_depth, 1))
+        ]}} for n in range(3)}
+        list_id, level = None, 0
+        for _ in range(shape.paragraphs):
+            share = self.rnd.random()
+            if share < shape.headings:
+                self.heading += 1
+                named_style = self.rnd.choice(['TITLE', 'HEADING_1', 'HEADING_2', 'HEADING_2', 'HEADING_3'])
+                body.append(self.paragraph(named_style, heading_id=f'h.{self.heading}'))
+                continue
+            share -= shape.headings
+            if share < shape.lists:
+                if list_id is None or self.chance(.05):
+                    list_id, level = self.rnd.choice(list(lists)), 0
+                else:
+                    level = max(0, min(shape.list_depth - 1, level + self.rnd.choice([-1, 0, 0, 1])))
+                body.append(self.paragraph(bullet={'listId': list_id, 'nestingLevel': level, 'textStyle': {}}))
+                continue
+            list_id = None
+            share -= shape.lists
+            if share < shape.tables:
+                body.append(self.table())
+            elif share - shape.tables < shape.sections:
+                body.append(self.section_break(columns=self.rnd.choice([0, 2])))
+            else:
+                body.append(self.paragraph())
+        named_styles = [{'namedStyleType': q, 'textStyle': self.text_style(),
+                         'paragraphStyle': self.paragraph_style(q)}
+                        for q in ('NORMAL_TEXT', 'TITLE', 'SUBTITLE', 'HEADING_1', 'HEADING_2', 'HEADING_3')]
+        return {
+            'title': f'Synthetic {shape.paragraphs}', 'documentId': f'synthetic-{shape.seed}',
+            'revisionId': f'rev-{shape.seed}', 'suggestionsViewMode': 'SUGGESTIONS_INLINE',
+            'body': {'content': body}, 'lists': lists, 'namedStyles': {'styles': named_styles},
+            'inlineObjects': self.inline_objects, 'positionedObjects': self.positioned_objects,
+            'namedRanges': {'middle': {'name': 'middle', 'namedRanges': [{
+                'namedRangeId': 'range.1', 'name': 'middle',
+                'ranges': [{'startIndex': self.index // 3, 'endIndex': 2 * self.index // 3}]}]}},
+            'documentStyle': {'background': _color(1, 1, 1), 'pageSize': {'height': _dim(800), 'width': _dim(600)},
+                              'marginTop': _dim(72)},
+        }
+
+
+def synthetic_doc(shape: DocShape = None, **changes) -> dict:
+    """
+    :param changes: DocShape fields to change, e.g. synthetic_doc(paragraphs=500, tables=0.1)
+    """
+    shape = DocShape(**{**asdict(shape or DocShape()), **changes})
+    return SyntheticDoc(shape).json()
@@ -0,0 +1,35 @@
+from dataclasses import replace
+import unittest
+
+from ...drive.document import GoogleDoc, HTMLConverter
+
+from ..docgen import SHAPES, DocShape, synthetic_doc
+from ..__main__ import BENCHMARKS, measure
+
+
+class DocGenTest(unittest.TestCase):
+    def test_same_seed_same_doc(self):
+        self.assertEqual(synthetic_doc(paragraphs=100), synthetic_doc(paragraphs=100))
+        self.assertNotEqual(synthetic_doc(paragraphs=100), synthetic_doc(paragraphs=100, seed=1))
+
+    def test_shapes_render(self):
+        for name, shape in SHAPES.items():
+            with self.subTest(name):
+                doc = GoogleDoc(synthetic_doc(replace(shape, paragraphs=60)))
+                self.assertTrue(HTMLConverter(doc, fragments=None).body_as_html())
+                self.assertTrue(doc.index.named_range_elements('middle'))
+
+    def test_offsets(self):
+        body = GoogleDoc(synthetic_doc(DocShape(paragraphs=300, tables=0.2))).body
+        self.assertEqual([q.start for q in body[1:]], [q.end for q in body[:-1]])
+
+
+class MeasureTest(unittest.TestCase):
+    def test_benchmarks(self):
+        payload = synthetic_doc(paragraphs=20)
+        doc = GoogleDoc(payload)
+        for name, bench in BENCHMARKS.items():
+            with self.subTest(name):
+                result = measure(*bench(payload, doc), repeats=1)
+                self.assertEqual(result['repeats'], 1)
+                self.assertGreater(result['peak_memory'], 0)
@@ -1,4 +1,7 @@
 
 
 from .google_drive import DriveConnect
-from .drive_mock import DriveMock
\ No newline at end of file
+from .drive_mock import DriveMock
+from .text_index import TextIndex
+from .html_artifacts import HTMLArtifacts
+from .blob_cache import BlobCache
\ No newline at end of file
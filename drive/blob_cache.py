@@ -0,0 +1,99 @@
+from hashlib import md5
+from pathlib import Path
+from threading import Lock
+import os
+
+from .synced import write_atomic
+
+
+class BlobCache:
+    """
+    Content-addressed store of raw downloaded bytes, shared by every SyncedFile of a drive and by every domain
+    pointing at the same folder. Blobs are named by their md5, which Drive reports as md5Checksum,
+    so content whose checksum is known is read from here instead of downloaded, whichever file brought it first.
+    Blobs stay after the files that brought them change, so the folder only grows unless pruned: with max_size,
+    put removes the least recently used blobs past it (see prune). A pruned blob is just downloaded again.
+    """
+
+    def __init__(self, folder: str, max_size: int = None):
+        """
+        :param max_size: bytes of blobs to keep, None to keep them all
+        """
+        self.folder = Path(folder)
+        self.max_size = max_size
+        self.__lock = Lock()
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return md5(data).hexdigest()
+
+    def path(self, digest: str) -> Path:
+        return self.folder / digest[:2] / digest
+
+    def __contains__(self, digest: str):
+        return digest is not None and self.path(digest).is_file()
+
+    def get(self, digest: str) -> bytes:
+        """
+        :return: stored bytes, None if there is no blob with this digest
+        """
+        if digest is None:
+            return None
+        try:
+            with open(self.path(digest), 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        self.touch(digest)
+        return data
+
+    def touch(self, digest: str) -> bool:
+        """
+        Marks the blob as just used, prune removes the least recently used first.
+        :return: False if there is no blob with this digest
+        """
+        if digest is None:
+            return False
+        try:
+            os.utime(self.path(digest))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def put(self, data: bytes) -> str:
+        """
+        Stores the bytes unless the same content is stored already.
+        :return: digest to get them back with
+        """
+        digest = self.digest(data)
+        if not self.touch(digest):
+            write_atomic(self.path(digest), data)
+            if self.max_size is not None:
+                self.prune(self.max_size)
+        return digest
+
+    def prune(self, max_size: int) -> int:
+        """
+        Removes the least recently used blobs until the rest take max_size bytes at most.
+        Files already copied or linked from blobs are not affected.
+        :return: number of blobs removed
+        """
+        with self.__lock:  # one scan at a time in this process, others may prune the same folder
+            blobs = []
+            for path in self.folder.glob('??/*'):
+                if path.name.endswith('.tmp'):  # being written
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                blobs.append((stat.st_mtime, stat.st_size, path))
+            size = sum(q[1] for q in blobs)
+            removed = 0
+            for _, blob_size, path in sorted(blobs, key=lambda q: q[0]):
+                if size <= max_size:
+                    break
+                path.unlink(missing_ok=True)
+                size -= blob_size
+                removed += 1
+            return removed
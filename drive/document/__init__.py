@@ -1,39 +1,48 @@
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import lru_cache
+from hashlib import blake2b
+from itertools import chain, islice
+import base64
 import html
-from typing import Union
-from .json_dataclass.element import Element, DictOfElement, ListOfElement, Field
+import json
+import multiprocessing
+import os
+import pickle
+import weakref
+from .json_dataclass.element import Element, DictOfElement, ListOfElement, OneOfElement, Field, memoized
+from .json_dataclass.field import DigestField
+from .json_dataclass.stream import JsonStream
+from .json_dataclass.pack import pack, unpack, MAGIC
 from .tables import Table
-from .style import DocumentStyle, NamedStyle, Color, TextStyle
+from .style import DocumentStyle, NamedStyle, TextStyle, RenderOptions, render_options
 from .ranges import NamedRange
 from .objects import InlineOrPositionedObject
 from .lists import List
 from .paragraph import Paragraph, Heading
 from .table_of_contents import TableOfContents
 from .layout import SectionBreak
+from .index import DocumentIndex
+from .render_cache import RenderCache, FragmentCache
+from .render_context import RenderContext, ResolvedObject, glyph_equivalence
+from .text_converter import TextConverter, MarkdownConverter
 from dataclasses import dataclass, field
 
 
 class StructuralElement(Element):
     start: int = Field('startIndex', default=0)
     end: int = 'endIndex'  # detection: elements, sectionStyle, tableRows, content
-    content: Union[Paragraph, SectionBreak, Table, TableOfContents] = Field('paragraph',
-                                                                            alt_names=('sectionBreak',
-                                                                                       'table',
-                                                                                       'tableOfContents'),
-                                                                            strict=True
-                                                                            )
-
-    def _content(self, value: dict):
-        # guessing game GO! fixme: You can create a GuessType type for this.
-        if 'elements' in value:
-            return Paragraph(value)
-        elif 'sectionStyle' in value:
-            return SectionBreak(value)
-        elif 'tableRows' in value:
-            return Table(value)
-        elif 'content' in value:
-            return TableOfContents(value)
-        else:
-            return None
+    content: OneOfElement({'elements': Paragraph,
+                           'sectionStyle': SectionBreak,
+                           'tableRows': Table,
+                           'content': TableOfContents}) = Field('paragraph',
+                                                                alt_names=('sectionBreak',
+                                                                           'table',
+                                                                           'tableOfContents'),
+                                                                strict=True
+                                                                )
+    fingerprint: str = DigestField(ignore=('startIndex', 'endIndex'))  # same after edits above the element
 
     def as_html(self, root):  # deprecated
         return self.content.as_html(root)
@@ -43,6 +52,13 @@ class StructuralElement(Element):
         return self.content.__class__
 
 
+def _parse_packed(cls, data, options):
+    # GoogleDoc.parse_many worker, runs in the pool
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode()
+    return cls(data, **options).pack()
+
+
 class GoogleDoc(Element):
     title: str = 'title'
     doc_id: str = 'document_id'
@@ -60,6 +76,126 @@ class GoogleDoc(Element):
     suggestion_mode: str = 'suggestionsViewMode'
     inline_objects: DictOfElement(InlineOrPositionedObject) = 'inlineObjects'
     positioned_objects: DictOfElement(InlineOrPositionedObject) = 'positionedObjects'
+    # everything outside the body that rendering an element depends on
+    styles_fingerprint: str = DigestField(('documentStyle', 'namedStyles', 'lists', 'inlineObjects', 'positionedObjects'))
+
+    def __init__(self, json_data, keep_json=True, lazy=False, intern=False):
+        if isinstance(json_data, (str, bytes)):
+            json_data = json.loads(json_data)
+        super().__init__(json_data, keep_json=keep_json, lazy=lazy, intern=intern)
+        if not keep_json:
+            # render caches key on fingerprints of top-level elements; nested ones aren't computed without json
+            for elem, data in zip(self.body or (), Field.get_path(('body', 'content'), json_data) or ()):
+                elem._fill_deferred(data)
+
+    @classmethod
+    def from_stream(cls, stream, **stream_options):
+        """
+        GoogleDoc over raw Docs json which isn't parsed until accessed: every field is read from the stream
+        and parsed on first access (title, lists, named_styles, inline_objects...).
+        Pass the result to iter_body to go through the body without materializing GoogleDoc.body.
+        close() the doc (or use it in a with block) to free the stream's spool once done reading it.
+        :param stream: bytes, str or a file-like object with Docs API json
+        :param stream_options: JsonStream options (chunk_size, spool_size)
+        """
+        doc = cls.__new__(cls)
+        doc._json_data = JsonStream(stream, large={'body': 2}, **stream_options)
+        return doc
+
+    @classmethod
+    def parse_many(cls, payloads, max_workers: int = None, max_pending: int = None, packed: bool = False,
+                   mp_context=None, **options):
+        """
+        Parses raw Docs payloads on a process pool and yields the docs in payload order.
+        Workers send docs back packed (see pack): a fraction of a pickle's size and rebuilt without parsing.
+        :param payloads: iterable of json str/bytes (cheapest to send) or dicts, consumed as workers free up
+        :param max_workers: pool size, os.cpu_count() by default
+        :param max_pending: payloads in flight at once, 2 * max_workers by default; bounds memory
+        :param packed: yield packed bytes instead, e.g. to write cache files without rebuilding docs here
+        :param mp_context: multiprocessing context of the pool, multiprocessing.get_context('spawn') by default;
+        fork starts faster but isn't safe from a process running threads.
+        :param options: GoogleDoc options (keep_json, intern=True); docs are parsed eagerly
+        """
+        if options.get('lazy'):
+            raise ValueError('parse_many parses eagerly, lazy docs would be fully parsed to be sent back anyway')
+        max_workers = max_workers or os.cpu_count() or 1
+        max_pending = max_pending or 2 * max_workers
+        payloads = iter(payloads)
+        context = mp_context or multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers, mp_context=context) as pool:
+            pending = deque(pool.submit(_parse_packed, cls, q, options) for q in islice(payloads, max_pending))
+            try:
+                while pending:
+                    data = pending.popleft().result()
+                    for q in islice(payloads, 1):
+                        pending.append(pool.submit(_parse_packed, cls, q, options))
+                    yield data if packed else cls.unpack(data)
+            finally:
+                for future in pending:  # left when the caller stops early or a parse fails
+                    future.cancel()
+
+    @classmethod
+    def iter_body(cls, stream, **options):
+        """
+        Yields body StructuralElements one by one, parsing the json incrementally; peak memory stays at one element.
+        :param stream: bytes, str, a file-like object with Docs API json or a GoogleDoc (from_stream or parsed)
+        :param options: Element options for the yielded elements (keep_json, lazy)
+        """
+        if isinstance(stream, GoogleDoc):
+            if not isinstance(stream._json_data, JsonStream):
+                yield from stream.body
+                return
+            source = nullcontext(stream._json_data)  # the doc's, closed with the doc
+        else:
+            source = JsonStream(stream, large={'body': 2})  # closed when done or when the generator is dropped
+        with source as stream:
+            for item in stream.iter_items('body.content'):
+                yield StructuralElement(item, **options)
+
+    def close(self):
+        """
+        Closes the stream of a from_stream doc; fields read so far stay available. Nothing to do for other docs.
+        """
+        if isinstance(self._json_data, JsonStream):
+            self._json_data.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    @property
+    @memoized()
+    def index(self) -> DocumentIndex:
+        """
+        Offset, heading and named range lookups; built on first access and kept for the lifetime of the doc.
+        """
+        return DocumentIndex(self)
+
+    @property
+    @memoized()
+    def render_context(self) -> RenderContext:
+        """
+        Named style, list and object tables for the converters; built on first access and kept for the lifetime of the doc.
+        """
+        return RenderContext(self)
+
+    def pack(self) -> bytes:
+        """
+        Compact on-disk form of the parsed doc, see json_dataclass.pack. Read back with GoogleDoc.unpack.
+        """
+        return pack(self)
+
+    @classmethod
+    def unpack(cls, data: bytes) -> "GoogleDoc":
+        """
+        Rebuilds a doc written by GoogleDoc.pack. Pickled docs (cached before the packed format) are read as well.
+        :raise StaleSchema: document classes have changed since the data was written; it needs to be parsed again
+        """
+        if not data.startswith(MAGIC):
+            return pickle.loads(data)
+        return unpack(data, cls)
 
     def get_image_objects(self):
         image_props = []
@@ -71,25 +207,16 @@ class GoogleDoc(Element):
 
 
 class ListWrapper:
-    glyph_equivalence = {
-        'GLYPH_TYPE_UNSPECIFIED': ('disc', 'ul'),
-        'NONE': ('disc', 'ul'),
-        'DECIMAL': ('decimal', 'ol'),
-        'ZERO_DECIMAL': ('decimal-leading-zero', 'ol'),
-        'UPPER_ALPHA': ('upper-alpha', 'ol'),
-        'ALPHA': ('lower-alpha', 'ol'),
-        'UPPER_ROMAN': ('upper-roman', 'ol'),
-        'ROMAN': ('lower-roman', 'ol'),
-        '●': ('disc', 'ul')
-    }
+    glyph_equivalence = glyph_equivalence
 
     def __init__(self, lists: dict, bullet: "Bullet"):
+        """
+        :param lists: RenderContext.lists of the doc
+        """
         self.list_id = bullet.list_id
         self.level = bullet.nesting_level or 0
         self.local_style = bullet.text_style
-        list_ref = lists.get(self.list_id).nesting_levels[self.level]
-        style_type, self.lst_tag = self.glyph_equivalence.get(list_ref.glyph, ('disc', 'ul'))
-        self.style_type = f'list-style-type: {style_type}'
+        self.style_type, self.lst_tag = lists[self.list_id, self.level]
         self.processing = False
 
     def tag(self):
@@ -151,33 +278,114 @@ class CSSStructure:
     hr: str = 'hr_class'
 
 
+@lru_cache(maxsize=1 << 16)
+def generated_class(style: str) -> str:
+    """
+    Class name for an extracted inline style. Derived from the style itself, so it's the same in every render
+    and process and cached fragments can refer to it.
+    """
+    digest = blake2b(style.encode(), digest_size=5).digest()
+    return 's' + base64.b32encode(digest).decode().lower()
+
+
+_render_worker = None
+
+
+def _init_render_worker(doc, cls, options, attributes):
+    # HTMLConverter(max_workers=...) pool initializer; forked workers get the doc itself, others unpack it once.
+    # The worker converter is of the same class, with the same options and attributes set after __init__
+    global _render_worker
+    if isinstance(doc, bytes):
+        doc = GoogleDoc.unpack(doc)
+    _render_worker = cls(doc, fragments=None, **options)
+    for name, value in attributes.items():
+        setattr(_render_worker, name, value)
+
+
+def _render_positions(positions):
+    return _render_worker._render_positions(positions)
+
+
 class HTMLConverter:
     @staticmethod
     def style_dict_to_string(style_dict):
         return ';'.join([f'{k}: {style_dict[k]}' for k in style_dict])
 
-    def process_object(self, obj):
+    def style_attrs(self, css_class, style_dict):
+        """
+        :return: (class attribute value, style attribute) of an element. With extract_styles
+        the style becomes a generated class and there's no style attribute.
+        """
+        style = self.style_dict_to_string(style_dict)
+        if self.extract_styles is None:
+            return css_class, f'style="{style}"'
+        if not style:
+            return css_class, ''
+        name = generated_class(style)
+        self.__styles[name] = style
+        self.__fragment_styles[name] = style
+        return f'{css_class} {name}', ''
+
+    @property
+    def stylesheet(self) -> str:
+        """
+        CSS of the classes generated by the last render with extract_styles.
+        Rules are scoped to the outer div; unlike inline styles they don't win over app css of the same specificity.
+        """
+        outer = self.css_classes.outer_div
+        return '\n'.join(f'.{outer} .{name} {{{style}}}' for name, style in self.__styles.items())
+
+    def process_object(self, obj: ResolvedObject):
+        """
+        :param obj: entry of RenderContext.inline_objects or positioned_objects
+        """
         if obj is None:
             return ''
-        obj = obj.content
-        if obj.content.title == 'horizontal line':
+        if obj.horizontal_line:
             return f'<hr class="{self.css_classes.hr}">'
-        e_style = ''
-        # layout process!!
-        if obj.positioning is not None:
-            e_style = obj.positioning.as_css()
-        if hasattr(obj.content.properties, 'local') and obj.content.properties.local is not None:
-            img_src = obj.content.properties.local
+        if hasattr(obj.properties, 'local') and obj.properties.local is not None:
+            img_src = obj.properties.local
         else:
-            img_src = obj.content.properties.source or obj.content.properties.content
+            img_src = obj.properties.source or obj.properties.content
 
         return f'<img src="{img_src}" ' \
                f'class="{self.css_classes.image}" ' \
-               f'style="{obj.content.margins.as_css()};' \
-               f'{obj.content.size.as_css()};{e_style}" alt="{obj.content.title} : {obj.content.description}">'
+               f'style="{obj.style}" alt="{obj.alt}">'
 
-    def __init__(self, google_doc: GoogleDoc, css_classes=None, ignore_black_white=False):
+    def __init__(self, google_doc: GoogleDoc, css_classes=None, ignore_black_white=False, cache: RenderCache = None,
+                 fragments: FragmentCache = FragmentCache.process, extract_styles: str = None,
+                 max_workers: int = None, mp_context=None):
+        """
+        :param cache: RenderCache of this doc, to reuse the previous render
+        :param fragments: FragmentCache shared between converters, the process-wide one by default; fragments are keyed
+        on cache_context(), so subclasses and other options don't mix. None to render everything
+        :param extract_styles: None for inline styles. 'block' replaces inline styles of paragraphs, spans, cells
+        and element divs with generated classes and ends the body with a <style> block of them;
+        'external' leaves the block out, serve HTMLConverter.stylesheet separately.
+        :param max_workers: render top-level elements (sections, tables...) on a process pool of this size and
+        stitch them in order; the output is the same. Worth it for very large docs. Workers start with the first
+        render, by forking or unpacking the doc, and are kept for the later renders of this converter:
+        close() it or use it in a with block. Workers render with a converter of the same class (importable
+        and taking these options) and html_separator as set when the pool starts.
+        :param mp_context: multiprocessing context of the pool, multiprocessing.get_context('spawn') by default;
+        fork starts faster but isn't safe from a process running threads.
+        """
+        if extract_styles not in (None, 'block', 'external'):
+            raise ValueError(f'extract_styles is one of None, \'block\', \'external\', got {extract_styles!r}')
         self.ignore_black_white = ignore_black_white
+        self.options = RenderOptions(ignore_black_white=ignore_black_white)
+        self.cache = cache
+        self.fragments = fragments
+        self.extract_styles = extract_styles
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.__pool = None
+        self.__shutdown = None
+        self.__fragments = {}
+        self.__pending = {}  # key -> (future, keys of its chunk) of elements sent to the pool
+        self.__context = None
+        self.__styles = {}  # generated class -> style, for the stylesheet
+        self.__fragment_styles = {}  # the same for the fragment being rendered, kept with it in the caches
         if css_classes is None:
             css_classes = CSSStructure()
         self.css_classes = css_classes
@@ -189,25 +397,6 @@ class HTMLConverter:
             'next': None
         }
 
-    def override_black_white(self):
-        def wrapper(func):
-            def inner(*args, **kwargs):
-                chk = kwargs.pop('ignore_ignoration', False)
-                res = func(*args, **kwargs)
-                if chk:
-                    return res
-                if res is None:
-                    return None
-                if res.lower() == '#000000' or res.lower() == '#ffffff':
-                    return None
-                return res
-
-            return inner
-
-        backup = Color.as_css
-        Color.as_css = wrapper(Color.as_css)
-        return backup
-
     def get_adjacent(self, section_content, idx):
         try:
             elem = section_content[idx]
@@ -216,29 +405,228 @@ class HTMLConverter:
         except IndexError:
             return None
 
-    def body_as_html(self):
-        if self.ignore_black_white:
-            backup = self.override_black_white()
-        sections = {0: []}
-        section_styles = {0: None}
-        key = 0
-        for struct in self.doc.body:
-            if isinstance(struct.content, SectionBreak):
-                key += 1
-                sections[key] = []
-                section_styles[key] = struct.content.content
-            else:
-                sections[key].append(struct)
-        data = ''
-
-        for section_num in range(max(sections.keys()) + 1):
-            if sections[section_num].__len__() == 0:  # I don't trust google.
+    def body_as_html(self, heading: str = None, sections=None, named_range: str = None):
+        """
+        :param heading, sections, named_range: render only part of the body, see iter_html
+        """
+        return ''.join(self.iter_html(chunk_size=0, heading=heading, sections=sections, named_range=named_range))
+
+    def write_html(self, fp, chunk_size=1 << 14, heading: str = None, sections=None, named_range: str = None):
+        """
+        Writes the body HTML to a text file-like object as it's rendered.
+        """
+        for chunk in self.iter_html(chunk_size, heading=heading, sections=sections, named_range=named_range):
+            fp.write(chunk)
+
+    def iter_html(self, chunk_size=1 << 14, heading: str = None, sections=None, named_range: str = None):
+        """
+        Yields the body HTML in chunks of at least chunk_size characters (0: as rendered), e.g. for a StreamingResponse.
+        Nothing is rendered ahead of what's been consumed. The <style> block of extract_styles='block' comes last.
+        Render options are set only while the generator runs and only for the consuming thread,
+        converters can render concurrently.
+        One of these renders only part of the body, at a cost in proportion to the part:
+        :param heading: heading id; the heading and everything up to the next heading of the same or a higher level
+        :param sections: number or range of sections, counting the ones with content
+        :param named_range: name of a NamedRange; the top-level elements it covers
+        Section and list wrappers are opened and closed within the part.
+        """
+        selection = self.__select(heading, sections, named_range)
+        self.__styles = {}
+        if self.cache is not None or self.fragments is not None or self.max_workers:
+            self.__context = self.cache_context()
+            self.__fragments = {}
+        if self.cache is not None:
+            self.cache.check_context(self.__context)
+            self.cache.rendered = 0
+            if selection is None and self.doc.revision is not None and self.cache.page[0] == self.doc.revision:
+                self.__styles = dict(self.cache.page[2])
+                yield self.cache.page[1]
+                return
+        pieces = self.__iter_body(selection)
+        if self.extract_styles == 'block':
+            pieces = chain(pieces, self.__iter_stylesheet())
+        page = [] if self.cache is not None and selection is None else None
+        chunk, size = [], 0
+        while True:
+            token = render_options.set(self.options)
+            try:
+                piece = next(pieces, None)
+            finally:
+                render_options.reset(token)
+            if piece is None:
+                break
+            if page is not None:
+                page.append(piece)
+            chunk.append(piece)
+            size += len(piece)
+            if size >= chunk_size:
+                yield ''.join(chunk)
+                chunk, size = [], 0
+        if chunk:
+            yield ''.join(chunk)
+        if self.cache is not None and selection is not None:
+            self.cache.fragments.update(self.__fragments)
+        elif self.cache is not None:
+            # fragments of elements gone from this revision are dropped
+            self.cache.fragments = self.__fragments
+            self.cache.page = (self.doc.revision, ''.join(page), tuple(self.__styles.items()))
+
+    def __select(self, heading, sections, named_range):
+        """
+        {section number: [element numbers]} of the part of the body to render, None for all of it.
+        """
+        if heading is None and sections is None and named_range is None:
+            return None
+        if (heading is not None) + (sections is not None) + (named_range is not None) > 1:
+            raise ValueError('Select the part to render by one of heading, sections and named_range')
+        context = self.doc.render_context
+        index = self.doc.index
+        if heading is not None:
+            elem = index.heading(heading)
+            if elem is None:
+                raise ValueError(f'No heading {heading!r} in the doc')
+            level = next((q.level for q in index.outline if q.heading_id == heading), None)
+            end = next((q.element for q in index.outline if q.element.start > elem.start and
+                        (level is None or q.level <= level)), None)
+            start = context.positions[id(index.path(elem.start)[0])]
+            stop = len(context.order) if end is None else context.positions[id(index.path(end.start)[0])]
+            picked = context.order[start:max(stop, start + 1)]
+        elif sections is not None:
+            numbers = [k for k, (_, elements) in enumerate(context.sections) if elements]
+            if isinstance(sections, int):
+                sections = range(sections, sections + 1)
+            picked = [(numbers[k], i) for k in sections if -len(numbers) <= k < len(numbers)
+                      for i in range(len(context.sections[numbers[k]][1]))]
+        else:
+            if named_range not in index.named_ranges:
+                raise ValueError(f'No named range {named_range!r} in the doc')
+            picked = [context.order[context.positions[id(q)]] for q in index.named_range_elements(named_range)
+                      if not isinstance(q.content, SectionBreak)]
+        selection = {}
+        for section_num, i in picked:
+            selection.setdefault(section_num, []).append(i)
+        return selection
+
+    def __iter_stylesheet(self):
+        # a generator, so the stylesheet is built only once the body is rendered
+        yield f'<style>{self.stylesheet}</style>'
+
+    def __sections(self):
+        # [(section style, elements)] of the body, split at section breaks
+        return self.doc.render_context.sections
+
+    def __set_adjacent(self, elements, i):
+        self.__adjacent_paragraphs = {'next': self.get_adjacent(elements, i + 1),
+                                      'prev': self.get_adjacent(elements, i - 1)}
+
+    def __iter_body(self, selection=None):
+        sections = self.__sections()
+        if not self.max_workers:
+            yield from self.__iter_sections(sections, selection)
+            return
+        try:
+            self.__submit(self.__get_pool(), sections, selection)
+            yield from self.__iter_sections(sections, selection)
+        finally:
+            for future, _ in self.__pending.values():  # left when the caller stops early
+                future.cancel()
+            self.__pending = {}
+
+    def __get_pool(self):
+        if self.__pool is None:
+            context = self.mp_context or multiprocessing.get_context('spawn')
+            options = {'css_classes': self.css_classes, 'ignore_black_white': self.ignore_black_white,
+                       'extract_styles': self.extract_styles}
+            attributes = {'html_separator': self.html_separator}
+            # forked workers inherit the doc, it's only sent (packed) to spawned ones
+            doc = self.doc if context.get_start_method() == 'fork' else self.doc.pack()
+            self.__pool = ProcessPoolExecutor(self.max_workers, mp_context=context, initializer=_init_render_worker,
+                                              initargs=(doc, type(self), options, attributes))
+            # workers are stopped with the converter if it isn't closed
+            self.__shutdown = weakref.finalize(self, self.__pool.shutdown, wait=False, cancel_futures=True)
+        return self.__pool
+
+    def close(self):
+        """
+        Stops the workers of a max_workers converter; a later render starts new ones.
+        """
+        if self.__pool is not None:
+            self.__shutdown()
+            self.__pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __submit(self, pool, sections, selection):
+        """
+        Sends top-level elements which aren't cached to the pool, in contiguous chunks of about the same text length,
+        a few per worker so they even out.
+        """
+        todo, seen = [], set()
+        for section_num, (_, elements) in enumerate(sections):
+            for i in range(len(elements)) if selection is None else selection.get(section_num, ()):
+                elem = elements[i]
+                self.__set_adjacent(elements, i)
+                key = (elem.fingerprint, *self.adjacent_borders())
+                if key in seen or self.cache is not None and key in self.cache.fragments or \
+                        self.fragments is not None and (self.__context, *key) in self.fragments:
+                    continue
+                seen.add(key)
+                todo.append(((section_num, i), key, (elem.end or 0) - (elem.start or 0)))
+        if not todo:
+            return
+        chunk_size = sum(q[2] for q in todo) / (4 * self.max_workers)
+        chunk, size = [], 0
+        for n, item in enumerate(todo):
+            chunk.append(item)
+            size += item[2]
+            if size >= chunk_size or n == len(todo) - 1:
+                keys = [q[1] for q in chunk]
+                future = pool.submit(_render_positions, [q[0] for q in chunk])
+                for key in keys:
+                    self.__pending[key] = (future, keys)
+                chunk, size = [], 0
+
+    def _render_positions(self, positions):
+        # pool worker side: fragments of body elements by (section, element) position, see __submit
+        sections = self.__sections()
+        token = render_options.set(self.options)
+        try:
+            out = []
+            for section_num, i in positions:
+                elements = sections[section_num][1]
+                self.__set_adjacent(elements, i)
+                out.append(self.__render_fragment(elements[i]))
+            return out
+        finally:
+            render_options.reset(token)
+
+    def __collect(self, key):
+        # waits for the chunk with the key and takes in all of its fragments
+        future, keys = self.__pending[key]
+        for chunk_key, (data, size) in zip(keys, future.result()):
+            del self.__pending[chunk_key]
+            self.__fragments[chunk_key] = data
+            if self.cache is not None:
+                self.cache.rendered += 1
+            if self.fragments is not None:
+                self.fragments.put((self.__context, *chunk_key), data, size)
+
+    def __iter_sections(self, sections, selection=None):
+        yield f'<div class="{self.css_classes.outer_div}">'
+
+        for section_num, (section_style, section) in enumerate(sections):
+            indices = range(section.__len__()) if selection is None else selection.get(section_num, ())
+            if indices.__len__() == 0:  # I don't trust google.
                 continue
 
             # here I tried to envelop paragraphs with common shading into another div
             # that doesn't help: borders will be split
             # if you preserve borders, you might end-up with non-balanced divs :(
-            style, cols = section_styles[section_num].as_css()
+            style, cols = section_style.as_css()
             classes = self.css_classes.section
             # turn cols into percetange max width
             cols_style = ''
@@ -247,68 +635,125 @@ class HTMLConverter:
                 classes += " " + self.css_classes.section_columned
                 style_override['max-width'] = f'{100 / cols.__len__() - 0.1}%'
                 cols_style = f'column-count: {cols.__len__()};'
+            element_class, element_style = self.style_attrs(self.css_classes.structural_element, style_override)
 
-            data += f'<div class="{classes}" style="{cols_style}{style}">'
+            yield f'<div class="{classes}" style="{cols_style}{style}">'
             list_stack = []
 
-            for i, elem in enumerate(sections[section_num]):
-                self.__adjacent_paragraphs = {'next': self.get_adjacent(sections[section_num], i + 1),
-                                              'prev': self.get_adjacent(sections[section_num], i - 1)}
+            for i in indices:
+                elem = section[i]
+                self.__set_adjacent(section, i)
                 if elem.content_class is Paragraph:
                     if elem.content.bullet is not None:  # fixme this is horrifying D:
                         if list_stack.__len__() == 0:  # first list in a bunch, enclose in div
-                            data += f'<div class="{self.css_classes.structural_element}" ' \
-                                    f'style="{self.style_dict_to_string(style_override)}">'
-                        wrapper = ListWrapper(self.doc.lists, elem.content.bullet)
+                            yield f'<div class="{element_class}" {element_style}>'
+                        wrapper = ListWrapper(self.doc.render_context.lists, elem.content.bullet)
                         if wrapper in list_stack:  # we know this list + level
                             while list_stack.__len__() > 0 and \
                                     list_stack[-1] != wrapper:
                                 # close previous lists up to running one
                                 curlist = list_stack.pop()
-                                data += curlist.closing_tag()
+                                yield curlist.closing_tag()
                         elif list_stack.__len__() > 0:  #
                             while list_stack.__len__() > 0 and list_stack[-1].list_id != wrapper.list_id:
                                 # there are other lists, we're closing them up to current list id
                                 curlist = list_stack.pop()
-                                data += curlist.closing_tag()
+                                yield curlist.closing_tag()
                         if list_stack.__len__() == 0 or list_stack[-1] != wrapper:
                             list_stack.append(wrapper)
 
                     if list_stack.__len__() > 0 and elem.content.bullet is None:
                         while list_stack.__len__() > 0:
                             curlist = list_stack.pop()
-                            data += curlist.closing_tag()
-                        data += '</div>'
+                            yield curlist.closing_tag()
+                        yield '</div>'
 
                     if list_stack.__len__() == 0:
-                        data += f'<div class="{self.css_classes.structural_element}" ' \
-                                f'style="{self.style_dict_to_string(style_override)}">' + \
-                                self.process_structural_element(elem) + '</div>'
+                        yield f'<div class="{element_class}" {element_style}>' + self.render_element(elem) + '</div>'
                     else:
                         if list_stack.__len__() == 0:
                             raise ValueError(f'You screwed lists up!')
                         if not list_stack[-1].processing:
-                            data += list_stack[-1].opening_tag(self.css_classes.list)
-                        data += '<li>' + self.process_structural_element(elem) + '</li>'
+                            yield list_stack[-1].opening_tag(self.css_classes.list)
+                        yield '<li>' + self.render_element(elem) + '</li>'
                 else:
-                    if list_stack.__len__() > 0 and elem.content.bullet is None:
+                    if list_stack.__len__() > 0:  # only paragraphs are list items
                         while list_stack.__len__() > 0:
                             curlist = list_stack.pop()
-                            data += curlist.closing_tag()
-                        data += '</div>'
-                    data += f'<div class="{self.css_classes.structural_element}" ' \
-                            f'style="{self.style_dict_to_string(style_override)}">' + \
-                            self.process_structural_element(elem) + '</div>'
+                            yield curlist.closing_tag()
+                        yield '</div>'
+                    yield f'<div class="{element_class}" {element_style}>' + self.render_element(elem) + '</div>'
 
             if list_stack.__len__() > 0:
                 while list_stack.__len__() > 0:
                     curlist = list_stack.pop()
-                    data += curlist.closing_tag()
-                data += '</div>'
-            data += '</div>'
-        if self.ignore_black_white:
-            Color.as_css = backup
-        return f'<div class="{self.css_classes.outer_div}">{data}</div>'
+                    yield curlist.closing_tag()
+                yield '</div>'
+            yield '</div>'
+        yield '</div>'
+
+    def adjacent_borders(self):
+        previous_border = None
+        next_border = None
+        if self.__adjacent_paragraphs['prev'] is not None:
+            previous_border = self.__adjacent_paragraphs['prev'].style.border_bottom is not None and \
+                              self.__adjacent_paragraphs['prev'].style.border_bottom.as_css() is not None
+
+        if self.__adjacent_paragraphs['next'] is not None:
+            next_border = self.__adjacent_paragraphs['next'].style.border_top is not None and \
+                          self.__adjacent_paragraphs['next'].style.border_top.as_css() is not None
+        return previous_border, next_border
+
+    def cache_context(self):
+        """
+        Everything a fragment depends on besides its element and adjacent borders: the converter class
+        (subclasses render differently), options, doc-level styles and objects, local image paths set at sync.
+        """
+        images = []
+        for obj in self.doc.get_image_objects():
+            properties = obj.content and obj.content.content and obj.content.content.properties
+            if properties is not None and properties.local is not None:
+                images.append((obj.object_id, properties.local))
+        converter = f'{type(self).__module__}.{type(self).__qualname__}'
+        return converter, self.ignore_black_white, self.extract_styles, repr(self.css_classes), self.html_separator, \
+            self.doc.styles_fingerprint, tuple(images)
+
+    def render_element(self, elem: StructuralElement):
+        """
+        process_structural_element for top-level elements, through the previous render of this doc
+        and the shared fragments if caching is on.
+        """
+        if self.cache is None and self.fragments is None and not self.max_workers:
+            return self.process_structural_element(elem)
+        key = (elem.fingerprint, *self.adjacent_borders())
+        if key in self.__pending:
+            self.__collect(key)
+        data = self.__fragments.get(key)
+        if data is None and self.cache is not None:
+            data = self.cache.fragments.get(key)
+        if data is None and self.fragments is not None:
+            data = self.fragments.get((self.__context, *key))
+        if data is None:
+            data, size = self.__render_fragment(elem)
+            if self.cache is not None:
+                self.cache.rendered += 1
+            if self.fragments is not None:
+                self.fragments.put((self.__context, *key), data, size)
+        self.__fragments[key] = data
+        if self.extract_styles is None:
+            return data
+        self.__styles.update(data[1])
+        return data[0]
+
+    def __render_fragment(self, elem):
+        # (data, size) of a top-level element; data is the html, with the generated styles it uses if extracting
+        self.__fragment_styles = {}
+        data = self.process_structural_element(elem)
+        size = len(data)
+        if self.extract_styles is not None:
+            data = (data, tuple(self.__fragment_styles.items()))
+            size += sum(len(q) for _, q in data[1])
+        return data, size
 
     def process_structural_element(self, elem: StructuralElement):
         if elem.content_class is TableOfContents:
@@ -349,8 +794,8 @@ class HTMLConverter:
             idata = self.html_separator.join(idata)
             istyle = styles[i].as_css_dict(col_num=columns.__len__())
             istyle.update(col.style.as_css_dict())
-            data.append(f'<td class="{self.css_classes.table_column}" '
-                        f'style="{self.style_dict_to_string(istyle)}">{idata}</td>')
+            css_cls, style_attr = self.style_attrs(self.css_classes.table_column, istyle)
+            data.append(f'<td class="{css_cls}" {style_attr}>{idata}</td>')
         return self.html_separator.join(data)
 
     def get_paragarph_style(self, elem: Paragraph):
@@ -359,25 +804,16 @@ class HTMLConverter:
         return style, remove
 
     def process_paragraph(self, elem: Paragraph):
-        previous_border = None
-        next_border = None
-        if self.__adjacent_paragraphs['prev'] is not None:
-            previous_border = self.__adjacent_paragraphs['prev'].style.border_bottom is not None and \
-                              self.__adjacent_paragraphs['prev'].style.border_bottom.as_css() is not None
-
-        if self.__adjacent_paragraphs['next'] is not None:
-            next_border = self.__adjacent_paragraphs['next'].style.border_top is not None and \
-                          self.__adjacent_paragraphs['next'].style.border_top.as_css() is not None
-
+        previous_border, next_border = self.adjacent_borders()
 
         elem_style = elem.style.as_css_dict(previous_border=previous_border, next_border=next_border)
 
         tag = self.css_classes.named_style_tag.get(elem.style.named_style, self.css_classes.named_style_tag_default)
         css_cls = self.css_classes.named_style_class.get(elem.style.named_style, '')
         css_cls += f' {self.css_classes.paragraph}'
-        named_style = next((q for q in self.doc.named_styles if q.style_type == elem.style.named_style), None)
+        named_style = self.doc.render_context.named_style_css().get(elem.style.named_style)
         if named_style is not None:
-            style = named_style.paragraph_style.as_css_dict()
+            style = dict(named_style[0])
             style.update(elem_style)
         else:
             style = elem_style
@@ -401,18 +837,18 @@ class HTMLConverter:
         # object processing
         objs_data = ''
         if elem.positioned_object_ids is not None:
-            objs = [self.doc.positioned_objects.get(q) for q in elem.positioned_object_ids]
+            objs = [self.doc.render_context.positioned_objects.get(q) for q in elem.positioned_object_ids]
             objs_data = self.html_separator.join([self.process_object(q) for q in objs])
         extra = ''
         if elem.style.heading is not None:
             extra += f'id="{elem.style.heading}"'
-        data = f'<{tag} class="{css_cls}" {extra}' \
-               f'style="{self.style_dict_to_string(style)}">' + objs_data + '{}' + f'</{tag}>'
+        css_cls, style_attr = self.style_attrs(css_cls, style)
+        data = f'<{tag} class="{css_cls}" {extra}{style_attr}>' + objs_data + '{}' + f'</{tag}>'
 
         content = self.html_separator.join([
             self.process_paragraph_element(
                 q,
-                extra_style=None if named_style is None else named_style.text_style.as_css_dict(),
+                extra_style=None if named_style is None else dict(named_style[1]),
                 backgrounded='background' in style,
                 remove=remove
             )
@@ -438,7 +874,7 @@ class HTMLConverter:
         if elem.equation is not None:
             return ''  # NO EQUATIONS LOL
         if elem.inline_object_id is not None:
-            obj = self.doc.inline_objects.get(elem.inline_object_id)
+            obj = self.doc.render_context.inline_objects.get(elem.inline_object_id)
             return self.process_object(obj)
         if elem.person is not None:  # todo: text style
             name = elem.person['personProperties'].get('name')
@@ -471,7 +907,7 @@ class HTMLConverter:
         for r in remove:
             if r in style:
                 del style[r]
-        style_text = self.style_dict_to_string(style)
+        css_cls, style_attr = self.style_attrs(self.css_classes.span, style)
         text = html.escape(elem.content)  # .replace('\n', '')
-        return f'<{tag} {extra} class="{self.css_classes.span}" style="{style_text}">' \
+        return f'<{tag} {extra} class="{css_cls}" {style_attr}>' \
                f'{text}</{tag}>'
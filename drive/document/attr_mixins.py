@@ -2,6 +2,7 @@ from .json_dataclass import Field
 
 
 class Suggested:
+    __slots__ = ()  # Element subclasses would get a __dict__ back otherwise
     suggested_insertions: str = 'suggestedInsertionIds'
     suggested_deletions: str = 'suggestedDeletionIds'
     suggested_text_style: dict = 'suggestedTextStyleChanges'
@@ -0,0 +1,180 @@
+from bisect import bisect_left, bisect_right
+from typing import NamedTuple, Any
+
+from .paragraph import Paragraph, ParagraphElement
+from .tables import Table, TableRow, TableCell
+from .table_of_contents import TableOfContents
+
+
+class Span(NamedTuple):
+    start: int
+    end: int
+    segment_id: str = None  # None is the body
+
+
+class OutlineEntry(NamedTuple):
+    level: int  # 0 for TITLE and SUBTITLE, n for HEADING_n
+    heading_id: str
+    text: str
+    element: Any  # StructuralElement
+
+
+class _Level:
+    """
+    Spans of one nesting level in document order; children[i] is the level inside elements[i] or None.
+    """
+    __slots__ = ('starts', 'ends', 'elements', 'children')
+
+    def __init__(self):
+        self.starts, self.ends, self.elements, self.children = [], [], [], []
+
+
+def _children(elem):
+    content = getattr(elem, 'content', None)
+    if isinstance(content, Paragraph):
+        return content.content
+    if isinstance(content, (Table, TableOfContents)):
+        return content.content
+    if isinstance(elem, (TableRow, TableCell)):
+        return content
+    return None
+
+
+def _text(paragraph: Paragraph):
+    return ''.join(q.text_run.content or '' for q in paragraph.content or () if q.text_run is not None).strip()
+
+
+def _heading_level(named_style):
+    if named_style in ('TITLE', 'SUBTITLE'):
+        return 0
+    if named_style is not None and named_style.startswith('HEADING_'):
+        return int(named_style[len('HEADING_'):])
+    return None
+
+
+def iter_paragraphs(doc, table_of_contents=False):
+    """
+    StructuralElements holding paragraphs in document order, table cells included.
+    The table of contents is left out unless asked for, its text repeats the headings.
+    """
+    stack = list(reversed(doc.body or ()))
+    while stack:
+        elem = stack.pop()
+        content = getattr(elem, 'content', None)
+        if isinstance(content, Paragraph):
+            yield elem
+        elif isinstance(content, TableOfContents) and not table_of_contents:
+            continue
+        else:
+            stack.extend(reversed(_children(elem) or ()))
+
+
+class DocumentIndex:
+    """
+    Lookups over a parsed GoogleDoc body, built in one pass: an interval index over start/end offsets
+    of structural elements, table rows and cells and paragraph elements, heading id -> element and named range -> spans.
+    Intervals are half-open and nest, so every query is a bisect per nesting level.
+    Use GoogleDoc.index, which builds it once per doc; it goes stale if the body is changed.
+    """
+
+    def __init__(self, doc):
+        self._root = _Level()
+        self.headings = {}
+        self.outline = []
+        levels = [self._root]
+        stack = [(0, q) for q in reversed(doc.body or ())]
+        while stack:
+            depth, elem = stack.pop()
+            del levels[depth + 1:]
+            level = levels[depth]
+            children = _children(elem)
+            level.starts.append(elem.start or 0)
+            level.ends.append(elem.end or 0)
+            level.elements.append(elem)
+            level.children.append(_Level() if children else None)
+            if children:
+                levels.append(level.children[-1])
+                stack.extend((depth + 1, q) for q in reversed(children))
+            if isinstance(getattr(elem, 'content', None), Paragraph):
+                self._add_heading(elem)
+
+        self.named_ranges = {}
+        self.named_range_ids = {}
+        for name, group in (doc.named_ranges or {}).items():
+            spans = self.named_ranges.setdefault(name, [])
+            for named_range in group.named_ranges or ():
+                ranges = [Span(q.start_index or 0, q.end_index or 0, q.segment_id or None) for q in named_range.range or ()]
+                self.named_range_ids[named_range.name_range_id] = ranges
+                spans.extend(ranges)
+            spans.sort()
+
+    def _add_heading(self, elem):
+        style = elem.content.style
+        if style is None or style.heading is None:
+            return
+        self.headings[style.heading] = elem
+        level = _heading_level(style.named_style)
+        if level is not None:
+            self.outline.append(OutlineEntry(level, style.heading, _text(elem.content), elem))
+
+    def path(self, offset: int) -> list:
+        """
+        Elements containing the offset, outermost first: StructuralElement, then TableRow, TableCell,
+        StructuralElement... down to the ParagraphElement. Empty if the offset is outside the body.
+        """
+        out = []
+        level = self._root
+        while level is not None:
+            i = bisect_right(level.starts, offset) - 1
+            if i < 0 or offset >= level.ends[i]:
+                break
+            out.append(level.elements[i])
+            level = level.children[i]
+        return out
+
+    def at(self, offset: int):
+        """
+        Innermost element containing the offset, None if there's none.
+        """
+        path = self.path(offset)
+        return path[-1] if path else None
+
+    def paragraph_element(self, offset: int):
+        elem = self.at(offset)
+        return elem if isinstance(elem, ParagraphElement) else None
+
+    def overlapping(self, start: int, end: int) -> list:
+        """
+        Top-level body StructuralElements overlapping [start, end), in document order.
+        """
+        level = self._root
+        return level.elements[bisect_right(level.ends, start):bisect_left(level.starts, end)]
+
+    def heading(self, heading_id: str):
+        """
+        StructuralElement of the heading paragraph, e.g. for Link.heading_id. None if there's no such heading.
+        """
+        return self.headings.get(heading_id)
+
+    def named_range(self, name: str) -> list:
+        """
+        Spans of every range named so, sorted. Body spans have segment_id None.
+        """
+        return self.named_ranges.get(name, [])
+
+    def named_range_by_id(self, range_id: str) -> list:
+        return self.named_range_ids.get(range_id, [])
+
+    def named_range_elements(self, name: str) -> list:
+        """
+        Top-level body elements covered by the named range, in document order and without repeats.
+        """
+        out, seen = [], set()
+        for span in self.named_range(name):
+            if span.segment_id is not None:
+                continue
+            for elem in self.overlapping(span.start, span.end):
+                if id(elem) not in seen:
+                    seen.add(id(elem))
+                    out.append(elem)
+        return out
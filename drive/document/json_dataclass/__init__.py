@@ -1,3 +1,5 @@
 
 from .element import *
 from .field import *
+from .stream import JsonStream
+from .pack import pack, unpack, StaleSchema
@@ -1,39 +1,336 @@
-from .field import Field
+from .field import Field, missing
+from functools import wraps
 from types import FunctionType
+from weakref import WeakValueDictionary
 import json
 
 
-class Element:
-    def __init__(self, json_data):
+def _frozen_setattr(self, name, value):
+    raise AttributeError(f'{self.__class__.__name__} is immutable, instances may be shared between elements')
+
+
+def _frozen_delattr(self, name):
+    _frozen_setattr(self, name, None)
+
+
+def memoized(*depends):
+    """
+    Caches a method's results per instance and arguments. Meant for results which don't change after parse:
+    css of `_interned` elements, indexes over a document. Classes using it get a `_memo` slot.
+    `depends` are callables returning outside state the result also depends on, it becomes part of the key.
+    Dict results are returned as copies, callers tend to update them.
+    """
+    def decorator(method):
+        @wraps(method)
+        def inner(self, *args, **kwargs):
+            key = (method, args)
+            if kwargs:
+                key += tuple(sorted(kwargs.items()))
+            if depends:
+                key += tuple(get() for get in depends)
+            try:
+                memo = self._memo
+            except AttributeError:
+                memo = {}
+                object.__setattr__(self, '_memo', memo)
+            if key in memo:
+                result = memo[key]
+            else:
+                result = memo[key] = method(self, *args, **kwargs)
+            return dict(result) if result.__class__ is dict else result
+
+        inner._memoized = True
+        return inner
+
+    return decorator
+
+
+class ElementMeta(type):
+    """
+    Takes field declarations out of the class body into a compiled plan and generates __slots__ for them,
+    so parsed elements don't carry a per-instance __dict__.
+    Declaring __slots__ explicitly (e.g. with '__dict__' in it) disables generation for that class.
+    Each class also gets a generated _fill method, see generate_fill.
+    Classes declaring `_interned = True` are immutable and can be shared, see Interner.
+    """
+    registry = {}  # class name -> class; used by BackReference
+
+    @staticmethod
+    def is_field(attr, value):
+        return not attr.startswith('_') and \
+            not isinstance(value, (FunctionType, property, staticmethod, classmethod))
+
+    @classmethod
+    def declared_fields(mcs, klass):
+        if '_fields' in klass.__dict__:
+            return klass.__dict__['_fields']
+        # mixin classes keep their keys as plain class attributes
+        annotations = klass.__dict__.get('__annotations__', {})
+        return {
+            attr: {'json_name': value, 'datatype': annotations.get(attr)}
+            for attr, value in klass.__dict__.items() if mcs.is_field(attr, value)
+        }
+
+    def __new__(mcs, name, bases, namespace, **kwargs):
+        annotations = namespace.get('__annotations__', {})
+        fields = {
+            attr: {'json_name': value, 'datatype': annotations.get(attr)}
+            for attr, value in namespace.items() if mcs.is_field(attr, value)
+        }
+        for attr in fields:
+            del namespace[attr]
+        namespace['_fields'] = fields
+        if '__slots__' not in namespace:
+            inherited = {attr for base in bases for klass in base.__mro__ for attr in mcs.declared_fields(klass)}
+            slotted = {slot for base in bases for klass in base.__mro__ for slot in klass.__dict__.get('__slots__', ())}
+            namespace['__slots__'] = tuple(attr for attr in [*fields, *sorted(inherited)] if attr not in slotted)
+            if namespace.get('_interned') and '__weakref__' not in slotted:
+                namespace['__slots__'] += ('__weakref__',)  # for Interner.process
+            memoizing = namespace.get('_interned') or \
+                any(getattr(getattr(value, 'fget', value), '_memoized', False) for value in namespace.values())
+            if memoizing and '_memo' not in slotted:
+                namespace['__slots__'] += ('_memo',)
+        if namespace.get('_interned'):
+            namespace.setdefault('__setattr__', _frozen_setattr)
+            namespace.setdefault('__delattr__', _frozen_delattr)
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+        mcs.registry[name] = cls
+        cls._schema, cls._plan = mcs.compile(cls)
+        cls._lazy_plan = {entry[0]: entry for entry in cls._plan}
+        cls._deferred = tuple(q for q in cls._plan if getattr(q[2], 'deferred', False) and q[4] is None)
+        cls._fill = mcs.generate_fill(cls)
+        return cls
+
+    @classmethod
+    def compile(mcs, cls):
+        """
+        Walks the MRO once per class and compiles the field plan used by Element.__init__.
+        Most derived class wins if an attribute is redefined.
+        :return: (schema, plan); schema is {attr: {'json_name', 'datatype'}} (datatype None for no coercion),
+        plan is a tuple of
+        (attr, path, field, datatype, hook, nested) where path is a pre-split json path for string names,
+        field is a Field instance otherwise and nested marks datatypes building Elements.
+        """
+        schema = {}
+        for klass in cls.mro():
+            for attr, attr_data in mcs.declared_fields(klass).items():
+                schema.setdefault(attr, attr_data)
+        plan = []
+        for attr, attr_data in schema.items():
+            json_name, datatype = attr_data['json_name'], attr_data['datatype']
+            if isinstance(json_name, str):
+                path, field = tuple(json_name.split('.')), None
+            else:  # Field class
+                path, field = None, json_name
+            hook = getattr(cls, f'_{attr}', None)
+            nested = getattr(datatype, '_nested', False) or isinstance(datatype, ElementMeta)
+            plan.append((attr, path, field, datatype, hook if callable(hook) else None, nested))
+        return schema, tuple(plan)
+
+    @staticmethod
+    def element_code(element, namespace):
+        """
+        Expression giving the element class in generated code; BackReference is resolved when the code runs.
+        """
+        if isinstance(element, BackReference) or hasattr(element, '_reference'):
+            reference = getattr(element, '_reference', element)
+            return f'_registry[{reference.class_ref!r}]'
+        key = f'_c{len(namespace)}'
+        namespace[key] = element
+        return key
+
+    @staticmethod
+    def lookup_code(path, target='v'):
+        lines = [f'{target} = data.get({path[0]!r}, _missing)']
+        for key in path[1:]:
+            lines.append(f'{target} = {target}.get({key!r}, _missing) if {target}.__class__ is dict else _missing')
+        return lines
+
+    @classmethod
+    def generate_fill(mcs, cls):
+        """
+        Generates straight-line code setting every field of cls from a json dict:
+        one walk per json path, alt names tried in order, no coercion for values already of the right type.
+        Nested elements are allocated empty and pushed on `stack` with their json instead of being built
+        recursively; Element.__init__ drains the stack, so nesting depth doesn't hit the recursion limit.
+        Fields with hooks, Field subclasses and custom AnyOfElement types are called as before.
+        Deferred fields (Field.deferred) are left out, see Element.__init__.
+        """
+        namespace = {'_missing': missing, '_new': object.__new__, '_registry': mcs.registry, '_set': object.__setattr__}
+        frozen = getattr(cls, '_interned', False)
+        lines = ['def _fill(self, data, stack, keep_json, lazy, interner):',
+                 '    _set(self, \'_json_data\', data if keep_json else None)' if frozen else
+                 '    self._json_data = data if keep_json else None']
+        for i, (attr, path, field, datatype, hook, nested) in enumerate(cls._plan):
+            entry_deferred = getattr(field, 'deferred', False) and hook is None
+            code = []
+            if field is None and len(path) == 1:
+                code.append(f'v = data.get({path[0]!r})')
+            elif field is None:
+                code += mcs.lookup_code(path)
+                code.append('if v is _missing: v = None')
+            elif type(field) is Field:
+                namespace[f'_f{i}'] = field
+                for j, alt_path in enumerate(field.paths):
+                    alt = mcs.lookup_code(alt_path)
+                    code += alt if j == 0 else [f'if v is _missing:', *[f'    {q}' for q in alt]]
+                code.append(f'if v is _missing: v = _f{i}.fallback()')
+            else:
+                namespace[f'_f{i}'] = field
+                code.append(f'v = _f{i}(data)')
+
+            element = datatype.mro()[1] if isinstance(datatype, type) and len(datatype.mro()) > 1 else None
+            if hook is not None:
+                namespace[f'_h{i}'] = hook
+                code.append(f'v = _h{i}(self, v)')
+            elif datatype is None:
+                pass
+            elif isinstance(datatype, ElementMeta) and datatype.__new__ is object.__new__ and \
+                    getattr(datatype, '_interned', False):
+                code += ['if v is not None:',
+                         '    if interner is None:',
+                         f'        e = _new({mcs.element_code(datatype, namespace)})',
+                         '        stack.append((e, v))',
+                         '    else:',
+                         f'        e = interner.get({mcs.element_code(datatype, namespace)}, v, keep_json)',
+                         '    v = e']
+            elif isinstance(datatype, ElementMeta) and datatype.__new__ is object.__new__:
+                code += ['if v is not None:',
+                         f'    e = _new({mcs.element_code(datatype, namespace)})',
+                         '    stack.append((e, v))',
+                         '    v = e']
+            elif datatype.__new__ in (ListOfElement.new_new, DictOfElement.new_new) and nested:
+                code += ['if v is not None:', f'    c = {mcs.element_code(element, namespace)}']
+                if datatype.__new__ is ListOfElement.new_new:
+                    code += ['    e = [_new(c) for _ in v]', '    stack.extend(zip(e, v))']
+                else:
+                    code += ['    e = {k: _new(c) for k in v}', '    stack.extend(zip(e.values(), v.values()))']
+                code.append('    v = e')
+            elif datatype.__new__ in (ListOfElement.new_new, DictOfElement.new_new):
+                namespace[f'_t{i}'] = element
+                if datatype.__new__ is ListOfElement.new_new:
+                    code.append(f'if v is not None: v = [q if q.__class__ is _t{i} else _t{i}(q) for q in v]')
+                else:
+                    code.append(f'if v is not None: v = {{k: q if q.__class__ is _t{i} else _t{i}(q) '
+                                f'for k, q in v.items()}}')
+            elif hasattr(datatype, '_choices'):
+                code += ['if v is not None:', '    e = None']
+                for j, (key, choice) in enumerate(datatype._choices.items()):
+                    code.append(f'    {"if" if j == 0 else "elif"} {key!r} in v: e = _new({mcs.element_code(choice, namespace)})')
+                code += ['    if e is not None: stack.append((e, v))', '    v = e']
+            elif nested:
+                namespace[f'_t{i}'] = datatype
+                code.append(f'if v is not None: v = _t{i}(v, keep_json=keep_json, lazy=lazy, intern=interner)')
+            else:
+                namespace[f'_t{i}'] = datatype
+                code.append(f'if v is not None and v.__class__ is not _t{i}: v = _t{i}(v)')
+            code.append(f'_set(self, {attr!r}, v)' if frozen else f'self.{attr} = v')
+
+            if nested and hook is None:  # left for __getattr__ in lazy mode
+                lines += ['    if not lazy:', *[f'        {q}' for q in code]]
+            elif entry_deferred:  # left for __getattr__, or Element.__init__ without raw json
+                continue
+            else:
+                lines += [f'    {q}' for q in code]
+        exec('\n'.join(lines), namespace)
+        return namespace['_fill']
+
+
+class Element(metaclass=ElementMeta):
+    __slots__ = ('_json_data',)
+
+    def __init__(self, json_data, keep_json=True, lazy=False, intern=False):
+        """
+        :param json_data: json string or parsed dict
+        :param keep_json: Retain raw json in _json_data. Passed down to nested elements.
+        :param lazy: Don't parse nested elements until first access; they are parsed from _json_data then.
+        :param intern: Share equal `_interned` elements: True for a table of this parse, or an Interner to use.
+        Deferred fields (e.g. DigestField) are computed from the raw json on first access. Without it they're
+        computed here for this element only, nested elements don't have them.
+        """
         if isinstance(json_data, str):
             json_data = json.loads(json_data)
-        self._json_data = json_data
-        for attr, attr_data in self._attributes.items():
-            if isinstance(attr_data['json_name'], str):
-                data = Field.get_data(attr_data['json_name'], json_data)
-            else:  # Field class
-                data = attr_data['json_name'](json_data)
-            setattr(self, attr, self._process(attr, attr_data['datatype'], data))
+        if lazy and not keep_json:
+            raise ValueError('Lazy parsing needs the raw json, keep_json can\'t be False')
+        if lazy and intern:
+            raise ValueError('Interning works on eager parsing only')
+        interner = Interner() if intern is True else intern or None
+        stack = [(self, json_data)]
+        while stack:
+            element, data = stack.pop()
+            element._fill(data, stack, keep_json, lazy, interner)
+        if not keep_json:
+            self._fill_deferred(json_data)
+
+    def _fill_deferred(self, json_data):
+        """
+        Computes the deferred fields from json the element didn't keep.
+        """
+        for entry in self._deferred:
+            object.__setattr__(self, entry[0], self._parse_field(entry, json_data, False, False))
+
+    def _parse_field(self, entry, json_data, keep_json, lazy):
+        attr, path, field, datatype, hook, nested = entry
+        if field is None:
+            data = Field.get_path(path, json_data)
+        else:
+            data = field(json_data)
+        if hook is not None:
+            return hook(self, data)
+        if data is None or datatype is None or data.__class__ is datatype:
+            return data
+        if nested:
+            return datatype(data, keep_json=keep_json, lazy=lazy)
+        return datatype(data)
+
+    def __getattr__(self, name):
+        # only reached for unset slots: nested fields skipped by lazy parsing, deferred fields
+        # or anything on streamed elements
+        entry = self._lazy_plan.get(name)
+        if entry is None:
+            raise AttributeError(f'{self.__class__.__name__!r} object has no attribute {name!r}')
+        if self._json_data is None:
+            raise AttributeError(f'{self.__class__.__name__}.{name} is computed from the raw json, '
+                                 f'which wasn\'t kept (keep_json=False)')
+        value = self._parse_field(entry, self._json_data, True, True)
+        object.__setattr__(self, name, value)
+        return value
+
+    @classmethod
+    def _from_values(cls, values: dict):
+        """
+        Builds an element from already processed attribute values, bypassing json parsing.
+        Missing attributes are set to None.
+        """
+        obj = cls.__new__(cls)
+        object.__setattr__(obj, '_json_data', None)
+        for attr in cls._schema:
+            object.__setattr__(obj, attr, values.get(attr))
+        return obj
+
+    def __getstate__(self):
+        # memoized results aren't pickled, their keys may hold functions that don't pickle
+        state = {}
+        for klass in self.__class__.__mro__:
+            for slot in klass.__dict__.get('__slots__', ()):
+                if slot in ('__weakref__', '_memo'):
+                    continue
+                try:
+                    state[slot] = klass.__dict__[slot].__get__(self)  # no __getattr__, unset slots stay unset
+                except AttributeError:
+                    pass
+        return None, state
+
+    def __setstate__(self, state):
+        # slots state comes as (None, {slot: value}); plain dicts come from pickles made before __slots__
+        if isinstance(state, tuple):
+            state = {**(state[0] or {}), **state[1]}
+        for k, v in state.items():
+            object.__setattr__(self, k, v)
 
     @property
     def _attributes(self):
-        return {
-            attr:
-                {
-                    'json_name': cls.__dict__.get(attr),
-                    'datatype': cls.__dict__.get('__annotations__', {}).get(attr, str)
-                }
-            for cls in self.__class__.mro() for attr in cls.__dict__.keys()
-            if not attr.startswith('_') and not isinstance(cls.__dict__[attr], FunctionType)
-               and not isinstance(cls.__dict__[attr], property)
-        }
-
-    def _process(self, attr, datatype, value):
-        if hasattr(self, f'_{attr}'):
-            return getattr(self, f'_{attr}')(value)
-        if value is None:
-            return None
-        return datatype(value)
+        return self._schema
 
     def __str__(self):
         return f'<{self.__class__.__name__}: ({", ".join([q for q in self._attributes])})>'
@@ -42,15 +339,39 @@ class Element:
         return self.__str__()
 
 
+class Interner:
+    """
+    Shares one instance per distinct json between elements of classes declaring `_interned = True`.
+    Keys are the class and canonical (key-sorted) json of the payload.
+    Element(..., intern=True) uses a table of its own; Interner.process is shared by the whole process
+    and only keeps instances which are still referenced.
+    """
+    process = None
+
+    def __init__(self, weak=False):
+        self.table = WeakValueDictionary() if weak else {}
+
+    def get(self, cls, data, keep_json=True):
+        key = (cls, json.dumps(data, sort_keys=True, separators=(',', ':')))
+        element = self.table.get(key)
+        if element is None:
+            # built whole before it's shared, so other threads never see it half filled
+            element = self.table.setdefault(key, cls(data, keep_json=keep_json, intern=self))
+        return element
+
+
+Interner.process = Interner(weak=True)
+
+
 class BackReference:
     def __init__(self, class_ref: str):
         self.class_ref = class_ref
 
-    def __call__(self, json_data):
-        return self.get_class()(json_data)
+    def __call__(self, json_data, **options):
+        return self.get_class()(json_data, **options)
 
     def get_class(self):
-        return {q.__name__: q for q in Element.__subclasses__()}[self.class_ref]
+        return ElementMeta.registry[self.class_ref]
 
     def __name__(self):
         return self.class_ref
@@ -59,30 +380,49 @@ class BackReference:
         def new_new(cls, *args, **kwargs):
             return self.get_class()(*args, **kwargs)
 
-        return type(f'BackReferenceTo{self.class_ref}', (object,), {'__new__': new_new})
+        return type(f'BackReferenceTo{self.class_ref}', (object,),
+                    {'__new__': new_new, '_nested': True, '_reference': self})
 
 
 class AnyOfElement:
     def __new__(cls, cls_to_use):
         if isinstance(cls_to_use, BackReference):
             cls_to_use = cls_to_use.get_type()
-        return type(f"{cls.__name__}{cls_to_use.__name__}", (cls_to_use,), {'__new__': cls.new_new})
+        nested = getattr(cls_to_use, '_nested', False) or isinstance(cls_to_use, ElementMeta)
+        return type(f"{cls.__name__}{cls_to_use.__name__}", (cls_to_use,),
+                    {'__new__': cls.new_new, '_nested': nested})
 
     @staticmethod
-    def new_new(cls, elem):
-        return cls(elem)
+    def new_new(cls, elem, **options):
+        return cls(elem, **options)
 
 
 class DictOfElement(AnyOfElement):
     @staticmethod
-    def new_new(cls, elem):
+    def new_new(cls, elem, **options):
         ret = {}
         for k in elem:
-            ret[k] = cls.mro()[1](elem[k])
+            ret[k] = cls.mro()[1](elem[k], **options)
         return ret
 
 
 class ListOfElement(AnyOfElement):
     @staticmethod
-    def new_new(cls, elem):
-        return [cls.mro()[1](q) for q in elem]
+    def new_new(cls, elem, **options):
+        return [cls.mro()[1](q, **options) for q in elem]
+
+
+class OneOfElement:
+    """
+    Picks the element class by the first key present in the payload: OneOfElement({'elements': Paragraph, ...})
+    Returns None if none of the keys are found.
+    """
+    def __new__(cls, choices: dict):
+        def new_new(kls, elem, **options):
+            for key, element in choices.items():
+                if key in elem:
+                    return element(elem, **options)
+            return None
+
+        return type(f'{cls.__name__}{"".join(q.__name__ for q in choices.values())}', (object,),
+                    {'__new__': new_new, '_nested': True, '_choices': choices})
@@ -1,34 +1,48 @@
+from hashlib import blake2b
+import marshal
+
+missing = object()  # lookup result for absent keys; json null is None
+
+
 class Field:
+    deferred = False  # computed from the raw json on first access instead of at parse, see Element.__init__
+
     def __init__(self, name, alt_names=(), strict=False, default=None):
         self.name = name
         self.alt_names = alt_names
         self.strict = strict
         self.default = default
+        self.paths = tuple(tuple(q.split('.')) for q in (name, *alt_names) if q is not None)
 
     @staticmethod
     def get_data(name, data):
-        for k in name.split('.'):
+        return Field.get_path(name.split('.'), data)
+
+    @staticmethod
+    def get_path(path, data):
+        data = Field.lookup(path, data)
+        return None if data is missing else data
+
+    @staticmethod
+    def lookup(path, data):
+        """
+        Single walk down a pre-split path.
+        :return: value or `missing` if any key is absent.
+        """
+        for k in path:
             if k not in data:
-                return None
+                return missing
             data = data[k]
         return data
 
     @staticmethod
     def name_exists(name, data):
-        for k in name.split('.'):
-            if k not in data:
-                return False
-            data = data[k]
-        return True
-
-    def __call__(self, json_data):
-        if self.name_exists(self.name, json_data):
-            return self.get_data(self.name, json_data)
-
-        for field in self.alt_names:
-            if self.name_exists(field, json_data):
-                return self.get_data(field, json_data)
+        return Field.lookup(name.split('.'), data) is not missing
 
+    def fallback(self):
+        """
+        Value used when none of the names are found.
+        """
         if self.default is not None:
             return self.default
 
@@ -37,6 +51,13 @@ class Field:
         else:
             return None
 
+    def __call__(self, json_data):
+        for path in self.paths:
+            data = self.lookup(path, json_data)
+            if data is not missing:
+                return data
+        return self.fallback()
+
 
 class PackField(Field):
     def __init__(self, alt_names, strict=False, default=None):
@@ -44,6 +65,62 @@ class PackField(Field):
 
     def __call__(self, json_data):
         return {
-            k: self.get_data(k, json_data)
-            for k in self.alt_names
+            k: self.get_path(path, json_data)
+            for k, path in zip(self.alt_names, self.paths)
         }
+
+
+def _feed(update, value, ignore, dumps=marshal.dumps):
+    """
+    Feeds marshal's version 0 encoding of value, with ignored dict keys left out at every level, to update
+    in a single walk: the same bytes as marshal.dumps of a filtered copy, without building the copy.
+    Recursive like marshal itself, json nesting doesn't get near the limit.
+    """
+    if value.__class__ is dict:
+        update(b'{')
+        for k, v in value.items():
+            if k not in ignore:
+                update(dumps(k, 0))
+                if v.__class__ is dict or v.__class__ is list:
+                    _feed(update, v, ignore)
+                else:
+                    update(dumps(v, 0))
+        update(b'0')
+    elif value.__class__ is list:
+        update(b'[' + len(value).to_bytes(4, 'little'))
+        for v in value:
+            if v.__class__ is dict or v.__class__ is list:
+                _feed(update, v, ignore)
+            else:
+                update(dumps(v, 0))
+    else:
+        update(dumps(value, 0))
+
+
+class DigestField(Field):
+    """
+    Digest of the element's whole json (or only of the given keys); tells changed elements apart between revisions.
+    Key order counts: a payload reordered by its source digests differently, which only costs a cache miss.
+    Deferred: computed from the raw json on first access, so elements nobody asks about are never hashed.
+    With keep_json=False it's computed at parse for the parsed element only (GoogleDoc adds its top-level
+    body elements), nested elements don't have one.
+    """
+    deferred = True
+
+    def __init__(self, names=(), digest_size=16, ignore=()):
+        """
+        :param ignore: keys left out at every nesting level, e.g. offsets that shift with every edit above
+        """
+        super().__init__(None, alt_names=names)
+        self.digest_size = digest_size
+        self.ignore = frozenset(ignore)
+
+    def __call__(self, json_data):
+        if self.paths:
+            json_data = [self.get_path(path, json_data) for path in self.paths]
+        # version 0: no back references or interning flags, so equal payloads always give equal bytes
+        if not self.ignore:
+            return blake2b(marshal.dumps(json_data, 0), digest_size=self.digest_size).hexdigest()
+        digest = blake2b(digest_size=self.digest_size)
+        _feed(digest.update, json_data, self.ignore)
+        return digest.hexdigest()
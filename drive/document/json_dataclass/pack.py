@@ -0,0 +1,163 @@
+from hashlib import blake2b
+import gc
+import marshal
+import zlib
+
+from .element import Element, ElementMeta
+
+MAGIC = b'JDP1'
+
+
+class StaleSchema(ValueError):
+    """
+    Packed data was written for element classes which have changed since (or isn't usable packed data at all).
+    """
+
+
+def signature(cls):
+    """
+    Short hash of the class layout: attribute order, json names and datatypes. Changes whenever a field does.
+    """
+    if '_signature' not in cls.__dict__:
+        layout = []
+        for attr, path, field, datatype, hook, nested in cls._plan:
+            names = path if field is None else (type(field).__name__, field.paths)
+            layout.append((attr, names, getattr(datatype, '__name__', None), hook is not None, nested))
+        cls._signature = blake2b(repr(layout).encode(), digest_size=8).hexdigest()
+    return cls._signature
+
+
+def _slot(obj, attr):
+    # slot value without Element.__getattr__, None if it's unset
+    try:
+        return getattr(obj.__class__, attr).__get__(obj)
+    except AttributeError:
+        return None
+
+
+def _walk(value):
+    # elements held by a nested field: an element, or lists/dicts of them
+    if isinstance(value, Element):
+        yield value
+    elif value.__class__ is list:
+        for item in value:
+            yield from _walk(item)
+    elif value.__class__ is dict:
+        for item in value.values():
+            yield from _walk(item)
+
+
+def _refs(value, index):
+    if isinstance(value, Element):
+        return index[id(value)]
+    if value.__class__ is list:
+        return [_refs(q, index) for q in value]
+    if value.__class__ is dict:
+        return {k: _refs(v, index) for k, v in value.items()}
+    return value
+
+
+def _resolve(value, built):
+    if value.__class__ is int:
+        return built[value]
+    if value.__class__ is list:
+        return [_resolve(q, built) for q in value]
+    if value.__class__ is dict:
+        return {k: _resolve(v, built) for k, v in value.items()}
+    return value
+
+
+def builder(cls):
+    """
+    Generated function building an element of cls from a packed row, in the manner of ElementMeta.generate_fill:
+    rows are unpacked positionally and nested references resolved inline, no per-attribute loop.
+    """
+    if '_build' not in cls.__dict__:
+        namespace = {'_cls': cls, '_new': object.__new__, '_set': object.__setattr__, '_resolve': _resolve}
+        frozen = getattr(cls, '_interned', False)
+        names = [f'v{i}' for i in range(len(cls._plan))]
+        lines = ['def _build(row, built):',
+                 f'    _, json_data, {"".join(q + ", " for q in names)}= row',
+                 '    obj = _new(_cls)',
+                 '    _set(obj, \'_json_data\', json_data)' if frozen else '    obj._json_data = json_data']
+        for name, (attr, path, field, datatype, hook, nested) in zip(names, cls._plan):
+            if nested:
+                lines.append(f'    if {name} is not None:')
+                lines.append(f'        {name} = built[{name}] if {name}.__class__ is int else _resolve({name}, built)')
+            assign = f'_set(obj, {attr!r}, {name})' if frozen else f'obj.{attr} = {name}'
+            if getattr(field, 'deferred', False):  # None if it wasn't computed, stays unset
+                lines.append(f'    if {name} is not None: {assign}')
+            else:
+                lines.append(f'    {assign}')
+        lines.append('    return obj')
+        exec('\n'.join(lines), namespace)
+        cls._build = namespace['_build']
+    return cls._build
+
+
+def pack(element: Element, level: int = 1) -> bytes:
+    """
+    Compact encoding of a parsed element tree: every element becomes one row of positional values,
+    children before parents, nested elements referenced by row number. Shared (interned) elements are stored once.
+    Raw json is kept where the element has it; marshal stores sub-dicts shared with the parent json once as well.
+    Lazy elements are fully materialized first.
+    :param level: zlib compression level
+    """
+    classes, signatures, rows, index = {}, [], [], {}
+    stack = [(element, False)]
+    while stack:
+        obj, ready = stack.pop()
+        if id(obj) in index:
+            continue
+        cls = obj.__class__
+        nested = [getattr(obj, entry[0]) for entry in cls._plan if entry[5]]
+        if not ready:
+            stack.append((obj, True))
+            stack.extend((child, False) for value in nested for child in _walk(value) if id(child) not in index)
+            continue
+        if cls not in classes:
+            classes[cls] = len(classes)
+            signatures.append((cls.__name__, signature(cls)))
+        json_data = obj._json_data if obj._json_data.__class__ is dict else None
+        row = [classes[cls], json_data]
+        for attr, path, field, datatype, hook, is_nested in cls._plan:
+            if getattr(field, 'deferred', False):
+                value = _slot(obj, attr)  # not computed just to be stored
+            else:
+                value = getattr(obj, attr)
+            row.append(_refs(value, index) if is_nested else value)
+        index[id(obj)] = len(rows)
+        rows.append(tuple(row))
+    return MAGIC + zlib.compress(marshal.dumps((signatures, rows)), level)
+
+
+def unpack(data: bytes, cls: ElementMeta = None) -> Element:
+    """
+    Rebuilds an element tree written by pack, without going through json parsing.
+    :param cls: expected class of the root element
+    :raise StaleSchema: data isn't packed or is damaged, or any of the classes has changed since it was written
+    """
+    if not data.startswith(MAGIC):
+        raise StaleSchema('Not packed element data')
+    classes = []
+    enabled = gc.isenabled()
+    gc.disable()  # nothing to collect in a fresh tree, collections would only rescan it while it grows
+    try:
+        try:
+            signatures, rows = marshal.loads(zlib.decompress(memoryview(data)[len(MAGIC):]))
+        except (zlib.error, EOFError, TypeError, ValueError) as e:
+            raise StaleSchema(f'Packed data is damaged: {e}')
+        for name, sig in signatures:
+            klass = ElementMeta.registry.get(name)
+            if klass is None or signature(klass) != sig:
+                raise StaleSchema(f'{name} has changed since the data was packed')
+            classes.append(builder(klass))
+        built = []
+        for row in rows:
+            built.append(classes[row[0]](row, built))
+    finally:
+        if enabled:
+            gc.enable()
+    if cls is not None and not (built and isinstance(built[-1], cls)):
+        raise StaleSchema(f'Packed data doesn\'t hold a {cls.__name__}')
+    return built[-1]
@@ -0,0 +1,239 @@
+from collections.abc import Mapping
+from io import BytesIO, TextIOBase
+from tempfile import SpooledTemporaryFile
+import codecs
+import json
+import re
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r'[ \t\n\r]*')
+_skipped = object()  # marks top-level values that were walked over, not kept
+
+
+class _Source:
+    """
+    Random access over the raw bytes. Seekable binary files are read in place,
+    everything else is spooled (to disk past spool_size) as it's read so several cursors can share it.
+    close() removes the spool; the stream itself belongs to the caller and is left open.
+    """
+
+    def __init__(self, stream, spool_size):
+        if isinstance(stream, str):
+            stream = stream.encode()
+        if isinstance(stream, (bytes, bytearray, memoryview)):
+            stream = BytesIO(stream)
+        if not isinstance(stream, TextIOBase) and stream.seekable():
+            self.file = stream
+            self.start = stream.tell()
+            self.stream = None
+            self.spooled = False
+        else:
+            self.file = SpooledTemporaryFile(max_size=spool_size)
+            self.start = 0
+            self.stream = stream
+            self.size = 0
+            self.spooled = True
+
+    def read_at(self, offset, size):
+        while self.stream is not None and offset + size > self.size:
+            data = self.stream.read(size)
+            if not data:
+                self.stream = None
+                break
+            if isinstance(data, str):
+                data = data.encode()
+            self.file.seek(self.size)
+            self.file.write(data)
+            self.size += len(data)
+        self.file.seek(self.start + offset)
+        return self.file.read(size)
+
+    def close(self):
+        self.stream = None
+        if self.spooled:
+            self.file.close()
+
+
+class _Cursor:
+    """
+    Forward-only json reader over a _Source. Keeps only the unconsumed part of the text buffered.
+    """
+
+    def __init__(self, source, chunk_size):
+        self.source = source
+        self.chunk_size = chunk_size
+        self.offset = 0
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, at_least=0):
+        if self.eof:
+            return False
+        data = self.source.read_at(self.offset, max(self.chunk_size, at_least))
+        self.offset += len(data)
+        self.buf = self.buf[self.pos:] + self.decoder.decode(data, final=not data)
+        self.pos = 0
+        self.eof = not data
+        return True
+
+    def peek(self):
+        while True:
+            self.pos = _whitespace.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, chars):
+        char = self.peek()
+        if char == '' or char not in chars:
+            raise json.JSONDecodeError(f'Expected one of {chars!r}', self.buf, self.pos)
+        self.pos += 1
+        return char
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+                # a number may continue in the next chunk
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self.fill(len(self.buf) - self.pos)  # doubles the window so retries stay linear
+
+    def members(self):
+        """
+        Yields keys of the object under the cursor. The value must be consumed before the next key is asked for.
+        """
+        self.expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            key = self.value()
+            self.expect(':')
+            yield key
+            if self.expect(',}') == '}':
+                return
+
+    def items(self):
+        """
+        Yields once per item of the array under the cursor. The item must be consumed before the next one.
+        """
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield
+            if self.expect(',]') == ']':
+                return
+
+    def skip(self, depth=0):
+        """
+        Consumes a value. The first `depth` container levels are walked member by member, so they're never decoded whole.
+        """
+        char = self.peek()
+        if depth and char == '{':
+            for _ in self.members():
+                self.skip(depth - 1)
+        elif depth and char == '[':
+            for _ in self.items():
+                self.skip(depth - 1)
+        else:
+            self.value()
+
+
+class JsonStream(Mapping):
+    """
+    Read-only mapping over a top-level json object held in bytes, str or a file-like object.
+    Nothing is read until asked for: top-level values are decoded on lookup and kept,
+    `iter_items` yields items of a nested array one by one without decoding the array.
+    Keys in `large` ({key: depth}, see _Cursor.skip) are walked over during lookups and decoded again on every access.
+    Non-seekable and text streams are spooled to a temporary file: close() the JsonStream or use it in a with block.
+    """
+
+    def __init__(self, stream, large: dict = None, chunk_size=1 << 16, spool_size=1 << 23):
+        self.large = large or {}
+        self.chunk_size = chunk_size
+        self._source = _Source(stream, spool_size)
+        self._values = {}
+        self._index_cursor = _Cursor(self._source, chunk_size)
+        self._index = self._index_cursor.members()
+        self._indexed = False
+
+    def _advance(self):
+        key = next(self._index, None)
+        if key is None:
+            self._indexed = True
+            return False
+        if key in self.large:
+            self._index_cursor.skip(self.large[key])
+            self._values[key] = _skipped
+        else:
+            self._values[key] = self._index_cursor.value()
+        return True
+
+    def _seek(self, key):
+        cursor = _Cursor(self._source, self.chunk_size)
+        for k in cursor.members():
+            if k == key:
+                return cursor
+            cursor.skip(self.large.get(k, 0))
+        return None
+
+    def __contains__(self, key):
+        while key not in self._values and not self._indexed and self._advance():
+            pass
+        return key in self._values
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        if self._values[key] is _skipped:
+            return self._seek(key).value()
+        return self._values[key]
+
+    def __iter__(self):
+        while not self._indexed and self._advance():
+            pass
+        return iter(self._values)
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def close(self):
+        """
+        Frees the spool, values decoded so far stay available; the stream given is left open.
+        """
+        self._source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def iter_items(self, path):
+        """
+        Yields items of the array at a dotted path one by one, decoded separately.
+        Nothing is yielded if the path is missing or isn't an array.
+        """
+        cursor = _Cursor(self._source, self.chunk_size)
+        for depth, key in enumerate(path.split('.')):
+            for k in cursor.members() if cursor.peek() == '{' else ():
+                if k == key:
+                    break
+                cursor.skip(self.large.get(k, 0) if depth == 0 else 0)
+            else:
+                return
+        if cursor.peek() != '[':
+            return
+        for _ in cursor.items():
+            yield cursor.value()
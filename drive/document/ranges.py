@@ -1,4 +1,4 @@
-from .json_dataclass import Element, ListOfElement, Field
+from .json_dataclass import Element, ListOfElement, Field, BackReference
 
 class Range(Element):
     segment_id: str = 'segmentId'
@@ -9,4 +9,6 @@ class Range(Element):
 class NamedRange(Element):
     name_range_id: str = 'namedRangeId'
     name: str = 'name'
-    range: ListOfElement(Range) = 'ranges'
\ No newline at end of file
+    range: ListOfElement(Range) = 'ranges'
+    # set on the groups under GoogleDoc.named_ranges, which hold every range sharing the name
+    named_ranges: ListOfElement(BackReference('NamedRange')) = 'namedRanges'
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from threading import Lock
+
+
+class RenderCache:
+    """
+    Rendered HTML of one doc kept between renders: the whole page for its revision and the fragment
+    of every top-level element by fingerprint. Keep one per doc and pass it to HTMLConverter;
+    a new revision re-renders only elements whose fingerprint (or adjacent borders) changed.
+    """
+
+    def __init__(self):
+        self.context = None
+        self.page = (None, None, ())  # (revision, html, generated styles)
+        self.fragments = {}
+        self.rendered = 0  # elements rendered by the last render, the rest came from fragments
+
+    def check_context(self, context):
+        """
+        Drops everything rendered with other options or doc-level styles.
+        """
+        if context != self.context:
+            self.context = context
+            self.page = (None, None, ())
+            self.fragments = {}
+
+
+class FragmentCache:
+    """
+    Bounded LRU of rendered fragments shared between HTMLConverters, keyed by render context and element fingerprint.
+    max_size counts characters of HTML (or the size given to put); least recently used fragments are evicted past it.
+    FragmentCache.process is one for the whole process, used by converters unless they are given another or None.
+    """
+    process = None
+
+    def __init__(self, max_size: int = 1 << 25):
+        self.max_size = max_size
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__lock = Lock()
+        self.__data = OrderedDict()
+
+    def get(self, key):
+        with self.__lock:
+            entry = self.__data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.__data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, data, size: int = None):
+        """
+        :param size: of data if it isn't len(data)
+        """
+        if size is None:
+            size = len(data)
+        if size > self.max_size:
+            return
+        with self.__lock:
+            old = self.__data.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self.__data[key] = (data, size)
+            self.size += size
+            while self.size > self.max_size:
+                _, (_, dropped) = self.__data.popitem(last=False)
+                self.size -= dropped
+                self.evictions += 1
+
+    def clear(self):
+        with self.__lock:
+            self.__data.clear()
+            self.size = 0
+
+    def __contains__(self, key):
+        # doesn't count as a hit or move the fragment up
+        with self.__lock:
+            return key in self.__data
+
+    def __len__(self):
+        return len(self.__data)
+
+    @property
+    def stats(self) -> dict:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'fragments': len(self.__data), 'size': self.size, 'max_size': self.max_size}
+
+
+FragmentCache.process = FragmentCache()
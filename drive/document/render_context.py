@@ -0,0 +1,84 @@
+from typing import NamedTuple, Any
+
+from .style import _color_variant
+from .layout import SectionBreak
+
+glyph_equivalence = {
+    'GLYPH_TYPE_UNSPECIFIED': ('disc', 'ul'),
+    'NONE': ('disc', 'ul'),
+    'DECIMAL': ('decimal', 'ol'),
+    'ZERO_DECIMAL': ('decimal-leading-zero', 'ol'),
+    'UPPER_ALPHA': ('upper-alpha', 'ol'),
+    'ALPHA': ('lower-alpha', 'ol'),
+    'UPPER_ROMAN': ('upper-roman', 'ol'),
+    'ROMAN': ('lower-roman', 'ol'),
+    '●': ('disc', 'ul')
+}
+
+
+class ResolvedObject(NamedTuple):
+    horizontal_line: bool
+    properties: Any  # ImageProperties; the source is read at render, local paths are set after parsing
+    style: str
+    alt: str
+
+
+def _resolve(obj):
+    content = obj.content
+    if content is None or content.content is None:
+        return None
+    embedded = content.content
+    if embedded.title == 'horizontal line':
+        return ResolvedObject(True, None, '', '')
+    e_style = ''
+    # layout process!!
+    if content.positioning is not None:
+        e_style = content.positioning.as_css()
+    style = f'{embedded.margins.as_css()};{embedded.size.as_css()};{e_style}'
+    return ResolvedObject(False, embedded.properties, style, f'{embedded.title} : {embedded.description}')
+
+
+class RenderContext:
+    """
+    Lookup tables of one GoogleDoc for the converters, built once: css of named styles,
+    list-style-type and tag of every list nesting level, inline and positioned objects by id
+    and the body split into sections.
+    Use GoogleDoc.render_context; like GoogleDoc.index it goes stale if the doc is changed.
+    """
+
+    def __init__(self, doc):
+        self.named_styles = {}
+        for named_style in reversed(doc.named_styles or ()):  # the first one of a type wins
+            self.named_styles[named_style.style_type] = named_style
+        self.lists = {}  # (list id, nesting level) -> (list-style-type css, tag)
+        for list_id, lst in (doc.lists or {}).items():
+            for level, nesting in enumerate(lst.nesting_levels or ()):
+                style_type, tag = glyph_equivalence.get(nesting.glyph, ('disc', 'ul'))
+                self.lists[list_id, level] = (f'list-style-type: {style_type}', tag)
+        self.inline_objects = {k: _resolve(v) for k, v in (doc.inline_objects or {}).items()}
+        self.positioned_objects = {k: _resolve(v) for k, v in (doc.positioned_objects or {}).items()}
+        self.sections = [(None, [])]  # (section style, elements) split at section breaks
+        self.order = []  # (section number, element number) of top-level elements in document order
+        self.positions = {}  # id of a top-level element -> its number in order; section breaks get the next one's
+        for struct in doc.body or ():
+            self.positions[id(struct)] = len(self.order)
+            if isinstance(struct.content, SectionBreak):
+                self.sections.append((struct.content.content, []))
+            else:
+                elements = self.sections[-1][1]
+                self.order.append((len(self.sections) - 1, len(elements)))
+                elements.append(struct)
+        self.__named_style_css = {}
+
+    def named_style_css(self) -> dict:
+        """
+        Named style type -> (paragraph css dict, text css dict) under the current RenderOptions.
+        The dicts are shared, copy them before changing.
+        """
+        variant = _color_variant()
+        table = self.__named_style_css.get(variant)
+        if table is None:
+            table = {k: (q.paragraph_style.as_css_dict(), q.text_style.as_css_dict())
+                     for k, q in self.named_styles.items()}
+            self.__named_style_css[variant] = table
+        return table
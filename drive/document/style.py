@@ -1,10 +1,31 @@
-from .json_dataclass import Element, Field, PackField
+from contextvars import ContextVar
+from typing import NamedTuple
+
+from .json_dataclass import Element, Field, PackField, memoized
+
+
+class RenderOptions(NamedTuple):
+    """
+    Options changing the css of elements, for the render running in the current thread (or task).
+    HTMLConverter sets them around every step of a render; css outside a render gets the defaults.
+    """
+    ignore_black_white: bool = False  # pure black and white colors are left to the page
+
+
+render_options = ContextVar('render_options', default=RenderOptions())
+
+
+def _color_variant():
+    # css with colors depends on the options of the render, cached css has to as well
+    return render_options.get().ignore_black_white
 
 
 class Dimension(Element):
+    _interned = True
     magnitude: int = 'magnitude'
     unit: str = 'unit'
 
+    @memoized()
     def as_css(self):
         if self.magnitude is None:
             return ''
@@ -13,6 +34,8 @@ class Dimension(Element):
     def __eq__(self, other):
         if other is None:
             return None
+        if self is other:  # interned
+            return True
         return self.unit == other.unit and self.magnitude == other.magnitude
 
 
@@ -55,9 +78,14 @@ class Size(Element):
 
 
 class Color(Element):
+    _interned = True
     color: dict = Field('rgbColor', alt_names=('color.rgbColor',))
 
+    @memoized(_color_variant)
     def as_css(self, ignore_ignoration=False):
+        """
+        :param ignore_ignoration: keep black and white even when the render ignores them
+        """
         def to_hex(val: float):
             i_val = val * 256  # 256 to balance the curve of float values evenly
             if i_val == 256:
@@ -67,16 +95,23 @@ class Color(Element):
         if self.color is None:
             return None
 
-        return f'#{to_hex(self.color.get("red", 0))}' \
-               f'{to_hex(self.color.get("green", 0))}' \
-               f'{to_hex(self.color.get("blue", 0))}'
+        css = f'#{to_hex(self.color.get("red", 0))}' \
+              f'{to_hex(self.color.get("green", 0))}' \
+              f'{to_hex(self.color.get("blue", 0))}'
+        if not ignore_ignoration and css in ('#000000', '#FFFFFF') and render_options.get().ignore_black_white:
+            return None
+        return css
 
     def __eq__(self, other):
         if other is None:
             return False
+        if self is other:  # interned
+            return True
         return self.color == other.color
 
+
 class SpaceStyle:
+    __slots__ = ()
     default_header_id: str = 'defaultHeaderId'
     default_footer_id: str = 'defaultFooterId'
     even_page_header_id: str = 'evenPageHeaderId'
@@ -91,6 +126,7 @@ class SpaceStyle:
 
 
 class Border(Element):  # represents Border and ParagraphBorder
+    _interned = True
     color: Color = 'color'
     width: Dimension = 'width'
     dash: str = 'dashStyle'  # ENUM.
@@ -103,6 +139,7 @@ class Border(Element):  # represents Border and ParagraphBorder
             'DASH': 'dashed',
         }.get(self.dash, 'solid')
 
+    @memoized(_color_variant)
     def as_css_dict(self, side=None):
         width = self.width
         if width is None or width.magnitude is None:
@@ -116,6 +153,7 @@ class Border(Element):  # represents Border and ParagraphBorder
             out[f'{pretag}-color'] = self.color.as_css()
         return out
 
+    @memoized(_color_variant)
     def as_css(self, side=None):
         width = self.width
         if width is None:
@@ -140,9 +178,11 @@ class Border(Element):  # represents Border and ParagraphBorder
 
 
 class Font(Element):
+    _interned = True
     font_family: str = 'fontFamily'
     weight: int = 'weight'
 
+    @memoized()
     def as_css_dict(self):
         return {
             'font-family': self.font_family,
@@ -151,6 +191,7 @@ class Font(Element):
 
 
 class ParagraphStyle(Element):
+    _interned = True
     heading: str = 'headingId'
     named_style: str = 'namedStyleType'
     alignment: str = 'alignment'
@@ -179,6 +220,7 @@ class ParagraphStyle(Element):
         The ParagraphStyle on a Paragraph element that's contained in a table may inherit its paragraph style from the table style.
     """
 
+    @memoized(_color_variant)
     def as_css_dict(self, previous_border=False, next_border=False):
         output = {}
         if self.space_above is not None and self.space_above.magnitude is not None:
@@ -217,12 +259,14 @@ class ParagraphStyle(Element):
 
 
 class Link(Element):
+    _interned = True
     url: str = 'url'
     bookmark_id: str = 'bookmarkId'
     heading_id: str = 'headingId'
 
 
 class TextStyle(Element):
+    _interned = True
     bold: bool = 'bold'
     italic: bool = 'italic'
     underline: bool = 'underline'
@@ -236,18 +280,17 @@ class TextStyle(Element):
     link: Link = 'link'
 
     def __add__(self, other):
+        # keeps only the attributes both styles agree on; Font and Link never merge, interned or not
         out = {}
         for attr in self._attributes:
-            if getattr(self, attr) == getattr(other, attr):
-                data = getattr(self, attr)
-                if data.__class__ in (Color, Dimension):
-                    data = data._json_data
-
-                key = getattr(self.__class__, attr)
-                out[key] = data
-
-        return TextStyle(out)
-
+            data = getattr(self, attr)
+            if isinstance(data, (Font, Link)):
+                continue
+            if data is getattr(other, attr) or data == getattr(other, attr):
+                out[attr] = data
+        return TextStyle._from_values(out)
+
+    @memoized(_color_variant)
     def as_css_dict(self, ignore_ignoration=False):
         out = {}
         if self.background is not None and self.background.as_css() is not None:
@@ -0,0 +1,136 @@
+"""
+Docs API json of small test documents, offsets consistent like the ones the API returns.
+"""
+import json
+
+GLYPHS = {'ol': {'glyphType': 'DECIMAL'}, 'ul': {'glyphSymbol': '●'}}
+
+
+def _dim(magnitude):
+    return {'magnitude': magnitude, 'unit': 'PT'}
+
+
+class DocBuilder:
+    def __init__(self, title='Test doc', revision='rev1'):
+        self.title = title
+        self.revision = revision
+        self.index = 1
+        self.body = [self.__section_break()]
+        self.lists = {}
+        self.inline_objects = {}
+        self.named_ranges = {}
+
+    def __section_break(self):
+        self.index += 1
+        return {'startIndex': self.index - 1, 'endIndex': self.index,
+                'sectionBreak': {'sectionStyle': {'sectionType': 'CONTINUOUS'}}}
+
+    def __paragraph(self, runs, style='NORMAL_TEXT', heading_id=None, bullet=None, image=None, **paragraph_style):
+        start, elements = self.index, []
+        for run in runs:
+            text, text_style = (run, {}) if isinstance(run, str) else run
+            elements.append({'startIndex': self.index, 'endIndex': self.index + len(text),
+                             'textRun': {'content': text, 'textStyle': text_style}})
+            self.index += len(text)
+        if image is not None:
+            self.inline_objects[image] = {'objectId': image, 'inlineObjectProperties': {'embeddedObject': {
+                'title': 'picture', 'description': image, 'size': {'height': _dim(10), 'width': _dim(20)},
+                'imageProperties': {'contentUri': f'https://example.com/{image}.png'}}}}
+            elements.append({'startIndex': self.index, 'endIndex': self.index + 1,
+                             'inlineObjectElement': {'inlineObjectId': image}})
+            self.index += 1
+        elements.append({'startIndex': self.index, 'endIndex': self.index + 1,
+                         'textRun': {'content': '\n', 'textStyle': {}}})
+        self.index += 1
+        paragraph = {'elements': elements, 'paragraphStyle': {'namedStyleType': style, **paragraph_style}}
+        if heading_id is not None:
+            paragraph['paragraphStyle']['headingId'] = heading_id
+        if bullet is not None:
+            list_id, level = bullet
+            paragraph['bullet'] = {'listId': list_id, 'nestingLevel': level}
+        return {'startIndex': start, 'endIndex': self.index, 'paragraph': paragraph}
+
+    def paragraph(self, *runs, **options) -> "DocBuilder":
+        """
+        :param runs: text of every run, or (text, textStyle json)
+        :param options: style (named style type), heading_id, bullet=(list id, level), image (inline object id),
+        paragraphStyle json keys
+        """
+        self.body.append(self.__paragraph(runs, **options))
+        return self
+
+    def heading(self, text, heading_id, level=1) -> "DocBuilder":
+        return self.paragraph(text, style=f'HEADING_{level}', heading_id=heading_id)
+
+    def list(self, list_id, kind='ol', levels=3) -> "DocBuilder":
+        self.lists[list_id] = {'listProperties': {'nestingLevels': [GLYPHS[kind]] * levels}}
+        return self
+
+    def table(self, rows) -> "DocBuilder":
+        """
+        :param rows: rows of cell texts
+        """
+        start = self.index
+        self.index += 1
+        table_rows = []
+        for row in rows:
+            row_start, cells = self.index, []
+            for text in row:
+                cell_start = self.index
+                self.index += 1
+                content = [self.__paragraph([text])]
+                cells.append({'startIndex': cell_start, 'endIndex': self.index, 'content': content,
+                              'tableCellStyle': {'rowSpan': 1, 'columnSpan': 1, 'paddingLeft': _dim(5)}})
+            table_rows.append({'startIndex': row_start, 'endIndex': self.index, 'tableCells': cells,
+                               'tableRowStyle': {'minRowHeight': _dim(0)}})
+        self.index += 1
+        self.body.append({'startIndex': start, 'endIndex': self.index, 'table': {
+            'rows': len(rows), 'columns': max(map(len, rows)), 'tableRows': table_rows,
+            'tableStyle': {'tableColumnProperties': [{'widthType': 'EVENLY_DISTRIBUTED'}] * max(map(len, rows))}}})
+        return self
+
+    def section_break(self) -> "DocBuilder":
+        self.body.append(self.__section_break())
+        return self
+
+    def named_range(self, name, first, last) -> "DocBuilder":
+        """
+        Range over body elements first to last (numbers in the body, the opening section break is 0).
+        """
+        self.named_ranges[name] = {'name': name, 'namedRanges': [{
+            'namedRangeId': f'range.{name}', 'name': name,
+            'ranges': [{'startIndex': self.body[first]['startIndex'], 'endIndex': self.body[last]['endIndex']}]}]}
+        return self
+
+    def json(self) -> dict:
+        return {'title': self.title, 'documentId': 'doc1', 'revisionId': self.revision,
+                'body': {'content': self.body}, 'lists': self.lists, 'inlineObjects': self.inline_objects,
+                'namedRanges': self.named_ranges,
+                'namedStyles': {'styles': [
+                    {'namedStyleType': 'NORMAL_TEXT', 'textStyle': {'fontSize': _dim(11)}, 'paragraphStyle': {}},
+                    {'namedStyleType': 'HEADING_1', 'textStyle': {'bold': True}, 'paragraphStyle': {}}]},
+                'documentStyle': {'pageSize': {'height': _dim(800), 'width': _dim(600)}}}
+
+    def dumps(self) -> str:
+        return json.dumps(self.json())
+
+
+def sample(first='First paragraph ', revision='rev1') -> DocBuilder:
+    """
+    A doc with a bit of everything: headings, a nested list, a table, an image, two sections and a named range.
+    """
+    doc = DocBuilder(revision=revision).list('kix.list1')
+    doc.paragraph(first, ('bold text ', {'bold': True}), ' tail')
+    doc.heading('Chapter one', 'h.one')
+    doc.paragraph('Under chapter one ', ('linked', {'link': {'url': 'https://example.com/'}}))
+    doc.paragraph('item one', bullet=('kix.list1', 0))
+    doc.paragraph('item one.one', bullet=('kix.list1', 1))
+    doc.paragraph('item two', bullet=('kix.list1', 0))
+    doc.table([['a', 'b'], ['c', 'd']])
+    doc.section_break()
+    doc.heading('Chapter two', 'h.two')
+    doc.paragraph('With a picture ', image='kix.img1')
+    for i in range(5):
+        doc.paragraph(f'Paragraph {i} of chapter two ', ('styled', {'italic': True}))
+    doc.named_range('middle', 3, 6)
+    return doc
@@ -0,0 +1,45 @@
+import re
+import unittest
+
+from .. import GoogleDoc, HTMLConverter, generated_class
+from .docs import sample
+
+
+def inline_styles(html):
+    # of the tags whose styles are extracted; sections, lists, tables and images keep theirs
+    return re.findall(r'<(?:span|td|h\d|div class="(?:paragraph|struct-element)[^"]*")[^>]*style="', html)
+
+
+class ExtractStylesTest(unittest.TestCase):
+    def setUp(self):
+        self.doc = GoogleDoc(sample().dumps())
+
+    def test_block(self):
+        converter = HTMLConverter(self.doc, extract_styles='block')
+        html = converter.body_as_html()
+        body, style = html.rsplit('<style>', 1)
+        self.assertEqual(style, f'{converter.stylesheet}</style>')
+        self.assertEqual(inline_styles(body), [])
+        classes = set(re.findall(r'class="[^"]* (s[a-z2-7]{8})"', body))
+        self.assertTrue(classes)
+        self.assertEqual(classes, set(re.findall(r'\.(s[a-z2-7]{8}) \{', converter.stylesheet)))
+
+    def test_external(self):
+        converter = HTMLConverter(self.doc, extract_styles='external')
+        html = converter.body_as_html()
+        self.assertNotIn('<style>', html)
+        self.assertEqual(html, HTMLConverter(self.doc, extract_styles='block').body_as_html().rsplit('<style>', 1)[0])
+        self.assertTrue(converter.stylesheet.startswith('.container .s'))
+
+    def test_inline_by_default(self):
+        converter = HTMLConverter(self.doc)
+        self.assertTrue(inline_styles(converter.body_as_html()))
+        self.assertEqual(converter.stylesheet, '')
+
+    def test_same_style_same_class(self):
+        self.assertEqual(generated_class('color: red'), generated_class('color: red'))
+        self.assertNotEqual(generated_class('color: red'), generated_class('color: blue'))
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            HTMLConverter(self.doc, extract_styles='inline')
@@ -0,0 +1,52 @@
+import unittest
+
+from .. import GoogleDoc, HTMLConverter, FragmentCache
+from .docs import sample
+
+
+class UpperCaseConverter(HTMLConverter):
+    def process_text_run(self, elem, *args, **kwargs):
+        return super().process_text_run(elem, *args, **kwargs).upper()
+
+
+class FragmentCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.doc = GoogleDoc(sample().dumps())
+        self.fragments = FragmentCache()
+        self.plain = HTMLConverter(self.doc, fragments=None).body_as_html()
+
+    def test_shared_between_converters(self):
+        self.assertEqual(HTMLConverter(self.doc, fragments=self.fragments).body_as_html(), self.plain)
+        misses = self.fragments.misses
+        self.assertEqual(HTMLConverter(GoogleDoc(sample().dumps()), fragments=self.fragments).body_as_html(),
+                         self.plain)
+        self.assertEqual(self.fragments.misses, misses)
+        self.assertGreater(self.fragments.hits, 0)
+
+    def test_subclass_gets_its_own_fragments(self):
+        HTMLConverter(self.doc, fragments=self.fragments).body_as_html()
+        html = UpperCaseConverter(self.doc, fragments=self.fragments).body_as_html()
+        self.assertEqual(html, UpperCaseConverter(self.doc, fragments=None).body_as_html())
+        self.assertNotEqual(html, self.plain)
+
+    def test_separator_is_part_of_the_context(self):
+        HTMLConverter(self.doc, fragments=self.fragments).body_as_html()
+        converter = HTMLConverter(self.doc, fragments=self.fragments)
+        converter.html_separator = '\n'
+        self.assertNotEqual(converter.cache_context(), HTMLConverter(self.doc).cache_context())
+        expected = HTMLConverter(self.doc, fragments=None)
+        expected.html_separator = '\n'
+        self.assertEqual(converter.body_as_html(), expected.body_as_html())
+
+    def test_process_cache_by_default(self):
+        self.assertIs(HTMLConverter(self.doc).fragments, FragmentCache.process)
+        HTMLConverter(self.doc).body_as_html()
+        misses = FragmentCache.process.misses
+        self.assertEqual(HTMLConverter(GoogleDoc(sample().dumps())).body_as_html(), self.plain)
+        self.assertEqual(FragmentCache.process.misses, misses)
+
+    def test_bounded(self):
+        fragments = FragmentCache(max_size=len(self.plain) // 4)
+        self.assertEqual(HTMLConverter(self.doc, fragments=fragments).body_as_html(), self.plain)
+        self.assertLessEqual(fragments.size, fragments.max_size)
+        self.assertGreater(fragments.evictions, 0)
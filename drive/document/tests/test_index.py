@@ -0,0 +1,63 @@
+import unittest
+
+from .. import GoogleDoc
+from ..index import Span, iter_paragraphs
+from ..paragraph import ParagraphElement
+from ..tables import Table, TableRow, TableCell
+from .docs import sample
+
+
+class DocumentIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.doc = GoogleDoc(sample().dumps())
+        self.index = self.doc.index
+
+    def test_built_once(self):
+        self.assertIs(self.doc.index, self.index)
+
+    def test_path(self):
+        first = self.doc.body[1]
+        path = self.index.path(first.start + 3)
+        self.assertEqual(path[0], first)
+        self.assertIsInstance(path[-1], ParagraphElement)
+        self.assertEqual(path[-1].text_run.content, 'First paragraph ')
+        self.assertIs(self.index.paragraph_element(first.start + 3), path[-1])
+
+    def test_path_in_table(self):
+        table = self.doc.body[7]
+        self.assertIsInstance(table.content, Table)
+        cell = table.content.content[1].content[0]  # 'c'
+        path = self.index.path(cell.content[0].start)
+        self.assertEqual([type(q) for q in path[:3]], [type(table), TableRow, TableCell])
+        self.assertIs(path[2], cell)
+        self.assertEqual(path[-1].text_run.content, 'c')
+
+    def test_outside(self):
+        end = self.doc.body[-1].end
+        self.assertEqual(self.index.path(end), [])
+        self.assertIsNone(self.index.at(end + 10))
+        self.assertIsNone(self.index.paragraph_element(-1))
+
+    def test_overlapping(self):
+        body = self.doc.body
+        self.assertEqual(self.index.overlapping(body[3].start, body[4].start), [body[3]])
+        self.assertEqual(self.index.overlapping(body[3].start, body[4].start + 1), [body[3], body[4]])
+        self.assertEqual(self.index.overlapping(body[-1].end, body[-1].end + 5), [])
+
+    def test_headings(self):
+        self.assertIs(self.index.heading('h.two'), self.doc.body[9])
+        self.assertIsNone(self.index.heading('h.none'))
+        self.assertEqual([(q.level, q.heading_id, q.text) for q in self.index.outline],
+                         [(1, 'h.one', 'Chapter one'), (1, 'h.two', 'Chapter two')])
+
+    def test_named_ranges(self):
+        body = self.doc.body
+        self.assertEqual(self.index.named_range('middle'), [Span(body[3].start, body[6].end)])
+        self.assertEqual(self.index.named_range_by_id('range.middle'), [Span(body[3].start, body[6].end)])
+        self.assertEqual(self.index.named_range_elements('middle'), body[3:7])
+        self.assertEqual(self.index.named_range('none'), [])
+
+    def test_iter_paragraphs(self):
+        texts = [q.content.content[0].text_run.content for q in iter_paragraphs(self.doc)]
+        self.assertEqual(texts[5:10], ['item two', 'a', 'b', 'c', 'd'])
+        self.assertEqual(len(texts), 17)
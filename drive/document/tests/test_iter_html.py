@@ -0,0 +1,46 @@
+from io import StringIO
+import unittest
+
+from .. import GoogleDoc, HTMLConverter
+from .docs import sample
+
+
+class CountingConverter(HTMLConverter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.rendered = 0
+
+    def process_structural_element(self, elem):
+        self.rendered += 1
+        return super().process_structural_element(elem)
+
+
+class IterHTMLTest(unittest.TestCase):
+    def setUp(self):
+        self.doc = GoogleDoc(sample().dumps())
+        self.html = HTMLConverter(self.doc).body_as_html()
+
+    def test_chunks(self):
+        for chunk_size in (0, 1, 100, 1 << 20):
+            with self.subTest(chunk_size=chunk_size):
+                chunks = list(HTMLConverter(self.doc).iter_html(chunk_size))
+                self.assertEqual(''.join(chunks), self.html)
+                self.assertTrue(all(len(q) >= chunk_size for q in chunks[:-1]))
+        self.assertEqual(len(list(HTMLConverter(self.doc).iter_html(1 << 20))), 1)
+
+    def test_write_html(self):
+        out = StringIO()
+        HTMLConverter(self.doc).write_html(out, chunk_size=10)
+        self.assertEqual(out.getvalue(), self.html)
+
+    def test_rendered_as_consumed(self):
+        converter = CountingConverter(self.doc)
+        chunks = converter.iter_html(chunk_size=1)
+        next(chunks)
+        self.assertLess(converter.rendered, 3)
+        list(chunks)
+        self.assertGreater(converter.rendered, 10)
+
+    def test_stream_doc(self):
+        doc = GoogleDoc.from_stream(sample().dumps().encode())
+        self.assertEqual(''.join(HTMLConverter(doc).iter_html(chunk_size=1)), self.html)
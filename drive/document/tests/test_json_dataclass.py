@@ -0,0 +1,174 @@
+import sys
+import unittest
+
+from .. import GoogleDoc, HTMLConverter
+from ..json_dataclass import Element, ElementMeta, Field, ListOfElement, BackReference, OneOfElement
+from .docs import sample
+
+
+class Point(Element):
+    x: int = 'x'
+    y: int = Field('y', alt_names=('coords.y',), default=0)
+    label = 'meta.label'
+    extra: dict = 'extra'
+
+
+class Shape(Element):
+    name: str = 'name'
+    points: ListOfElement(Point) = 'points'
+    children: ListOfElement(BackReference('Shape')) = 'children'
+
+    def _name(self, value):
+        return value.upper() if value is not None else None
+
+
+class Circle(Shape):
+    radius: float = 'radius'
+    name: str = 'title'  # redefined, wins over Shape.name
+
+
+class Strict(Element):
+    x: int = Field('x', alt_names=('a.x', 'b.x'), strict=True)
+
+
+class Holder(Element):
+    item: OneOfElement({'x': Point, 'name': Shape}) = 'item'
+
+
+def is_set(element, attr):
+    try:
+        getattr(type(element), attr).__get__(element)
+    except AttributeError:
+        return False
+    return True
+
+
+class Loose(Element):
+    __slots__ = ('__dict__',)
+    x: int = 'x'
+
+
+class SchemaTest(unittest.TestCase):
+    def test_registry(self):
+        self.assertIs(ElementMeta.registry['Point'], Point)
+        self.assertIs(BackReference('Shape').get_class(), Shape)
+
+    def test_plan(self):
+        self.assertEqual([q[0] for q in Point._plan], ['x', 'y', 'label', 'extra'])
+        attr, path, field, datatype, hook, nested = Point._lazy_plan['label']
+        self.assertEqual((path, field, datatype, nested), (('meta', 'label'), None, None, False))
+        self.assertIsInstance(Point._lazy_plan['y'][2], Field)
+        self.assertIsNotNone(Shape._lazy_plan['name'][4])
+        self.assertTrue(Shape._lazy_plan['points'][5])
+
+    def test_inherited_fields(self):
+        self.assertEqual(set(Circle._schema), {'name', 'points', 'children', 'radius'})
+        self.assertEqual(Circle._schema['name']['json_name'], 'title')
+        circle = Circle({'title': 'c', 'radius': 2, 'points': [{'x': 1}]})
+        self.assertEqual((circle.name, circle.radius, circle.points[0].x), ('C', 2.0, 1))
+
+    def test_parse(self):
+        shape = Shape({'name': 'outer', 'points': [{'x': 1, 'coords': {'y': 2}, 'meta': {'label': 'a'}}, {'x': '3'}],
+                       'children': [{'name': 'inner'}]})
+        self.assertEqual(shape.name, 'OUTER')
+        self.assertEqual([(q.x, q.y, q.label) for q in shape.points], [(1, 2, 'a'), (3, 0, None)])
+        self.assertIsInstance(shape.children[0], Shape)
+        child = shape.children[0]
+        self.assertEqual((child.name, child.points, child.children), ('INNER', None, None))
+
+    def test_values_of_the_right_type_are_not_copied(self):
+        extra = {'a': [1]}
+        self.assertIs(Point({'x': 1, 'extra': extra}).extra, extra)
+
+
+class SlotsTest(unittest.TestCase):
+    def test_no_dict(self):
+        self.assertEqual(Point.__slots__, ('x', 'y', 'label', 'extra'))
+        self.assertEqual(Circle.__slots__, ('radius',))
+        with self.assertRaises(AttributeError):
+            Point({'x': 1}).other = 1
+        self.assertFalse(hasattr(GoogleDoc(sample().dumps()).body[1].content, '__dict__'))
+
+    def test_opt_out(self):
+        loose = Loose({'x': 1})
+        loose.other = 2
+        self.assertEqual((loose.x, loose.other), (1, 2))
+
+    def test_keep_json(self):
+        data = {'name': 'a', 'points': [{'x': 1}], 'children': [{'name': 'b'}]}
+        shape = Shape(data)
+        self.assertIs(shape._json_data, data)
+        shape = Shape(data, keep_json=False)
+        self.assertIsNone(shape._json_data)
+        self.assertIsNone(shape.points[0]._json_data)
+        self.assertIsNone(shape.children[0]._json_data)
+        self.assertEqual((shape.name, shape.points[0].x, shape.children[0].name), ('A', 1, 'B'))
+
+    def test_doc_without_json(self):
+        json_data = sample().dumps()
+        doc = GoogleDoc(json_data, keep_json=False)
+        self.assertIsNone(doc.body[1].content.content[0]._json_data)
+        html = HTMLConverter(doc, fragments=None).body_as_html()
+        self.assertEqual(html, HTMLConverter(GoogleDoc(json_data), fragments=None).body_as_html())
+
+
+class LazyTest(unittest.TestCase):
+    def test_nested_parsed_on_access(self):
+        shape = Shape({'name': 'a', 'points': [{'x': 1}]}, lazy=True)
+        self.assertTrue(is_set(shape, 'name'))
+        self.assertFalse(is_set(shape, 'points'))
+        points = shape.points
+        self.assertEqual(points[0].x, 1)
+        self.assertTrue(is_set(shape, 'points'))
+        self.assertIs(shape.points, points)
+        self.assertIsNone(shape.children)
+
+    def test_options(self):
+        with self.assertRaises(ValueError):
+            Shape({}, lazy=True, keep_json=False)
+        with self.assertRaises(ValueError):
+            Shape({}, lazy=True, intern=True)
+
+    def test_unknown_attribute(self):
+        with self.assertRaises(AttributeError):
+            Shape({}, lazy=True).other
+
+    def test_lazy_doc(self):
+        json_data = sample().dumps()
+        doc = GoogleDoc(json_data, lazy=True)
+        self.assertFalse(is_set(doc, 'body'))
+        self.assertEqual(doc.title, 'Test doc')
+        self.assertFalse(is_set(doc, 'body'))
+        html = HTMLConverter(doc, fragments=None).body_as_html()
+        self.assertEqual(html, HTMLConverter(GoogleDoc(json_data), fragments=None).body_as_html())
+
+
+class FillTest(unittest.TestCase):
+    def test_alt_names(self):
+        self.assertEqual(Strict({'b': {'x': '2'}}).x, 2)
+        self.assertEqual(Strict({'a': {'x': 1}, 'b': {'x': 2}}).x, 1)
+        with self.assertRaises(AttributeError):
+            Strict({'a': {'y': 1}})
+
+    def test_one_of(self):
+        self.assertIsInstance(Holder({'item': {'x': 1}}).item, Point)
+        self.assertEqual(Holder({'item': {'name': 'a'}}).item.name, 'A')
+        self.assertIsNone(Holder({'item': {'other': 1}}).item)
+
+    def test_deep_nesting(self):
+        depth = sys.getrecursionlimit() * 2
+        data = {'name': 'leaf'}
+        for _ in range(depth):
+            data = {'children': [data]}
+        shape = Shape(data)
+        for _ in range(depth):
+            shape = shape.children[0]
+        self.assertEqual(shape.name, 'LEAF')
+
+    def test_same_as_lazy_parse(self):
+        # lazy parsing goes through _parse_field instead of the generated _fill
+        json_data = {'title': 'c', 'radius': '2.5', 'points': [{'x': 1, 'coords': {'y': 3}}], 'children': [{}]}
+        eager, lazy = Circle(json_data), Circle(json_data, lazy=True)
+        for attr in Circle._schema:
+            self.assertEqual(repr(getattr(eager, attr)), repr(getattr(lazy, attr)))
+        self.assertEqual((eager.points[0].y, lazy.points[0].y), (3, 3))
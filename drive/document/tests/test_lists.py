@@ -0,0 +1,25 @@
+import unittest
+
+from .. import GoogleDoc, HTMLConverter
+from .docs import DocBuilder
+
+
+class ListRenderTest(unittest.TestCase):
+    def render(self, builder):
+        return HTMLConverter(GoogleDoc(builder.dumps()), fragments=None).body_as_html()
+
+    def test_table_closes_lists(self):
+        builder = DocBuilder().list('kix.list1')
+        builder.paragraph('item', bullet=('kix.list1', 0))
+        builder.paragraph('nested', bullet=('kix.list1', 1))
+        builder.table([['a']])
+        html = self.render(builder)
+        self.assertIn('</li></ol></ol></div><div class="struct-element" style=""><table', html)
+        self.assertEqual(html.count('<ol'), html.count('</ol>'))
+
+    def test_paragraph_closes_lists(self):
+        builder = DocBuilder().list('kix.list1')
+        builder.paragraph('item', bullet=('kix.list1', 0))
+        builder.paragraph('after')
+        self.assertIn('</li></ol></div><div class="struct-element" style=""><div class=" paragraph"',
+                      self.render(builder))
@@ -0,0 +1,51 @@
+import pickle
+import unittest
+
+from .. import GoogleDoc, HTMLConverter
+from ..paragraph import Paragraph
+from ..json_dataclass import StaleSchema, pack
+from .docs import sample
+
+
+def html(doc):
+    return HTMLConverter(doc, fragments=None).body_as_html()
+
+
+class PackTest(unittest.TestCase):
+    def setUp(self):
+        self.doc = GoogleDoc(sample().dumps())
+
+    def test_roundtrip(self):
+        for options in ({}, {'keep_json': False}, {'intern': True}):
+            with self.subTest(**options):
+                doc = GoogleDoc(sample().dumps(), **options)
+                unpacked = GoogleDoc.unpack(doc.pack())
+                self.assertEqual(html(unpacked), html(doc))
+                self.assertEqual(unpacked.revision, doc.revision)
+                self.assertEqual([q.fingerprint for q in unpacked.body], [q.fingerprint for q in doc.body])
+
+    def test_lazy_doc_is_packed_whole(self):
+        doc = GoogleDoc(sample().dumps(), lazy=True)
+        self.assertEqual(html(GoogleDoc.unpack(doc.pack())), html(self.doc))
+
+    def test_pickles_still_load(self):
+        self.assertEqual(html(GoogleDoc.unpack(pickle.dumps(self.doc))), html(self.doc))
+
+    def test_damaged(self):
+        data = self.doc.pack()
+        with self.assertRaises(StaleSchema):
+            GoogleDoc.unpack(data[:len(data) // 2])
+
+    def test_changed_class(self):
+        data = self.doc.pack()
+        saved = Paragraph.__dict__['_signature']  # set by pack
+        Paragraph._signature = 'changed'
+        try:
+            with self.assertRaises(StaleSchema):
+                GoogleDoc.unpack(data)
+        finally:
+            Paragraph._signature = saved
+
+    def test_other_root(self):
+        with self.assertRaises(StaleSchema):
+            GoogleDoc.unpack(pack(self.doc.body[1]))
@@ -0,0 +1,54 @@
+import multiprocessing
+import unittest
+
+from .. import GoogleDoc, HTMLConverter
+from .docs import sample
+
+
+class UpperCaseConverter(HTMLConverter):
+    def process_text_run(self, elem, *args, **kwargs):
+        return super().process_text_run(elem, *args, **kwargs).upper()
+
+
+class ParallelRenderTest(unittest.TestCase):
+    def setUp(self):
+        self.doc = GoogleDoc(sample().dumps())
+        self.serial = HTMLConverter(self.doc, fragments=None).body_as_html()
+
+    def test_same_output(self):
+        for method in ('spawn', 'fork'):
+            if method not in multiprocessing.get_all_start_methods():
+                continue
+            with self.subTest(method=method):
+                context = multiprocessing.get_context(method)
+                with HTMLConverter(self.doc, fragments=None, max_workers=2, mp_context=context) as converter:
+                    self.assertEqual(converter.body_as_html(), self.serial)
+
+    def test_subclass_and_separator(self):
+        for method in ('spawn', 'fork'):
+            if method not in multiprocessing.get_all_start_methods():
+                continue
+            with self.subTest(method=method):
+                serial = UpperCaseConverter(self.doc, fragments=None)
+                serial.html_separator = '\n'
+                context = multiprocessing.get_context(method)
+                with UpperCaseConverter(self.doc, fragments=None, max_workers=2, mp_context=context) as converter:
+                    converter.html_separator = '\n'
+                    self.assertEqual(converter.body_as_html(), serial.body_as_html())
+                self.assertNotEqual(serial.body_as_html(), self.serial)
+
+    def test_pool_is_reused(self):
+        with HTMLConverter(self.doc, fragments=None, max_workers=2) as converter:
+            self.assertEqual(converter.body_as_html(), self.serial)
+            pool = converter._HTMLConverter__pool
+            self.assertEqual(converter.body_as_html(), self.serial)
+            self.assertIs(converter._HTMLConverter__pool, pool)
+            self.assertEqual(converter.body_as_html(heading='h.two'),
+                             HTMLConverter(self.doc, fragments=None).body_as_html(heading='h.two'))
+        self.assertIsNone(converter._HTMLConverter__pool)
+
+    def test_start_method_is_left_alone(self):
+        method = multiprocessing.get_start_method(allow_none=True)
+        with HTMLConverter(self.doc, fragments=None, max_workers=1) as converter:
+            converter.body_as_html()
+        self.assertEqual(multiprocessing.get_start_method(allow_none=True), method)
@@ -0,0 +1,43 @@
+import json
+import multiprocessing
+import unittest
+
+from .. import GoogleDoc
+from .docs import sample
+
+
+class ParseManyTest(unittest.TestCase):
+    def setUp(self):
+        self.payloads = [sample(f'Doc {i} ', revision=f'rev{i}').dumps() for i in range(6)]
+
+    def test_order(self):
+        payloads = [self.payloads[0], self.payloads[1].encode(), json.loads(self.payloads[2]), *self.payloads[3:]]
+        docs = list(GoogleDoc.parse_many(payloads, max_workers=2, max_pending=3))
+        self.assertEqual([q.revision for q in docs], [f'rev{i}' for i in range(6)])
+        for doc, payload in zip(docs, self.payloads):
+            self.assertEqual([q.fingerprint for q in doc.body], [q.fingerprint for q in GoogleDoc(payload).body])
+
+    def test_start_methods(self):
+        for method in ('spawn', 'fork'):
+            if method not in multiprocessing.get_all_start_methods():
+                continue
+            with self.subTest(method=method):
+                context = multiprocessing.get_context(method)
+                docs = GoogleDoc.parse_many(self.payloads[:2], max_workers=1, mp_context=context)
+                self.assertEqual([q.revision for q in docs], ['rev0', 'rev1'])
+
+    def test_packed(self):
+        data = list(GoogleDoc.parse_many(self.payloads[:2], max_workers=1, packed=True, keep_json=False))
+        self.assertIsInstance(data[0], bytes)
+        doc = GoogleDoc.unpack(data[1])
+        self.assertEqual(doc.revision, 'rev1')
+        self.assertIsNone(doc.body[1]._json_data)
+
+    def test_early_stop(self):
+        docs = GoogleDoc.parse_many(iter(self.payloads), max_workers=1, max_pending=1)
+        self.assertEqual(next(docs).revision, 'rev0')
+        docs.close()
+
+    def test_lazy(self):
+        with self.assertRaises(ValueError):
+            next(GoogleDoc.parse_many(self.payloads, lazy=True))
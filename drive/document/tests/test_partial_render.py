@@ -0,0 +1,55 @@
+import unittest
+
+from .. import GoogleDoc, HTMLConverter
+from ..render_cache import RenderCache
+from .docs import sample
+
+
+class PartialRenderTest(unittest.TestCase):
+    def setUp(self):
+        self.doc = GoogleDoc(sample().dumps())
+        self.converter = HTMLConverter(self.doc)
+
+    def assertRendered(self, html, present, absent):
+        for text in present:
+            self.assertIn(text, html)
+        for text in absent:
+            self.assertNotIn(text, html)
+
+    def test_heading(self):
+        html = self.converter.body_as_html(heading='h.one')
+        self.assertRendered(html, ['Chapter one', 'item two', '>d<'], ['First paragraph', 'Chapter two'])
+        self.assertEqual(html.count('<ol'), self.converter.body_as_html().count('<ol'))
+        self.assertEqual(html.count('<ol'), html.count('</ol>'))
+        html = self.converter.body_as_html(heading='h.two')
+        self.assertRendered(html, ['Chapter two', 'Paragraph 4'], ['Chapter one'])
+
+    def test_sections(self):
+        first = self.converter.body_as_html(sections=0)
+        self.assertRendered(first, ['First paragraph', '>d<'], ['Chapter two'])
+        self.assertEqual(self.converter.body_as_html(sections=-1), self.converter.body_as_html(sections=1))
+        both = self.converter.body_as_html(sections=range(2))
+        self.assertEqual(both, self.converter.body_as_html())
+        self.assertEqual(self.converter.body_as_html(sections=5), '<div class="container"></div>')
+
+    def test_named_range(self):
+        html = self.converter.body_as_html(named_range='middle')
+        self.assertRendered(html, ['Under chapter one', 'item one.one', 'item two'], ['Chapter one<', '>a<'])
+        self.assertEqual(html.count('<ol'), html.count('</ol>'))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            self.converter.body_as_html(heading='h.none')
+        with self.assertRaises(ValueError):
+            self.converter.body_as_html(named_range='none')
+        with self.assertRaises(ValueError):
+            self.converter.body_as_html(heading='h.one', sections=0)
+
+    def test_cached_page_kept(self):
+        cache = RenderCache()
+        converter = HTMLConverter(self.doc, cache=cache)
+        whole = converter.body_as_html()
+        converter.body_as_html(heading='h.two')
+        self.assertEqual(cache.page[1], whole)
+        self.assertEqual(converter.body_as_html(), whole)
+        self.assertEqual(cache.rendered, 0)
@@ -0,0 +1,99 @@
+import marshal
+import unittest
+from hashlib import blake2b
+
+from .. import GoogleDoc, HTMLConverter, RenderCache, StructuralElement
+from .docs import sample
+
+
+def is_set(element, attr):
+    try:
+        getattr(type(element), attr).__get__(element)
+    except AttributeError:
+        return False
+    return True
+
+
+def without(data, keys):
+    if isinstance(data, dict):
+        return {k: without(v, keys) for k, v in data.items() if k not in keys}
+    if isinstance(data, list):
+        return [without(q, keys) for q in data]
+    return data
+
+
+def render(doc, cache):
+    return HTMLConverter(doc, cache=cache, fragments=None).body_as_html()
+
+
+class IncrementalRenderTest(unittest.TestCase):
+    def setUp(self):
+        self.cache = RenderCache()
+        self.first = render(GoogleDoc(sample().dumps()), self.cache)
+
+    def test_same_revision_is_not_rendered(self):
+        self.assertEqual(render(GoogleDoc(sample().dumps()), self.cache), self.first)
+        self.assertEqual(self.cache.rendered, 0)
+
+    def test_insert_renders_only_the_edited_element(self):
+        # every later element moves by the inserted length
+        doc = GoogleDoc(sample('First paragraph, now longer ', revision='rev2').dumps())
+        html = render(doc, self.cache)
+        self.assertEqual(self.cache.rendered, 1)
+        self.assertEqual(html, HTMLConverter(doc, fragments=None).body_as_html())
+        self.assertNotEqual(html, self.first)
+
+    def test_fingerprint_ignores_offsets(self):
+        before = GoogleDoc(sample().dumps())
+        after = GoogleDoc(sample('Longer first paragraph ', revision='rev2').dumps())
+        self.assertNotEqual(before.body[1].fingerprint, after.body[1].fingerprint)
+        self.assertNotEqual(before.body[2].start, after.body[2].start)
+        self.assertEqual([q.fingerprint for q in before.body[2:]], [q.fingerprint for q in after.body[2:]])
+
+    def test_changed_options_render_everything(self):
+        doc = GoogleDoc(sample(revision='rev2').dumps())
+        HTMLConverter(doc, cache=self.cache, fragments=None, ignore_black_white=True).body_as_html()
+        self.assertEqual(self.cache.rendered, len(doc.body) - 2)  # section breaks aren't rendered
+
+
+class FingerprintTest(unittest.TestCase):
+    def setUp(self):
+        self.json = sample().dumps()
+        self.doc = GoogleDoc(self.json)
+        self.table = self.doc.body[7].content
+        self.nested = self.table.content[0].content[0].content[0]  # StructuralElement in the first cell
+
+    def test_computed_on_access(self):
+        self.assertFalse(is_set(self.doc.body[1], 'fingerprint'))
+        fingerprint = self.doc.body[1].fingerprint
+        self.assertTrue(is_set(self.doc.body[1], 'fingerprint'))
+        self.assertIs(self.doc.body[1].fingerprint, fingerprint)
+
+    def test_nested_elements_not_hashed_by_renders(self):
+        render(self.doc, RenderCache())
+        self.assertTrue(is_set(self.doc.body[7], 'fingerprint'))
+        self.assertFalse(is_set(self.nested, 'fingerprint'))
+
+    def test_digest_of_json_without_offsets(self):
+        data = self.doc.body[7]._json_data
+        expected = blake2b(marshal.dumps(without(data, {'startIndex', 'endIndex'}), 0), digest_size=16).hexdigest()
+        self.assertEqual(self.doc.body[7].fingerprint, expected)
+
+    def test_without_json(self):
+        doc = GoogleDoc(self.json, keep_json=False)
+        self.assertEqual([q.fingerprint for q in doc.body], [q.fingerprint for q in self.doc.body])
+        self.assertEqual(doc.styles_fingerprint, self.doc.styles_fingerprint)
+        nested = doc.body[7].content.content[0].content[0].content[0]
+        with self.assertRaises(AttributeError):
+            nested.fingerprint
+        element = StructuralElement(self.doc.body[1]._json_data, keep_json=False)
+        self.assertEqual(element.fingerprint, self.doc.body[1].fingerprint)
+
+    def test_pack_leaves_them_deferred(self):
+        unpacked = GoogleDoc.unpack(self.doc.pack())
+        self.assertFalse(is_set(unpacked.body[1], 'fingerprint'))
+        self.assertFalse(is_set(self.nested, 'fingerprint'))
+        self.assertEqual([q.fingerprint for q in unpacked.body], [q.fingerprint for q in self.doc.body])
+        doc = GoogleDoc(self.json, keep_json=False)
+        unpacked = GoogleDoc.unpack(doc.pack())
+        self.assertEqual([q.fingerprint for q in unpacked.body], [q.fingerprint for q in self.doc.body])
@@ -0,0 +1,46 @@
+import unittest
+
+from .. import GoogleDoc
+from ..style import RenderOptions, render_options
+from .docs import sample
+
+
+class RenderContextTest(unittest.TestCase):
+    def setUp(self):
+        builder = sample().list('kix.list2', kind='ul')
+        builder.paragraph('bullet', bullet=('kix.list2', 0))
+        self.doc = GoogleDoc(builder.dumps())
+        self.context = self.doc.render_context
+
+    def test_built_once(self):
+        self.assertIs(self.doc.render_context, self.context)
+
+    def test_lists(self):
+        self.assertEqual(self.context.lists['kix.list1', 1], ('list-style-type: decimal', 'ol'))
+        self.assertEqual(self.context.lists['kix.list2', 0], ('list-style-type: disc', 'ul'))
+
+    def test_objects(self):
+        image = self.context.inline_objects['kix.img1']
+        self.assertFalse(image.horizontal_line)
+        self.assertEqual(image.alt, 'picture : kix.img1')
+        self.assertEqual(image.properties.content, 'https://example.com/kix.img1.png')
+        self.assertEqual(self.context.positioned_objects, {})
+
+    def test_sections(self):
+        body = self.doc.body
+        self.assertEqual([len(q[1]) for q in self.context.sections], [0, 7, 8])
+        self.assertIs(self.context.sections[2][1][0], body[9])
+        self.assertEqual(self.context.order[self.context.positions[id(body[9])]], (2, 0))
+        # a section break gets the number of the element after it
+        self.assertEqual(self.context.positions[id(body[8])], self.context.positions[id(body[9])])
+
+    def test_named_style_css(self):
+        table = self.context.named_style_css()
+        self.assertEqual(table['HEADING_1'][1], {'font-weight': 'bold'})
+        self.assertIs(self.context.named_style_css(), table)
+        token = render_options.set(RenderOptions(ignore_black_white=True))
+        try:
+            self.assertIsNot(self.context.named_style_css(), table)  # css of colors differs
+        finally:
+            render_options.reset(token)
+        self.assertIs(self.context.named_style_css(), table)
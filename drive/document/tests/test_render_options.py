@@ -0,0 +1,46 @@
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+
+from .. import GoogleDoc, HTMLConverter, RenderOptions
+from ..style import Color, render_options
+from .docs import DocBuilder
+
+BLACK = {'foregroundColor': {'color': {'rgbColor': {}}}}
+
+
+class RenderOptionsTest(unittest.TestCase):
+    def setUp(self):
+        builder = DocBuilder()
+        for i in range(20):
+            builder.paragraph(('black text ', BLACK), f'paragraph {i}')
+        self.doc = GoogleDoc(builder.dumps())
+
+    def test_color(self):
+        black = Color({'color': {'rgbColor': {}}})
+        self.assertEqual(black.as_css(), '#000000')
+        token = render_options.set(RenderOptions(ignore_black_white=True))
+        try:
+            self.assertIsNone(black.as_css())
+            self.assertEqual(black.as_css(ignore_ignoration=True), '#000000')
+        finally:
+            render_options.reset(token)
+        self.assertEqual(black.as_css(), '#000000')
+
+    def test_options_stay_with_their_render(self):
+        kept = HTMLConverter(self.doc).body_as_html()
+        ignored = HTMLConverter(self.doc, ignore_black_white=True).body_as_html()
+        self.assertIn('#000000', kept)
+        self.assertNotIn('#000000', ignored)
+        self.assertEqual(render_options.get(), RenderOptions())
+
+    def test_concurrent_renders(self):
+        expected = {q: HTMLConverter(self.doc, ignore_black_white=q).body_as_html() for q in (False, True)}
+
+        def render(ignore):
+            # chunk by chunk, so renders with both options interleave
+            return ''.join(HTMLConverter(self.doc, ignore_black_white=ignore).iter_html(chunk_size=1))
+
+        with ThreadPoolExecutor(4) as pool:
+            options = [n % 2 == 0 for n in range(40)]
+            for ignore, html in zip(options, pool.map(render, options)):
+                self.assertEqual(html, expected[ignore])
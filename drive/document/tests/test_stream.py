@@ -0,0 +1,84 @@
+from io import BytesIO, StringIO
+import gc
+import json
+import unittest
+import warnings
+
+from .. import GoogleDoc, HTMLConverter
+from ..json_dataclass import JsonStream
+from .docs import sample
+
+
+class Unseekable(BytesIO):
+    def seekable(self):
+        return False
+
+
+class JsonStreamTest(unittest.TestCase):
+    data = {'a': 1, 'body': {'content': [{'x': 'é, "]'}, [1, {'y': None}], 3]}, 'z': {'k': [True, False]}}
+
+    def sources(self):
+        raw = json.dumps(self.data, ensure_ascii=False)
+        yield 'str', raw
+        yield 'bytes', raw.encode()
+        yield 'text file', StringIO(raw)
+        yield 'file', BytesIO(raw.encode())
+        yield 'unseekable', Unseekable(raw.encode())
+
+    def test_mapping(self):
+        for chunk_size in (1, 7, 1 << 16):
+            for name, source in self.sources():
+                with self.subTest(name, chunk_size=chunk_size), \
+                        JsonStream(source, large={'body': 2}, chunk_size=chunk_size) as stream:
+                    self.assertEqual(stream['z'], self.data['z'])
+                    self.assertEqual(list(stream), ['a', 'body', 'z'])
+                    self.assertEqual(stream['body'], self.data['body'])
+                    self.assertNotIn('other', stream)
+                    self.assertEqual(list(stream.iter_items('body.content')), self.data['body']['content'])
+
+    def test_missing_path(self):
+        with JsonStream(json.dumps(self.data)) as stream:
+            self.assertEqual(list(stream.iter_items('body.other')), [])
+            self.assertEqual(list(stream.iter_items('a.content')), [])
+            self.assertEqual(list(stream.iter_items('z.k')), [True, False])
+
+    def test_close(self):
+        source = Unseekable(json.dumps(self.data).encode())
+        with JsonStream(source) as stream:
+            self.assertEqual(stream['a'], 1)
+            spool = stream._source.file
+        self.assertTrue(spool.closed)
+        self.assertFalse(source.closed)
+        self.assertEqual(stream['a'], 1)
+
+
+class IterBodyTest(unittest.TestCase):
+    def setUp(self):
+        self.json = sample().dumps()
+        self.doc = GoogleDoc(self.json)
+
+    def test_iter_body(self):
+        for source in (self.json, self.json.encode(), BytesIO(self.json.encode()), self.doc):
+            with self.subTest(type(source).__name__):
+                body = list(GoogleDoc.iter_body(source))
+                self.assertEqual([q.fingerprint for q in body], [q.fingerprint for q in self.doc.body])
+
+    def test_iter_body_closes_its_spool(self):
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always', ResourceWarning)
+            self.assertEqual(len(list(GoogleDoc.iter_body(Unseekable(self.json.encode())))), len(self.doc.body))
+            body = GoogleDoc.iter_body(StringIO(self.json))
+            next(body)
+            body.close()
+            gc.collect()
+        self.assertEqual([q for q in caught if issubclass(q.category, ResourceWarning)], [])
+
+    def test_from_stream(self):
+        with GoogleDoc.from_stream(Unseekable(self.json.encode()), chunk_size=16) as doc:
+            self.assertEqual((doc.title, doc.revision), ('Test doc', 'rev1'))
+            self.assertEqual(set(doc.lists), {'kix.list1'})
+            self.assertEqual(len(list(GoogleDoc.iter_body(doc))), len(self.doc.body))
+            html = HTMLConverter(doc, fragments=None).body_as_html()
+            self.assertEqual(html, HTMLConverter(self.doc, fragments=None).body_as_html())
+        self.assertTrue(doc._json_data._source.file.closed)
+        self.assertEqual(doc.title, 'Test doc')
@@ -0,0 +1,86 @@
+import gc
+import pickle
+import unittest
+
+from .. import GoogleDoc, HTMLConverter
+from ..json_dataclass import Element, Interner, memoized
+from ..paragraph import Paragraph
+from ..style import Dimension, Font, TextStyle, RenderOptions, render_options
+from .docs import sample
+
+
+def run_styles(doc):
+    return [q.text_run.style for elem in doc.body if isinstance(elem.content, Paragraph)
+            for q in elem.content.content if q.text_run is not None]
+
+
+class Counted(Element):
+    value: int = 'value'
+    _calls = []
+
+    @memoized()
+    def doubled(self, extra=0):
+        self._calls.append(extra)
+        return {'value': self.value * 2 + extra}
+
+
+class InternTest(unittest.TestCase):
+    def test_equal_styles_shared(self):
+        styles = run_styles(GoogleDoc(sample().dumps(), intern=True))
+        self.assertEqual(len({id(q) for q in styles if q._json_data == {}}), 1)
+        styles = run_styles(GoogleDoc(sample().dumps()))
+        self.assertGreater(len({id(q) for q in styles}), 1)
+
+    def test_same_html(self):
+        json_data = sample().dumps()
+        for intern in (True, Interner.process):
+            with self.subTest(intern=intern):
+                html = HTMLConverter(GoogleDoc(json_data, intern=intern), fragments=None).body_as_html()
+                self.assertEqual(html, HTMLConverter(GoogleDoc(json_data), fragments=None).body_as_html())
+
+    def test_immutable(self):
+        style = TextStyle({'bold': True})
+        with self.assertRaises(AttributeError):
+            style.bold = False
+        with self.assertRaises(AttributeError):
+            del style.bold
+
+    def test_process_table_is_weak(self):
+        data = {'magnitude': 12345, 'unit': 'PT'}
+        dimension = Interner.process.get(Dimension, data)
+        self.assertIs(Interner.process.get(Dimension, dict(reversed(data.items()))), dimension)
+        size = len(Interner.process.table)
+        del dimension
+        gc.collect()
+        self.assertEqual(len(Interner.process.table), size - 1)
+
+
+class MemoizedTest(unittest.TestCase):
+    def test_computed_once_per_arguments(self):
+        counted = Counted({'value': 2})
+        self.assertEqual(counted.doubled(), {'value': 4})
+        self.assertEqual(counted.doubled(), {'value': 4})
+        self.assertEqual(counted.doubled(extra=1), {'value': 5})
+        self.assertEqual(Counted._calls, [0, 1])
+
+    def test_dicts_are_copies(self):
+        font = Font({'fontFamily': 'Arial', 'weight': 400})
+        font.as_css_dict()['font-family'] = 'changed'
+        self.assertEqual(font.as_css_dict()['font-family'], 'Arial')
+
+    def test_depends_on_render_options(self):
+        style = TextStyle({'foregroundColor': {'color': {'rgbColor': {}}}})
+        self.assertEqual(style.as_css_dict(), {'color': '#000000'})
+        token = render_options.set(RenderOptions(ignore_black_white=True))
+        try:
+            self.assertEqual(style.as_css_dict(), {})
+        finally:
+            render_options.reset(token)
+        self.assertEqual(style.as_css_dict(), {'color': '#000000'})
+
+    def test_memo_not_pickled(self):
+        dimension = Dimension({'magnitude': 3, 'unit': 'PT'})
+        css = dimension.as_css()
+        copy = pickle.loads(pickle.dumps(dimension))
+        self.assertFalse(hasattr(copy, '_memo'))
+        self.assertEqual(copy.as_css(), css)
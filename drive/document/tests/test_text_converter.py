@@ -0,0 +1,45 @@
+import unittest
+
+from .. import GoogleDoc, TextConverter, MarkdownConverter
+from .docs import sample
+
+
+def materialized(doc, name):
+    try:
+        getattr(GoogleDoc, name).__get__(doc)
+    except AttributeError:
+        return False
+    return True
+
+
+class TextConverterTest(unittest.TestCase):
+    def setUp(self):
+        self.doc = GoogleDoc(sample().dumps())
+
+    def test_text(self):
+        text = TextConverter(self.doc).body_as_text()
+        self.assertIn('First paragraph bold text  tail\n', text)
+        self.assertIn('1. item one\n  1. item one.one\n2. item two\n', text)
+        self.assertIn('a\tb\nc\td\n', text)
+
+    def test_markdown(self):
+        markdown = MarkdownConverter(self.doc).body_as_text()
+        self.assertIn('# Chapter one', markdown)
+        self.assertIn('**bold text**', markdown)
+        self.assertIn('[linked](https://example.com/)', markdown)
+        self.assertIn('1. item one\n', markdown)
+        self.assertIn('](https://example.com/kix.img1.png)', markdown)
+
+    def test_chunks(self):
+        for converter in (TextConverter, MarkdownConverter):
+            with self.subTest(converter.__name__):
+                whole = converter(self.doc).body_as_text()
+                self.assertEqual(''.join(converter(self.doc).iter_text(chunk_size=1)), whole)
+
+    def test_stream_body_not_materialized(self):
+        for converter in (TextConverter, MarkdownConverter):
+            with self.subTest(converter.__name__):
+                doc = GoogleDoc.from_stream(sample().dumps().encode())
+                text = converter(doc).body_as_text()
+                self.assertEqual(text, converter(self.doc).body_as_text())
+                self.assertFalse(materialized(doc, 'body'))
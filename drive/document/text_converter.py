@@ -0,0 +1,201 @@
+import re
+
+from .paragraph import Paragraph
+from .tables import Table
+from .table_of_contents import TableOfContents
+from .index import _heading_level
+from .render_context import glyph_equivalence, _resolve
+
+_markdown_special = re.compile(r'([\\`*_\[\]<>|~])')
+_markdown_block_start = re.compile(r'^([#>+=-]|\d+\.)')
+
+
+def _escape(text):
+    return _markdown_special.sub(r'\\\1', text)
+
+
+class TextConverter:
+    """
+    Plain text of a GoogleDoc body: a line per paragraph, list items indented and marked,
+    a line per table row with cells separated by tabs. Only text is walked, no styles are computed.
+    Elements are read one by one, a GoogleDoc.from_stream doc is rendered without parsing the whole body:
+    lists and objects are looked up on the doc, not through GoogleDoc.render_context which walks the body.
+    """
+    indent = '  '
+    block_separator = ''  # between blocks besides the newline every block ends with
+
+    def __init__(self, google_doc: "GoogleDoc", table_of_contents: bool = False):
+        """
+        :param table_of_contents: render the table of contents too, its text repeats the headings
+        """
+        self.doc = google_doc
+        self.table_of_contents = table_of_contents
+        self.__lists = None
+        self.__counters = {}
+
+    def body_as_text(self) -> str:
+        return ''.join(self.iter_text(chunk_size=0))
+
+    def write_text(self, fp, chunk_size=1 << 14):
+        """
+        Writes the body to a text file object as it's rendered.
+        """
+        for chunk in self.iter_text(chunk_size):
+            fp.write(chunk)
+
+    def iter_text(self, chunk_size=1 << 14):
+        """
+        Yields the body in chunks of at least chunk_size characters (0: a block at a time).
+        """
+        self.__counters = {}
+        chunk, size = [], 0
+        previous = None
+        for elem in self.doc.iter_body(self.doc):
+            data = self.process_structural_element(elem)
+            if data is None:
+                continue
+            item = isinstance(elem.content, Paragraph) and elem.content.bullet is not None
+            if previous is not None and not (item and previous):
+                data = self.block_separator + data
+            previous = item
+            chunk.append(data)
+            size += len(data)
+            if size >= chunk_size:
+                yield ''.join(chunk)
+                chunk, size = [], 0
+        if chunk:
+            yield ''.join(chunk)
+
+    def process_structural_element(self, elem) -> str:
+        """
+        :return: the block with its trailing newline, None for elements without text (section breaks)
+        """
+        content = elem.content
+        if isinstance(content, Paragraph):
+            return self.process_paragraph(content) + '\n'
+        if isinstance(content, Table):
+            return self.process_table(content)
+        if isinstance(content, TableOfContents):
+            if not self.table_of_contents:
+                return None
+            return ''.join(q for q in map(self.process_structural_element, content.content or ()) if q is not None)
+        return None
+
+    def list_item(self, bullet) -> tuple:
+        """
+        (nesting level, marker) of a list item: its number for ordered lists. Numbers go on through the whole doc
+        and restart below a higher level item, as Docs numbers them.
+        """
+        if self.__lists is None:
+            self.__lists = {}
+            for list_id, lst in (self.doc.lists or {}).items():
+                for level, nesting in enumerate(lst.nesting_levels or ()):
+                    ordered = glyph_equivalence.get(nesting.glyph, ('disc', 'ul'))[1] == 'ol'
+                    self.__lists[list_id, level] = (ordered, nesting.start_number or 1)
+        level = bullet.nesting_level or 0
+        ordered, start = self.__lists.get((bullet.list_id, level), (False, 1))
+        for key in [q for q in self.__counters if q[0] == bullet.list_id and q[1] > level]:
+            del self.__counters[key]
+        if not ordered:
+            return level, '-'
+        number = self.__counters[bullet.list_id, level] = self.__counters.get((bullet.list_id, level), start - 1) + 1
+        return level, f'{number}.'
+
+    def process_paragraph(self, elem: Paragraph) -> str:
+        text = self.paragraph_text(elem)
+        if elem.bullet is not None:
+            level, marker = self.list_item(elem.bullet)
+            return f'{self.indent * level}{marker} {text}'
+        return text
+
+    def paragraph_text(self, elem: Paragraph) -> str:
+        text = ''.join(self.process_paragraph_element(q) for q in elem.content or ())
+        return text.rstrip().replace('\x0b', '\n')  # vertical tab is a line break within the paragraph
+
+    def process_paragraph_element(self, elem) -> str:
+        if elem.text_run is not None:
+            return elem.text_run.content or ''
+        if elem.person is not None:
+            return elem.person.get('personProperties', {}).get('name') or ''
+        if elem.rich_link is not None:
+            return elem.rich_link.get('richLinkProperties', {}).get('title', '')
+        return ''
+
+    def cell_text(self, cell) -> str:
+        """
+        Text of a table cell on one line; nested tables are flattened.
+        """
+        out = []
+        for elem in cell.content or ():
+            content = elem.content
+            if isinstance(content, Paragraph):
+                text = self.paragraph_text(content)
+                if text:
+                    out.append(text.replace('\n', ' '))
+            elif isinstance(content, Table):
+                out.extend(self.cell_text(q) for row in content.content or () for q in row.content or ())
+        return ' '.join(q for q in out if q)
+
+    def process_table(self, elem: Table) -> str:
+        return ''.join('\t'.join(self.cell_text(q) for q in row.content or ()) + '\n' for row in elem.content or ())
+
+
+class MarkdownConverter(TextConverter):
+    """
+    Markdown of a GoogleDoc body, through the same methods as TextConverter: headings, bold, italic,
+    strikethrough and links of text runs, nested lists, tables as pipe tables with the first row as the header
+    and inline images.
+    """
+    indent = '    '
+    block_separator = '\n'
+
+    def process_paragraph(self, elem: Paragraph) -> str:
+        text = _markdown_block_start.sub(r'\\\1', self.paragraph_text(elem)).replace('\n', '  \n')
+        if elem.bullet is not None:
+            level, marker = self.list_item(elem.bullet)
+            return f'{self.indent * level}{marker} {text}'
+        level = None if elem.style is None else _heading_level(elem.style.named_style)
+        if level is not None and text:
+            return f'{"#" * min(level or 1, 6)} {text}'
+        return text
+
+    def process_paragraph_element(self, elem) -> str:
+        if elem.text_run is not None:
+            return self.process_text_run(elem.text_run)
+        if elem.inline_object_id is not None:
+            obj = (self.doc.inline_objects or {}).get(elem.inline_object_id)
+            obj = None if obj is None else _resolve(obj)
+            if obj is None or obj.horizontal_line or obj.properties is None:
+                return ''
+            src = obj.properties.local or obj.properties.source or obj.properties.content
+            return f'![{_escape(obj.alt)}]({src})'
+        return _escape(super().process_paragraph_element(elem))
+
+    def process_text_run(self, elem) -> str:
+        text = elem.content or ''
+        core = text.strip()
+        if not core:
+            return text
+        lead = text[:len(text) - len(text.lstrip())]
+        trail = text[len(text.rstrip()):]
+        core = _escape(core)
+        style = elem.style
+        if style is not None:
+            if style.bold:
+                core = f'**{core}**'
+            if style.italic:
+                core = f'*{core}*'
+            if style.strikethrough:
+                core = f'~~{core}~~'
+            if style.link is not None:
+                core = f'[{core}]({style.link.url or f"#{style.link.heading_id}"})'
+        return lead + core + trail
+
+    def process_table(self, elem: Table) -> str:
+        rows = [[self.cell_text(q) for q in row.content or ()] for row in elem.content or ()]
+        if not rows:
+            return None
+        columns = max(len(q) for q in rows)
+        rows = [q + [''] * (columns - len(q)) for q in rows]
+        rows.insert(1, ['---'] * columns)
+        return ''.join(f'| {" | ".join(q)} |\n' for q in rows)
@@ -38,6 +38,15 @@ class AbstractDrive(metaclass=ABCMeta):
         """
         pass
 
+    @abstractmethod
+    def file_metadata(self, fileid: str) -> dict:
+        """
+        Drive metadata telling whether a file changed, without downloading it.
+        :param fileid: string
+        :return: dict with md5Checksum (binary files only), modifiedTime, version and size
+        """
+        pass
+
     @abstractmethod
     def get_folder_files(self, folder: str = None) -> dict:
         """
@@ -90,10 +99,12 @@ class AbstractDrive(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def get_synced_file(self, domain: str, name: str = None, process_function: Callable = lambda data: data.decode(),
+    def get_synced_file(self, domain: str, name: str = None,
+                        process_function: Callable = lambda data: str(data, 'utf-8'),
                         fid: str = None, filename: str = None, sync_time: int = None, folder: str = None,
                         use_default_sync_time: bool = False, command_storage: "MessageDataClass" = None,
-                        copy_filename: bool = False) -> "SyncedFile":
+                        copy_filename: bool = False, background_sync: bool = False,
+                        raw_file: bool = False) -> "SyncedFile":
         """
         Generated a SyncedFile objects via parameters.
         :param command_storage: receiму function from toyinfra.
@@ -106,6 +117,8 @@ class AbstractDrive(metaclass=ABCMeta):
         :param folder: Folder name to search for the file
         :param use_default_sync_time: Replace sync_time with config.drive_config_sync_ttl
         :param copy_filename: If set to true, filename will be overridden by google drive file name.
+        :param background_sync: Sync expired data on a background thread, see SyncedFile.
+        :param raw_file: Keep downloaded bytes in filename, process_function gets a memoryview of them, see SyncedFile.
         :return: SyncedFile
         """
         pass
@@ -113,7 +126,20 @@ class AbstractDrive(metaclass=ABCMeta):
     @abstractmethod
     def get_google_doc(self, codename, doc_id, domain: str = None, get_synced: bool = True, sync_time: int = None,
                        filename: str = None, use_default_sync: bool = False, command_storage: "MessageDataClass" = None,
-                       cache_images: bool = True, image_folder='', uri_prepend=''):
+                       cache_images: bool = True, image_folder='', uri_prepend='', keep_json: bool = True,
+                       lazy: bool = False, intern=False, text_index: "TextIndex" = None, html_options: dict = None,
+                       background_sync: bool = False):
+        """
+        Get a GoogleDoc, synced or not.
+        :param keep_json: Keep raw Docs json on every parsed element. False makes cached docs much smaller.
+        :param lazy: Parse nested elements on first access only. Needs keep_json and get_synced=False:
+        synced docs are packed for the cache file, which parses them whole, so it raises ValueError with them.
+        :param intern: Share equal style elements: True per document, json_dataclass.Interner.process per process.
+        :param text_index: TextIndex to update with the doc on every sync where its revision changed.
+        :param html_options: HTMLConverter options to render the doc with at sync and store its HTML next to
+        the cache file, gzipped and with an ETag; serve it with HTMLArtifacts(filename).
+        :param background_sync: Once sync_time passes, keep serving the cached doc and sync it on a background thread.
+        """
         pass
 
     @abstractmethod
@@ -1,5 +1,7 @@
 from .drive_interface import AbstractDrive, AbstractDirectory
 from .google_drive import SyncedFile, GoogleDoc
+from .html_artifacts import HTMLArtifacts
+from .blob_cache import BlobCache
 from typing import Callable
 import requests
 from time import time
@@ -52,6 +54,9 @@ class DriveMock(AbstractDrive):
         self.cache = cache
         self.ignore_errors = ignore_errors
         self.local_folder = local_folder
+        self.blobs = None
+        if self.config.drive_blob_folder is not None:
+            self.blobs = BlobCache(self.config.drive_blob_folder, self.config.drive_blob_max_size)
 
         self.directories = {}
         if self.config.drive_folder_id is not None:
@@ -69,6 +74,16 @@ class DriveMock(AbstractDrive):
             res = f.read()
         return res
 
+    def file_metadata(self, fileid: str) -> dict:
+        """
+        Drive-like metadata of a local file: its mtime stands for modifiedTime and version.
+        :param fileid: string
+        :return: dict with md5Checksum, modifiedTime, version and size
+        """
+        stat = os.stat(fileid)
+        return {'id': fileid, 'md5Checksum': None, 'modifiedTime': str(stat.st_mtime_ns),
+                'version': str(stat.st_mtime_ns), 'size': str(stat.st_size)}
+
     def get_folder_files(self, folder: str = None) -> dict:
         """
         List folder files. Proxy for Directory.listdir.
@@ -136,10 +151,12 @@ class DriveMock(AbstractDrive):
         self.directories[name] = LocalDirectory(path_to_add, name, fid=fid, config=self.config,
                                                 sync_config_field=sync_config_field, cache=self.cache)
 
-    def get_synced_file(self, domain: str, name: str = None, process_function: Callable = lambda data: data.decode(),
+    def get_synced_file(self, domain: str, name: str = None,
+                        process_function: Callable = lambda data: str(data, 'utf-8'),
                         fid: str = None, filename: str = None, sync_time: int = None, folder: str = None,
                         use_default_sync_time: bool = False, command_storage: "MessageDataClass" = None,
-                        copy_filename: bool = False) -> "SyncedFile":
+                        copy_filename: bool = False, background_sync: bool = False,
+                        raw_file: bool = False) -> "SyncedFile":
         """
         Generated a SyncedFile objects via parameters.
         :param command_storage: receive function from toyinfra.
@@ -152,6 +169,8 @@ class DriveMock(AbstractDrive):
         :param folder: Folder name to search for the file
         :param use_default_sync_time: Replace sync_time with config.drive_config_sync_ttl
         :param copy_filename: If set to true, filename will be overridden by google drive file name.
+        :param background_sync: Sync expired data on a background thread, see SyncedFile.
+        :param raw_file: Keep downloaded bytes in filename, process_function gets a memoryview of them, see SyncedFile.
         :return: SyncedFile
         """
         if fid is None and name is None:
@@ -171,14 +190,24 @@ class DriveMock(AbstractDrive):
         req_func = lambda: self.file_by_id(fid)
         return SyncedFile(domain, name, req_func, process_function=process_function,
                           filename=filename, sync_time=sync_time, fid=fid, command_storage=command_storage,
-                          cache_only=False)
+                          cache_only=False, background_sync=background_sync,
+                          metadata_function=lambda: self.file_metadata(fid), blobs=self.blobs,
+                          raw_file=raw_file)
 
     def get_google_doc(self, codename, doc_id, domain: str = None, get_synced: bool = True, sync_time: int = None,
                        filename: str = None, use_default_sync: bool = False, command_storage: "MessageDataClass" = None,
-                       cache_images: bool = True, image_folder='', uri_prepend=''):
+                       cache_images: bool = True, image_folder='', uri_prepend='', keep_json: bool = True,
+                       lazy: bool = False, intern=False, text_index: "TextIndex" = None, html_options: dict = None,
+                       background_sync: bool = False):
+        if lazy and get_synced:
+            raise ValueError('Synced docs are packed into their cache file, which parses them whole; '
+                             'lazy only applies with get_synced=False')
 
         def process(data):
-            g = GoogleDoc(data)  # process is download, download is sync so cache images = set "local" prop, always.
+            # process is download, download is sync so cache images = set "local" prop, always.
+            g = GoogleDoc(data, keep_json=keep_json, lazy=lazy, intern=intern)
+            if text_index is not None:
+                text_index.update(doc_id, g)
             if cache_images:
                 for img in g.get_image_objects():
                     uri = img.content.content.properties.source or img.content.content.properties.content
@@ -192,12 +221,22 @@ class DriveMock(AbstractDrive):
                             rs.raw.decode_content = True
                             shutil.copyfileobj(rs.raw, f)
                         img.content.content.properties.local = f'{uri_prepend}{img_filename}'
+            if html_options is not None:
+                HTMLArtifacts.update(filename, g, html_options)
+
+            return g
 
+        def load(data):
+            g = GoogleDoc.unpack(data)
+            if text_index is not None:  # the index may not have it yet, skipped for the indexed revision
+                text_index.update(doc_id, g)
+            if html_options is not None:  # options may have changed since the sync, skipped if not
+                HTMLArtifacts.update(filename, g, html_options)
             return g
 
         if not get_synced:
             # expected json locally
-            return GoogleDoc(self.file_by_id(doc_id))
+            return GoogleDoc(self.file_by_id(doc_id), keep_json=keep_json, lazy=lazy, intern=intern)
         if use_default_sync:
             sync_time = self.config.default_sync_ttl
         if filename is None:
@@ -207,7 +246,9 @@ class DriveMock(AbstractDrive):
 
         return SyncedFile(domain, codename, req_func,
                           process_function=process, sync_time=sync_time, fid=doc_id,
-                          filename=filename, command_storage=command_storage, cache_only=False)
+                          filename=filename, command_storage=command_storage, cache_only=False,
+                          dump_function=GoogleDoc.pack, load_function=load, background_sync=background_sync,
+                          metadata_function=lambda: self.file_metadata(doc_id), blobs=self.blobs)
 
     def list_google_docs(self, folder=None):
         if not self.__refresh():
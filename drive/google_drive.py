@@ -11,7 +11,9 @@ from googleapiclient.http import MediaIoBaseDownload
 from time import time
 from .drive_interface import AbstractDrive, AbstractDirectory
 from .synced import SyncedFile
+from .blob_cache import BlobCache
 from .document import GoogleDoc
+from .html_artifacts import HTMLArtifacts
 
 """
 THIS DRIVE MODEL IS DEPRECATED.
@@ -114,6 +116,9 @@ class DriveConnect(AbstractDrive):
             self.__docs = None
         self.directories = {}
         self.command = command_queue
+        self.blobs = None  # raw bytes of synced files, shared with other drives using the folder
+        if self.config.drive_blob_folder is not None:
+            self.blobs = BlobCache(self.config.drive_blob_folder, self.config.drive_blob_max_size)
         if self.config.drive_folder_id is not None:  # constant root
             self.directories[None] = Directory(self.__drive, name='', fid=self.config.drive_folder_id,
                                                config=self.config, cache=self.cache, command=self.command)
@@ -148,6 +153,16 @@ class DriveConnect(AbstractDrive):
             status, done = downloader.next_chunk()
         return f.getvalue()
 
+    def file_metadata(self, fileid: str) -> dict:
+        """
+        Drive metadata telling whether a file changed, without downloading it.
+        :param fileid: string
+        :return: dict with md5Checksum (binary files only), modifiedTime, version and size
+        """
+        if not self.__refresh():
+            return None
+        return self.__drive.files().get(fileId=fileid, fields='id, md5Checksum, modifiedTime, version, size').execute()
+
     def get_folder_files(self, folder: str = None) -> dict:
         """
         List folder files. Proxy for Directory.listdir.
@@ -221,10 +236,12 @@ class DriveConnect(AbstractDrive):
         if sync_now:
             self.directories[name].listdir
 
-    def get_synced_file(self, domain: str, name: str = None, process_function: Callable = lambda data: data.decode(),
+    def get_synced_file(self, domain: str, name: str = None,
+                        process_function: Callable = lambda data: str(data, 'utf-8'),
                         fid: str = None, filename: str = None, sync_time: int = None, folder: str = None,
                         use_default_sync_time: bool = False, command_storage: "MessageDataClass" = None,
-                        copy_filename: bool = False) -> SyncedFile:
+                        copy_filename: bool = False, background_sync: bool = False,
+                        raw_file: bool = False) -> SyncedFile:
         """
         Generated a SyncedFile objects via parameters.
         :param fid: file id within drive
@@ -238,6 +255,8 @@ class DriveConnect(AbstractDrive):
         :param folder: Folder name to search for the file
         :param use_default_sync_time: Replace sync_time with config.drive_config_sync_ttl
         :param copy_filename: If set to true, filename will be overridden by google drive file name.
+        :param background_sync: Sync expired data on a background thread, see SyncedFile.
+        :param raw_file: Keep downloaded bytes in filename, process_function gets a memoryview of them, see SyncedFile.
         :return: SyncedFile
         """
         access_exists = self.__refresh()
@@ -257,19 +276,30 @@ class DriveConnect(AbstractDrive):
             filename = name
         if access_exists:
             req_func = lambda: self.file_by_id(fid)
+            meta_func = lambda: self.file_metadata(fid)
         else:
             req_func = lambda: b''
+            meta_func = None
         return SyncedFile(domain, name, req_func, process_function=process_function,
                           filename=filename, sync_time=sync_time, fid=fid, command_storage=command_storage,
-                          cache_only=not access_exists)
+                          cache_only=not access_exists, background_sync=background_sync,
+                          metadata_function=meta_func, blobs=self.blobs, raw_file=raw_file)
 
     def get_google_doc(self, codename, doc_id, domain: str = None, get_synced: bool = True, sync_time: int = None,
                        filename: str = None, use_default_sync: bool = False, command_storage: "MessageDataClass" = None,
-                       cache_images: bool = True, image_folder='', uri_prepend=''):
+                       cache_images: bool = True, image_folder='', uri_prepend='', keep_json: bool = True,
+                       lazy: bool = False, intern=False, text_index: "TextIndex" = None, html_options: dict = None,
+                       background_sync: bool = False):
+        if lazy and get_synced:
+            raise ValueError('Synced docs are packed into their cache file, which parses them whole; '
+                             'lazy only applies with get_synced=False')
         access_exists = self.__refresh()
 
         def process(data):
-            g = GoogleDoc(data)  # process is download, download is sync so cache images = set "local" prop, always.
+            # process is download, download is sync so cache images = set "local" prop, always.
+            g = GoogleDoc(data, keep_json=keep_json, lazy=lazy, intern=intern)
+            if text_index is not None:
+                text_index.update(doc_id, g)
             if cache_images:
                 for img in g.get_image_objects():
                     # using google proxy of files instead of their source of upload
@@ -284,22 +314,37 @@ class DriveConnect(AbstractDrive):
                             rs.raw.decode_content = True
                             shutil.copyfileobj(rs.raw, f)
                         img.content.content.properties.local = f'{uri_prepend}{img_filename}'
+            if html_options is not None:
+                HTMLArtifacts.update(filename, g, html_options)
+
+            return g
 
+        def load(data):
+            g = GoogleDoc.unpack(data)
+            if text_index is not None:  # the index may not have it yet, skipped for the indexed revision
+                text_index.update(doc_id, g)
+            if html_options is not None:  # options may have changed since the sync, skipped if not
+                HTMLArtifacts.update(filename, g, html_options)
             return g
 
         if not get_synced:
-            return GoogleDoc(self.__docs.documents().get(documentId=doc_id).execute())
+            return GoogleDoc(self.__docs.documents().get(documentId=doc_id).execute(),
+                             keep_json=keep_json, lazy=lazy, intern=intern)
         if use_default_sync:
             sync_time = self.config.default_sync_ttl
         if filename is None:
             filename = f'{doc_id}.gdoc'
         if access_exists:
             req_func = lambda: self.__docs.documents().get(documentId=doc_id).execute()
+            meta_func = lambda: self.file_metadata(doc_id)  # docs have no md5Checksum, version changes on edits
         else:
             req_func = lambda: '{}'
+            meta_func = None
         return SyncedFile(domain, codename, req_func,
                           process_function=process, sync_time=sync_time, fid=doc_id,
-                          filename=filename, command_storage=command_storage, cache_only=not access_exists)
+                          filename=filename, command_storage=command_storage, cache_only=not access_exists,
+                          dump_function=GoogleDoc.pack, load_function=load, background_sync=background_sync,
+                          metadata_function=meta_func)
 
     def list_google_docs(self, folder=None):
         if not self.__refresh():
@@ -0,0 +1,167 @@
+from hashlib import blake2b
+from pathlib import Path
+import gzip
+import json
+import os
+
+from .document import GoogleDoc, HTMLConverter
+from .synced import write_atomic
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip variants are written without it
+    brotli = None
+
+_suffixes = {None: '.html', 'gzip': '.html.gz', 'br': '.html.br'}
+
+
+def _accepted(accept_encoding: str) -> dict:
+    out = {}
+    for part in (accept_encoding or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding:
+            out[coding.lower()] = q
+    return out
+
+
+class HTMLArtifacts:
+    """
+    Body HTML of a GoogleDoc rendered once at sync and stored next to its cache file: <filename>.html,
+    .html.gz and .html.br (with brotli installed) and <filename>.html.json with an ETag derived from
+    the revision and the render options. Serving is a file read or a 304, nothing is rendered per request.
+    Each encoding is a different representation, served with its own strong ETag: "<etag>", "<etag>-gzip"...
+    Pass html_options to get_google_doc to have them written at every sync, then serve with HTMLArtifacts(filename).
+    """
+    encodings = ('br', 'gzip')  # preferred first
+
+    def __init__(self, filename: str):
+        """
+        :param filename: cache file of the doc, SyncedFile.filename
+        """
+        self.filename = filename
+        self.__meta = None
+        self.__mtime = None
+
+    @staticmethod
+    def etag_for(converter: HTMLConverter) -> str:
+        """
+        ETag of what the converter renders, None for docs without a revision: their ETag is a digest of the HTML.
+        """
+        if converter.doc.revision is None:
+            return None
+        context = (converter.doc.revision, converter.cache_context())
+        return blake2b(repr(context).encode(), digest_size=16).hexdigest()
+
+    @classmethod
+    def update(cls, filename: str, doc: GoogleDoc, options: dict = None, force: bool = False) -> bool:
+        """
+        Renders the doc and writes its artifacts, unless the ones on disk have the same ETag.
+        :param options: HTMLConverter options (css_classes, ignore_black_white...); only the body is stored,
+        so extract_styles='block' rather than 'external'
+        :return: True if the artifacts were written
+        """
+        converter = HTMLConverter(doc, fragments=None, **(options or {}))
+        etag = cls.etag_for(converter)
+        if not force and etag is not None and cls(filename).etag == etag:
+            return False
+        html = converter.body_as_html().encode()
+        if etag is None:
+            etag = blake2b(html, digest_size=16).hexdigest()
+        variants = {None: html, 'gzip': gzip.compress(html, 9, mtime=0)}
+        if brotli is not None:
+            variants['br'] = brotli.compress(html)
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        for encoding, data in variants.items():
+            write_atomic(f'{filename}{_suffixes[encoding]}', data)
+        meta = {'etag': etag, 'encodings': [q for q in variants if q is not None],
+                'sizes': {k or 'identity': len(v) for k, v in variants.items()}}
+        write_atomic(f'{filename}.html.json', json.dumps(meta).encode())  # last, it's what readers check
+        return True
+
+    @property
+    def meta(self) -> dict:
+        """
+        Contents of the .html.json file, reread when it changes; None if nothing was written yet.
+        """
+        try:
+            mtime = os.stat(f'{self.filename}.html.json').st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self.__mtime:
+            with open(f'{self.filename}.html.json', 'rb') as f:
+                self.__meta = json.loads(f.read())
+            self.__mtime = mtime
+        return self.__meta
+
+    @property
+    def etag(self) -> str:
+        """
+        ETag of the rendered HTML, unquoted and without the encoding suffix of variant_etag.
+        """
+        meta = self.meta
+        return None if meta is None else meta['etag']
+
+    def variant_etag(self, encoding: str = None) -> str:
+        """
+        Quoted ETag header value of one encoding (None: identity).
+        """
+        etag = self.etag
+        if etag is None:
+            return None
+        return f'"{etag}"' if encoding is None else f'"{etag}-{encoding}"'
+
+    def select(self, accept_encoding: str = None) -> tuple:
+        """
+        Best variant for an Accept-Encoding header: (path, content encoding or None), e.g. for sendfile.
+        """
+        meta = self.meta
+        if meta is None:
+            raise FileNotFoundError(f'No HTML was rendered for {self.filename}')
+        accepted = _accepted(accept_encoding)
+        for encoding in self.encodings:
+            if encoding in meta['encodings'] and accepted.get(encoding, accepted.get('*', 0)) > 0:
+                return f'{self.filename}{_suffixes[encoding]}', encoding
+        return f'{self.filename}{_suffixes[None]}', None
+
+    def read(self, accept_encoding: str = None) -> tuple:
+        """
+        :return: (body bytes, content encoding or None)
+        """
+        path, encoding = self.select(accept_encoding)
+        with open(path, 'rb') as f:
+            return f.read(), encoding
+
+    def not_modified(self, if_none_match: str, accept_encoding: str = None) -> bool:
+        """
+        Whether an If-None-Match header matches the ETag of the variant served for accept_encoding
+        (weak comparison, as for GET).
+        """
+        if self.etag is None or not if_none_match:
+            return False
+        etag = self.variant_etag(self.select(accept_encoding)[1])
+        tags = [q.strip() for q in if_none_match.split(',')]
+        return '*' in tags or any(q.removeprefix('W/') == etag for q in tags)
+
+    def response(self, accept_encoding: str = None, if_none_match: str = None) -> tuple:
+        """
+        (status, headers, body) for a GET of the doc's HTML: 304 without a body if the client has it.
+        """
+        path, encoding = self.select(accept_encoding)
+        headers = {'ETag': self.variant_etag(encoding), 'Vary': 'Accept-Encoding',
+                   'Content-Type': 'text/html; charset=utf-8'}
+        if self.not_modified(if_none_match, accept_encoding):
+            return 304, headers, b''
+        if encoding is not None:
+            headers['Content-Encoding'] = encoding
+        with open(path, 'rb') as f:
+            body = f.read()
+        headers['Content-Length'] = str(len(body))
+        return 200, headers, body
@@ -1,19 +1,74 @@
+from contextlib import contextmanager
 from time import time
+from threading import Lock, Thread
+import json
+import logging
+import mmap
+import os
 import pickle
+import shutil
+import tempfile
 from typing import Callable, Any
 from pathlib import Path
 
+logger = logging.getLogger(__name__)
+
+_version_fields = ('md5Checksum', 'modifiedTime', 'version')
+_umask = os.umask(0)
+os.umask(_umask)
+
+
+@contextmanager
+def _replacing(path):
+    # a temp file of our own next to path, moved over it when the block ends; removed if it fails
+    path = os.path.abspath(path)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f'{os.path.basename(path)}.', suffix='.tmp', dir=os.path.dirname(path))
+    os.close(fd)
+    try:
+        os.chmod(tmp, 0o666 & ~_umask)  # mkstemp's are private, written files are as open would create them
+        yield tmp
+        os.replace(tmp, path)  # other threads and processes read the old file or the new one
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+
+def write_atomic(path, data: bytes):
+    """
+    Writes the file as a whole: readers in any thread or process see either the old content or the new one.
+    """
+    with _replacing(path) as tmp:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+
+
+def _copy(source, path: str):
+    with _replacing(path) as tmp:
+        try:
+            os.remove(tmp)  # the name stays ours, mkstemp names are random and link doesn't overwrite
+            os.link(source, tmp)  # nothing copied on the same filesystem; files are only ever replaced, not changed
+        except OSError:
+            shutil.copyfile(source, tmp)
+
 
 class SyncedFile:
     """
     File synced with GDrive;
     todo: separate from drive as it's really a common thing.
     """
+    min_backoff = 10  # seconds before retrying a failed background sync, doubled on every failure in a row
+    max_backoff = 3600
 
     def __init__(self, domain: str, name: str, request_function: Callable,
-                 process_function: Callable = lambda data: data.decode(), filename: str = None,
+                 process_function: Callable = lambda data: str(data, 'utf-8'), filename: str = None,
                  sync_time: int = None, fid: str = None, command_storage: "MessageDataClass" = None,
-                 cache_only: bool = False):
+                 cache_only: bool = False, dump_function: Callable = pickle.dumps,
+                 load_function: Callable = pickle.loads, background_sync: bool = False,
+                 metadata_function: Callable = None, blobs: "BlobCache" = None, raw_file: bool = False):
         """
         File synced and cached in local storage from GDrive.
         :param domain: App of Toychest, string.
@@ -24,6 +79,18 @@ class SyncedFile:
         :param sync_time: TTL of sync. None means never refresh
         :param command_storage: MessageDataClass(Command) to get commands from
         :param fid: GDrive file ID.
+        :param dump_function: Function to serialize processed data for the local file
+        :param load_function: Function to read it back; raising ValueError marks the file stale, it's synced again
+        :param background_sync: Expired data (and sync commands) don't sync in place: data keeps returning
+        the current data while a background thread syncs and swaps the new data in. Failures are logged and retried
+        with backoff. Without a local file the first sync is still done in place.
+        :param metadata_function: Function to get Drive metadata of the file (md5Checksum, modifiedTime, version);
+        a sync where they haven't changed skips the download and processing. None to download every time.
+        :param blobs: BlobCache to keep downloaded bytes in and to read content with a known md5Checksum from.
+        :param raw_file: Store the downloaded bytes as they are in filename instead of dumping processed data.
+        process_function gets a read-only memoryview over an mmap of the file and runs again on load; returning
+        the view (or slices of it) keeps large files in the page cache instead of in every process's memory.
+        Serve the file with raw_path, e.g. through sendfile.
         """
         self.__command_storage = command_storage
         self.domain = domain
@@ -34,27 +101,132 @@ class SyncedFile:
         self.__cached = 0
         self.__request = request_function
         self.__process = process_function
+        self.__dump = dump_function
+        self.__load = load_function
+        self.__background = background_sync
+        self.__metadata = metadata_function
+        self.__blobs = blobs
+        self.__version = None  # _version_fields of the synced file, kept in <filename>.sync.json
+        self.__raw = raw_file
+        if raw_file and filename is None:
+            raise ValueError(f'File {name} needs a filename to keep raw bytes in.')
+        self.__lock = Lock()  # one sync at a time
+        self.__state = Lock()
+        self.__refreshing = False
+        self.__failures = 0
+        self.__retry_at = 0
         self.__data = None
         if self.filename is not None:
             try:
-                with open(self.filename, 'rb') as f:
-                    self.__data = pickle.loads(f.read())
+                if self.__raw:
+                    self.__cached = os.stat(self.filename).st_mtime
+                    self.__data = self.__process(self.__map())
+                else:
+                    with open(self.filename, 'rb') as f:
+                        self.__data = self.__load(f.read())
+                        self.__cached = os.fstat(f.fileno()).st_mtime  # as old as the sync that wrote it
             except FileNotFoundError as e:
                 if cache_only:
                     raise FileNotFoundError(f'File {filename} was requested with cache-only and not found.')
+            except ValueError as e:
+                if cache_only:
+                    raise ValueError(f'File {filename} was requested with cache-only and is stale: {e}')
+            if self.__data is not None:
+                try:
+                    with open(f'{self.filename}.sync.json', 'rb') as f:
+                        self.__version = json.loads(f.read())
+                except (FileNotFoundError, ValueError):
+                    pass  # synced without metadata, the next sync downloads
         if self.__data is None:
             self.sync()
 
-    def sync(self):
+    def sync(self, force: bool = False) -> bool:
         """
-        Downloads and reprocesses file data
-        :return:
+        Downloads and reprocesses file data, unless its metadata shows it hasn't changed since the last sync.
+        :param force: download without checking metadata
+        :return: True if the data was reprocessed
         """
-        self.__data = self.__process(self.__request())
-        Path(self.filename).parent.mkdir(parents=True, exist_ok=True)
-        if self.filename is not None:
-            with open(self.filename, 'wb') as f:
-                pickle.dump(self.__data, f)
+        with self.__lock:
+            meta = None
+            if self.__metadata is not None and not force:
+                meta = self.__metadata()
+            version = None if meta is None else {q: meta.get(q) for q in _version_fields}
+            if version is not None and any(version.values()) and version == self.__version \
+                    and self.__data is not None:
+                self.__cached = time()
+                return False
+            digest = None if meta is None else meta.get('md5Checksum')
+            copied = False
+            if self.__raw and self.__blobs is not None and self.__blobs.touch(digest):
+                try:
+                    _copy(self.__blobs.path(digest), self.filename)  # never read into memory
+                    copied = True
+                except FileNotFoundError:  # pruned since
+                    pass
+            if not copied:
+                raw = None if self.__blobs is None else self.__blobs.get(digest)
+                if raw is None:
+                    raw = self.__request()
+                    if self.__blobs is not None and isinstance(raw, bytes):
+                        self.__blobs.put(raw)
+                if self.__raw:
+                    write_atomic(self.filename, raw)
+            if self.__raw:
+                raw = self.__map()
+            data = self.__process(raw)
+            if self.filename is not None:
+                if not self.__raw:
+                    write_atomic(self.filename, self.__dump(data))
+                if version is not None:
+                    write_atomic(f'{self.filename}.sync.json', json.dumps(version).encode())
+                elif self.__version is not None:
+                    Path(f'{self.filename}.sync.json').unlink(missing_ok=True)
+            self.__data = data  # readers get the old data or the new, never a half-synced file
+            self.__version = version
+            self.__cached = time()
+            return True
+
+    def __map(self) -> memoryview:
+        with open(self.filename, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:  # can't be mapped
+                return memoryview(b'')
+            # stays valid after the file is replaced by the next sync, until nothing references it
+            return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @property
+    def raw_path(self) -> str:
+        """
+        Path of the file with the downloaded bytes for raw_file SyncedFiles (None otherwise), to serve with sendfile.
+        Every sync replaces the file, open it once per response.
+        """
+        return self.filename if self.__raw else None
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Syncs on a background thread, unless a background sync is running already.
+        :param force: download without checking metadata, see sync
+        :return: True if a sync was started
+        """
+        with self.__state:
+            if self.__refreshing:
+                return False
+            self.__refreshing = True
+        Thread(target=self.__refresh, args=(force,), name=f'sync {self.domain}/{self.name}', daemon=True).start()
+        return True
+
+    def __refresh(self, force: bool):
+        try:
+            self.sync(force=force)
+        except Exception:
+            self.__failures += 1
+            backoff = min(self.min_backoff * 2 ** (self.__failures - 1), self.max_backoff)
+            self.__retry_at = time() + backoff
+            logger.exception('Background sync of %s/%s failed, retrying in %ss', self.domain, self.name, backoff)
+        else:
+            self.__failures = 0
+            self.__retry_at = 0
+        finally:
+            self.__refreshing = False
 
     @property
     def data(self) -> Any:
@@ -63,10 +235,16 @@ class SyncedFile:
         :return: Any, depending on the process function.
         """
         if self.__sync_time is not None and self.__cached - time() < -self.__sync_time:
-            self.sync()
+            if not self.__background:
+                self.sync()
+            elif self.__retry_at <= time():
+                self.refresh()
         elif self.__command_storage is not None:
             if self.__command_storage.receive(self.domain, self.name):
-                # expecting this to be sync only.
-                self.sync()
+                # expecting this to be sync only; an explicit sync downloads even if metadata says unchanged
+                if self.__background:
+                    self.refresh(force=True)
+                else:
+                    self.sync(force=True)
 
         return self.__data
@@ -0,0 +1,39 @@
+from types import SimpleNamespace
+import os
+import tempfile
+import unittest
+
+from ..document.tests.docs import sample
+from ..drive_mock import DriveMock
+from ..text_index import TextIndex
+
+
+class DriveMockTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        config = SimpleNamespace(drive_folder_id=None, drive_blob_folder=None, default_sync_ttl=60)
+        self.drive = DriveMock(self.folder.name, config, {})
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_lazy_synced_doc(self):
+        with self.assertRaises(ValueError):
+            self.drive.get_google_doc('doc', 'doc.gdoc_local', lazy=True)
+
+    def test_cached_doc_is_indexed(self):
+        doc_id = os.path.join(self.folder.name, 'doc.json')
+        with open(doc_id, 'w') as f:
+            f.write(sample().dumps())
+        filename = os.path.join(self.folder.name, 'doc.gdoc_local')
+        self.drive.get_google_doc('doc', doc_id, filename=filename, cache_images=False)  # writes the cache file
+        index = TextIndex(os.path.join(self.folder.name, 'text.sqlite'))
+        try:
+            synced = self.drive.get_google_doc('doc', doc_id, filename=filename, cache_images=False,
+                                               text_index=index)  # loaded from the cache file, nothing downloaded
+            self.assertEqual(synced.data.revision, 'rev1')
+            self.assertEqual(index.revision(doc_id), 'rev1')
+            hit, = index.search('Under chapter ONE')
+            self.assertEqual((hit.doc_id, hit.heading_id), (doc_id, 'h.one'))
+        finally:
+            index.close()
@@ -0,0 +1,51 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from ..document import GoogleDoc, HTMLConverter
+from ..document.tests.docs import sample
+from ..html_artifacts import HTMLArtifacts
+
+
+class HTMLArtifactsTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'doc.gdoc')
+        self.doc = GoogleDoc(sample().dumps())
+        self.html = HTMLConverter(self.doc, fragments=None).body_as_html().encode()
+        self.assertTrue(HTMLArtifacts.update(self.filename, self.doc))
+        self.artifacts = HTMLArtifacts(self.filename)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_variants(self):
+        self.assertEqual(self.artifacts.read(), (self.html, None))
+        body, encoding = self.artifacts.read('gzip, deflate')
+        self.assertEqual(encoding, 'gzip')
+        self.assertEqual(gzip.decompress(body), self.html)
+        self.assertEqual(self.artifacts.read('gzip;q=0')[1], None)
+
+    def test_same_revision_not_rewritten(self):
+        self.assertFalse(HTMLArtifacts.update(self.filename, self.doc))
+        self.assertTrue(HTMLArtifacts.update(self.filename, GoogleDoc(sample(revision='rev2').dumps())))
+
+    def test_etag_per_encoding(self):
+        status, identity, body = self.artifacts.response()
+        self.assertEqual((status, body), (200, self.html))
+        status, gzipped, body = self.artifacts.response('gzip')
+        self.assertEqual(gzipped['Content-Encoding'], 'gzip')
+        self.assertEqual(gzipped['ETag'], f'"{self.artifacts.etag}-gzip"')
+        self.assertNotEqual(identity['ETag'], gzipped['ETag'])
+        self.assertEqual(identity['Vary'], 'Accept-Encoding')
+
+    def test_not_modified(self):
+        gzipped = self.artifacts.response('gzip')[1]['ETag']
+        status, headers, body = self.artifacts.response('gzip', if_none_match=gzipped)
+        self.assertEqual((status, body), (304, b''))
+        self.assertEqual(headers['ETag'], gzipped)
+        self.assertEqual(self.artifacts.response('gzip', if_none_match=f'W/{gzipped}')[0], 304)
+        # a cached gzip body doesn't stand for the identity one
+        self.assertEqual(self.artifacts.response(None, if_none_match=gzipped)[0], 200)
+        self.assertEqual(self.artifacts.response(None, if_none_match='"other", *')[0], 304)
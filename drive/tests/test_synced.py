@@ -0,0 +1,308 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Event
+from time import sleep, time
+import os
+import tempfile
+import unittest
+
+from ..blob_cache import BlobCache
+from ..synced import SyncedFile, logger, write_atomic
+
+
+class Commands:
+    """
+    command_storage with a sync command waiting for every name in pending.
+    """
+
+    def __init__(self):
+        self.pending = set()
+
+    def receive(self, domain, name):
+        if name in self.pending:
+            self.pending.remove(name)
+            return True
+        return False
+
+
+class Source:
+    """
+    Drive file: request and metadata functions counting their calls. Requests wait for gate while it's clear.
+    """
+
+    def __init__(self, content=b'one', version='1', checksum=False):
+        self.content = content
+        self.version = version
+        self.checksum = checksum
+        self.requests = 0
+        self.gate = Event()
+        self.gate.set()
+
+    def request(self):
+        self.gate.wait(5)
+        self.requests += 1
+        if isinstance(self.content, Exception):
+            raise self.content
+        return self.content
+
+    def metadata(self):
+        md5 = BlobCache.digest(self.content) if self.checksum else None
+        return {'md5Checksum': md5, 'modifiedTime': None, 'version': self.version}
+
+
+def wait_for(condition, timeout=5):
+    deadline = time() + timeout
+    while not condition():
+        if time() > deadline:
+            raise AssertionError('Timed out')
+        sleep(0.01)
+
+
+class SyncedFileTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'file')
+        self.source = Source()
+        self.commands = Commands()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def synced(self, **options) -> SyncedFile:
+        return SyncedFile('domain', 'file', self.source.request, filename=self.filename,
+                          metadata_function=self.source.metadata, command_storage=self.commands, **options)
+
+    def test_command_forces_sync(self):
+        synced = self.synced()
+        self.assertEqual(self.source.requests, 1)
+        self.source.content = b'changed'  # Drive edits that left the version as it was
+        self.assertEqual(synced.data, 'one')
+        self.commands.pending.add('file')
+        self.assertEqual(synced.data, 'changed')
+        self.assertEqual(self.source.requests, 2)
+
+    def test_command_forces_background_sync(self):
+        synced = self.synced(background_sync=True)
+        self.source.content = b'changed'
+        self.commands.pending.add('file')
+        synced.data
+        wait_for(lambda: synced.data == 'changed')
+
+    def test_unchanged_metadata_skips_download(self):
+        synced = self.synced()
+        self.assertFalse(synced.sync())
+        self.assertEqual(self.source.requests, 1)
+        self.source.content, self.source.version = b'changed', '2'
+        self.assertTrue(synced.sync())
+        self.assertEqual((synced.data, self.source.requests), ('changed', 2))
+        self.assertTrue(synced.sync(force=True))
+        self.assertEqual(self.source.requests, 3)
+
+    def test_version_kept_with_the_file(self):
+        self.synced()
+        synced = self.synced()
+        self.assertFalse(synced.sync())
+        self.assertEqual(self.source.requests, 1)
+
+    def test_without_metadata(self):
+        synced = SyncedFile('domain', 'file', self.source.request, filename=self.filename)
+        self.assertTrue(synced.sync())
+        self.assertEqual(self.source.requests, 2)
+
+    def test_blobs_shared(self):
+        blobs = BlobCache(os.path.join(self.folder.name, 'blobs'))
+        self.source.checksum = True
+        first = self.synced(blobs=blobs)
+        other = SyncedFile('domain', 'copy', self.source.request, filename=f'{self.filename}.copy',
+                           metadata_function=self.source.metadata, blobs=blobs)
+        self.assertEqual((first.data, other.data), ('one', 'one'))
+        self.assertEqual(self.source.requests, 1)
+        self.assertEqual(blobs.get(BlobCache.digest(b'one')), b'one')
+        self.assertIsNone(blobs.get('0' * 32))
+
+    def test_refresh_force(self):
+        synced = self.synced(background_sync=True)
+        self.source.content = b'changed'
+        self.assertTrue(synced.refresh(force=True))
+        wait_for(lambda: synced.data == 'changed')
+
+
+class BackgroundSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.source = Source()
+
+    def synced(self, **options) -> SyncedFile:
+        return SyncedFile('domain', 'file', self.source.request, sync_time=0, background_sync=True, **options)
+
+    def test_stale_data_while_syncing(self):
+        synced = self.synced()
+        self.source.content = b'changed'
+        self.source.gate.clear()
+        self.assertEqual(synced.data, 'one')  # expired, synced in the background
+        self.assertEqual(synced.data, 'one')
+        self.source.gate.set()
+        wait_for(lambda: synced.data == 'changed')
+
+    def test_one_sync_at_a_time(self):
+        synced = self.synced()
+        self.source.gate.clear()
+        self.assertTrue(synced.refresh())
+        self.assertFalse(synced.refresh())
+        self.source.gate.set()
+        wait_for(lambda: synced.refresh())
+
+    def test_backoff(self):
+        synced = self.synced()
+        synced.min_backoff = 0.2
+        self.source.content = ConnectionError('offline')
+        with self.assertLogs(logger, 'ERROR'):
+            synced.data
+            wait_for(lambda: self.source.requests == 2)
+            wait_for(lambda: not synced._SyncedFile__refreshing)
+        for _ in range(5):
+            self.assertEqual(synced.data, 'one')  # nothing retried until the backoff is over
+        self.assertEqual(self.source.requests, 2)
+        self.source.content = b'back'
+        sleep(0.25)
+        synced.data
+        wait_for(lambda: synced.data == 'back')
+        self.assertEqual(synced._SyncedFile__failures, 0)
+
+
+class RawFileTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, 'raw', 'file.bin')
+        self.source = Source(b'raw bytes', checksum=True)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def synced(self, filename=None, **options) -> SyncedFile:
+        return SyncedFile('domain', 'file', self.source.request, process_function=lambda view: view,
+                          filename=filename or self.filename, metadata_function=self.source.metadata,
+                          raw_file=True, **options)
+
+    def test_needs_filename(self):
+        with self.assertRaises(ValueError):
+            SyncedFile('domain', 'file', self.source.request, raw_file=True)
+
+    def test_mapped(self):
+        synced = self.synced()
+        self.assertIsInstance(synced.data, memoryview)
+        self.assertTrue(synced.data.readonly)
+        self.assertEqual(bytes(synced.data), b'raw bytes')
+        self.assertEqual(synced.raw_path, self.filename)
+        with open(synced.raw_path, 'rb') as f:
+            self.assertEqual(f.read(), b'raw bytes')
+
+    def test_loaded_from_disk(self):
+        self.synced()
+        synced = self.synced()
+        self.assertEqual(bytes(synced.data), b'raw bytes')
+        self.assertEqual(self.source.requests, 1)
+        self.assertFalse(synced.sync())
+
+    def test_old_view_survives_sync(self):
+        synced = self.synced()
+        view = synced.data
+        self.source.content, self.source.version = b'new bytes!', '2'
+        self.assertTrue(synced.sync())
+        self.assertEqual((bytes(view), bytes(synced.data)), (b'raw bytes', b'new bytes!'))
+
+    def test_empty(self):
+        self.source.content = b''
+        self.assertEqual(bytes(self.synced().data), b'')
+
+    def test_copied_from_blobs(self):
+        blobs = BlobCache(os.path.join(self.folder.name, 'blobs'))
+        self.synced(blobs=blobs)
+        other = self.synced(os.path.join(self.folder.name, 'other.bin'), blobs=blobs)
+        self.assertEqual(bytes(other.data), b'raw bytes')
+        self.assertEqual(self.source.requests, 1)
+
+    def test_not_raw(self):
+        synced = SyncedFile('domain', 'file', self.source.request, filename=self.filename)
+        self.assertIsNone(synced.raw_path)
+
+
+class BlobCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.blobs = BlobCache(self.folder.name)
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def put(self, data, used):
+        digest = self.blobs.put(data)
+        os.utime(self.blobs.path(digest), (used, used))
+        return digest
+
+    def test_prune_least_recently_used(self):
+        old, new, newer = self.put(b'a' * 10, 100), self.put(b'b' * 10, 200), self.put(b'c' * 10, 300)
+        self.assertEqual(self.blobs.prune(25), 1)
+        self.assertNotIn(old, self.blobs)
+        self.assertIn(new, self.blobs)
+        self.assertEqual(self.blobs.prune(30), 0)
+        self.assertEqual(self.blobs.prune(0), 2)
+        self.assertNotIn(newer, self.blobs)
+
+    def test_get_counts_as_use(self):
+        first, second = self.put(b'a' * 10, 100), self.put(b'b' * 10, 200)
+        self.assertEqual(self.blobs.get(first), b'a' * 10)
+        self.blobs.prune(10)
+        self.assertEqual((first in self.blobs, second in self.blobs), (True, False))
+
+    def test_put_prunes_past_max_size(self):
+        self.blobs.max_size = 20
+        first = self.put(b'a' * 10, 100)
+        self.put(b'b' * 10, 200)
+        third = self.blobs.put(b'c' * 10)
+        self.assertNotIn(first, self.blobs)
+        self.assertIn(third, self.blobs)
+
+    def test_pruned_blob_downloaded_again(self):
+        source = Source(b'raw bytes', checksum=True)
+        filename = os.path.join(self.folder.name, 'raw.bin')
+        SyncedFile('domain', 'file', source.request, process_function=bytes, filename=filename,
+                   metadata_function=source.metadata, raw_file=True, blobs=self.blobs).data
+        self.blobs.prune(0)
+        other = SyncedFile('domain', 'other', source.request, process_function=bytes, filename=filename + '2',
+                           metadata_function=source.metadata, raw_file=True, blobs=self.blobs)
+        self.assertEqual(other.data, b'raw bytes')
+        self.assertEqual(source.requests, 2)
+        with open(filename, 'rb') as f:
+            self.assertEqual(f.read(), b'raw bytes')
+
+
+class WriteAtomicTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.folder.cleanup()
+
+    def test_threads(self):
+        path = os.path.join(self.folder.name, 'sub', 'file.bin')
+        contents = [bytes([i]) * 100000 for i in range(8)]
+        with ThreadPoolExecutor(8) as pool:
+            list(pool.map(lambda data: write_atomic(path, data), contents * 4))
+        with open(path, 'rb') as f:
+            self.assertIn(f.read(), contents)
+        self.assertEqual(os.listdir(os.path.dirname(path)), ['file.bin'])
+
+    def test_failed_write_leaves_no_temp(self):
+        path = os.path.join(self.folder.name, 'file.bin')
+        write_atomic(path, b'old')
+        with self.assertRaises(TypeError):
+            write_atomic(path, 'not bytes')
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'old')
+        self.assertEqual(os.listdir(self.folder.name), ['file.bin'])
+
+    def test_blobs_from_threads(self):
+        blobs = BlobCache(self.folder.name)
+        with ThreadPoolExecutor(8) as pool:
+            digests = set(pool.map(blobs.put, [b'same'] * 32))
+        self.assertEqual(digests, {BlobCache.digest(b'same')})
+        self.assertEqual(blobs.get(BlobCache.digest(b'same')), b'same')
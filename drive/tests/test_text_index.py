@@ -0,0 +1,57 @@
+import os
+import tempfile
+import unittest
+
+from ..document import GoogleDoc
+from ..document.tests.docs import sample
+from ..text_index import TextIndex, tokenize
+
+
+class TextIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.index = TextIndex(os.path.join(self.folder.name, 'index', 'text.sqlite'))
+        self.doc = GoogleDoc(sample().dumps())
+        self.assertTrue(self.index.update('doc1', self.doc))
+
+    def tearDown(self):
+        self.index.close()
+        self.folder.cleanup()
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize('Hello, wörld 2'), [('hello', 0), ('wörld', 7), ('2', 13)])
+
+    def test_phrase(self):
+        hit, = self.index.search('Under chapter ONE')
+        self.assertEqual((hit.doc_id, hit.title, hit.heading_id, hit.heading), ('doc1', 'Test doc', 'h.one', 'Chapter one'))
+        self.assertEqual(hit.offset, self.doc.body[3].start)
+        self.assertEqual(self.index.search('chapter under'), [])
+        self.assertEqual(self.index.search(''), [])
+
+    def test_across_runs(self):
+        hit, = self.index.search('paragraph bold text')
+        self.assertEqual((hit.position, hit.heading_id), (1, None))
+
+    def test_table_cells(self):
+        self.assertEqual(len(self.index.search('c')), 1)
+
+    def test_prefix(self):
+        self.assertEqual(self.index.search('chapter tw'), [])
+        hits = self.index.search('chapter tw', prefix=True)
+        self.assertEqual({q.heading_id for q in hits}, {'h.two'})
+        self.assertEqual(len(self.index.search('styl', prefix=True)), 5)
+        self.assertEqual(len(self.index.search('styl', prefix=True, limit=2)), 2)
+
+    def test_reindex_on_new_revision(self):
+        self.assertFalse(self.index.update('doc1', self.doc))
+        self.assertTrue(self.index.update('doc1', GoogleDoc(sample('Replaced start ', revision='rev2').dumps())))
+        self.assertEqual(self.index.revision('doc1'), 'rev2')
+        self.assertEqual(self.index.search('first paragraph'), [])
+        self.assertEqual(len(self.index.search('replaced start')), 1)
+
+    def test_many_docs(self):
+        self.index.update('doc2', GoogleDoc(sample('Another first ').dumps()))
+        self.assertEqual([q.doc_id for q in self.index.search('chapter one')], ['doc1', 'doc1', 'doc2', 'doc2'])
+        self.index.remove('doc1')
+        self.assertNotIn('doc1', self.index)
+        self.assertEqual({q.doc_id for q in self.index.search('chapter')}, {'doc2'})
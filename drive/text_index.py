@@ -0,0 +1,161 @@
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from threading import RLock
+from typing import NamedTuple
+import re
+import sqlite3
+
+from .document import GoogleDoc
+from .document.index import iter_paragraphs
+
+_word = re.compile(r'\w+')
+
+
+class Hit(NamedTuple):
+    doc_id: str
+    title: str
+    position: int  # word number within the doc
+    offset: int  # startIndex of the first word
+    heading_id: str  # heading the hit is under, None before the first one
+    heading: str
+
+
+def tokenize(text: str):
+    """
+    Lowercased words of the text with their character offsets.
+    """
+    return [(m.group().lower(), m.start()) for m in _word.finditer(text)]
+
+
+class TextIndex:
+    """
+    On-disk inverted index over the text runs of many GoogleDocs, kept in sqlite.
+    Every (word, doc) row holds the word positions within the doc and their offsets,
+    headings are stored by position so each hit comes with the heading it's under.
+    Docs are reindexed only when their revision changes.
+    """
+
+    def __init__(self, filename: str):
+        """
+        :param filename: sqlite file for the index, created if missing
+        """
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        self.__lock = RLock()
+        self.__db = sqlite3.connect(filename, check_same_thread=False)
+        with self.__lock, self.__db:
+            self.__db.executescript('''
+                CREATE TABLE IF NOT EXISTS docs (doc_id TEXT PRIMARY KEY, revision TEXT, title TEXT);
+                CREATE TABLE IF NOT EXISTS words (
+                    word TEXT, doc_id TEXT, positions BLOB, offsets BLOB, PRIMARY KEY (word, doc_id)
+                ) WITHOUT ROWID;
+                CREATE INDEX IF NOT EXISTS words_doc ON words (doc_id);
+                CREATE TABLE IF NOT EXISTS headings (
+                    doc_id TEXT, position INTEGER, heading_id TEXT, text TEXT, PRIMARY KEY (doc_id, position)
+                ) WITHOUT ROWID;
+            ''')
+
+    def revision(self, doc_id: str):
+        with self.__lock:
+            row = self.__db.execute('SELECT revision FROM docs WHERE doc_id = ?', (doc_id,)).fetchone()
+        return None if row is None else row[0]
+
+    def __contains__(self, doc_id):
+        with self.__lock:
+            return self.__db.execute('SELECT 1 FROM docs WHERE doc_id = ?', (doc_id,)).fetchone() is not None
+
+    def update(self, doc_id: str, doc: GoogleDoc, force: bool = False) -> bool:
+        """
+        (Re)indexes the doc unless the indexed revision is the same.
+        :return: True if the doc was indexed
+        """
+        if not force and doc.revision is not None and self.revision(doc_id) == doc.revision:
+            return False
+        words, headings, position = {}, [], 0
+        for elem in iter_paragraphs(doc):
+            paragraph = elem.content
+            heading_id = None if paragraph.style is None else paragraph.style.heading
+            if heading_id is not None:
+                text = ''.join(q.text_run.content or '' for q in paragraph.content or () if q.text_run is not None)
+                headings.append((doc_id, position, heading_id, text.strip()))
+            for run in paragraph.content or ():
+                if run.text_run is None or not run.text_run.content:
+                    continue
+                for word, offset in tokenize(run.text_run.content):
+                    positions, offsets = words.setdefault(word, (array('I'), array('I')))
+                    positions.append(position)
+                    offsets.append((run.start or 0) + offset)
+                    position += 1
+        with self.__lock, self.__db:
+            self.__delete(doc_id)
+            self.__db.execute('INSERT INTO docs VALUES (?, ?, ?)', (doc_id, doc.revision, doc.title))
+            self.__db.executemany('INSERT INTO words VALUES (?, ?, ?, ?)', (
+                (word, doc_id, positions.tobytes(), offsets.tobytes()) for word, (positions, offsets) in words.items()
+            ))
+            self.__db.executemany('INSERT INTO headings VALUES (?, ?, ?, ?)', headings)
+        return True
+
+    def __delete(self, doc_id):
+        for table in ('docs', 'words', 'headings'):
+            self.__db.execute(f'DELETE FROM {table} WHERE doc_id = ?', (doc_id,))
+
+    def remove(self, doc_id: str):
+        with self.__lock, self.__db:
+            self.__delete(doc_id)
+
+    def __postings(self, word, prefix):
+        """
+        {doc_id: {position: offset}} for a word, or every word starting with it.
+        """
+        if prefix:
+            # every string starting with word sorts below word + the highest code point
+            rows = self.__db.execute('SELECT doc_id, positions, offsets FROM words WHERE word >= ? AND word < ?',
+                                     (word, word + '\U0010ffff'))
+        else:
+            rows = self.__db.execute('SELECT doc_id, positions, offsets FROM words WHERE word = ?', (word,))
+        out = {}
+        for doc_id, positions, offsets in rows:
+            out.setdefault(doc_id, {}).update(zip(array('I', positions), array('I', offsets)))
+        return out
+
+    def search(self, query: str, prefix: bool = False, limit: int = None) -> list:
+        """
+        Finds the words of the query as a phrase, in order and next to each other.
+        :param prefix: last word of the query matches any word starting with it
+        :param limit: maximum number of hits
+        :return: list of Hit, by doc then position
+        """
+        words = [q for q, _ in tokenize(query)]
+        if not words:
+            return []
+        hits = []
+        with self.__lock:
+            postings = []
+            for i, word in enumerate(words):
+                posting = self.__postings(word, prefix and i == len(words) - 1)
+                if postings:
+                    posting = {k: v for k, v in posting.items() if k in postings[-1]}
+                if not posting:
+                    return []
+                postings.append(posting)
+            for doc_id in sorted(postings[-1]):
+                first = postings[0][doc_id]
+                starts = sorted(p for p in first
+                                if all(p + i in posting[doc_id] for i, posting in enumerate(postings) if i))
+                if not starts:
+                    continue
+                title, = self.__db.execute('SELECT title FROM docs WHERE doc_id = ?', (doc_id,)).fetchone()
+                headings = self.__db.execute('SELECT position, heading_id, text FROM headings WHERE doc_id = ? '
+                                             'ORDER BY position', (doc_id,)).fetchall()
+                heading_starts = [q[0] for q in headings]
+                for p in starts:
+                    i = bisect_right(heading_starts, p) - 1
+                    heading_id, heading = (None, None) if i < 0 else headings[i][1:]
+                    hits.append(Hit(doc_id, title, p, first[p], heading_id, heading))
+                    if limit is not None and len(hits) >= limit:
+                        return hits
+        return hits
+
+    def close(self):
+        with self.__lock:
+            self.__db.close()
@@ -16,4 +16,6 @@ class ConfigData:
     drive_token: dict = None
     drive_folder_id: str = None
     drive_config_sync_ttl: int = 86400
+    drive_blob_folder: str = None  # BlobCache folder shared by synced files, None to keep no raw bytes
+    drive_blob_max_size: int = None  # bytes kept in drive_blob_folder, least recently used blobs pruned past it
     command_access_token: str = None
\ No newline at end of file